@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""Compares the size and load time of the FileStorage codecs.
+
+Builds a synthetic dataset of Places and Reviews, saves it with every
+codec into a temporary directory and times a cold reload of each file.
+
+Usage: ./benchmarks/file_codecs.py [number of objects]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(tempfile.mkdtemp())
+
+from models.engine import codec  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def dataset(count):
+    """Return count Places and Reviews, one Place for ten Reviews."""
+    objs = []
+    for i in range(count):
+        if i % 11 == 0:
+            place = Place(city_id="city-{}".format(i % 97),
+                          user_id="user-{}".format(i % 1009),
+                          name="Place {}".format(i), number_rooms=i % 5,
+                          number_bathrooms=i % 3, max_guest=i % 9,
+                          price_by_night=50 + i % 400,
+                          latitude=37.7 + i % 100 / 1000.0,
+                          longitude=-122.4 - i % 100 / 1000.0)
+            objs.append(place)
+        else:
+            objs.append(Review(place_id=place.id,
+                               user_id="user-{}".format(i % 1009),
+                               text="Review number {} of the place".format(i)))
+    return objs
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    objs = dataset(count)
+    storage = FileStorage()
+    print("{} objects".format(count))
+    for name in sorted(codec.codecs):
+        FileStorage._FileStorage__codec = codec.get(name)
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__persisted = {}
+        for obj in objs:
+            storage.new(obj)
+        start = time.perf_counter()
+        storage.save()
+        saved = time.perf_counter() - start
+        path = "file" + codec.codecs[name].extension
+        FileStorage._FileStorage__codec = codec.get(name)
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__persisted = {}
+        start = time.perf_counter()
+        storage.reload()
+        loaded = time.perf_counter() - start
+        print("{:>8}: {:>12,} bytes  save {:6.2f}s  reload {:6.2f}s".format(
+            name, os.path.getsize(path), saved, loaded))
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""Measures radius and bounding box searches over the Place grid index.
+
+Fills FileStorage with Places spread uniformly over the contiguous United
+States, as compact rows to keep a million of them in memory, then times
+storage.near() (20 nearest places within 5 km) and storage.within() (0.1
+by 0.1 degree boxes) around random points, against a linear scan of every
+place for reference.
+
+Usage: ./benchmarks/geo_index.py [number of places]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine import codec  # noqa: E402
+from models.engine import geo  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+SOUTH, WEST, NORTH, EAST = 24.5, -124.8, 49.4, -66.9
+
+
+def point(rand):
+    """Return a random (latitude, longitude) inside the test area."""
+    return rand.uniform(SOUTH, NORTH), rand.uniform(WEST, EAST)
+
+
+def fill(storage, count, rand):
+    """Add count Places at random points to storage."""
+    model = codec.model(Place)
+    for i in range(count):
+        lat, lon = point(rand)
+        storage.new(model.to_row({"name": "Place {}".format(i),
+                                  "city_id": "city", "user_id": "user",
+                                  "latitude": lat, "longitude": lon}))
+
+
+def timings(func, points):
+    """Return the mean, median and 99th percentile of func in us."""
+    times = []
+    for lat, lon in points:
+        start = time.perf_counter()
+        func(lat, lon)
+        times.append((time.perf_counter() - start) * 1e6)
+    times.sort()
+    return (sum(times) / len(times), times[len(times) // 2],
+            times[int(len(times) * 0.99)])
+
+
+def scan(storage, lat, lon):
+    """Return the 20 nearest places within 5 km by a linear scan."""
+    found = []
+    for obj in storage.iter(Place):
+        d = geo.distance(lat, lon, obj.latitude, obj.longitude)
+        if d <= 5:
+            found.append((d, obj.id))
+    return sorted(found)[:20]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rand = random.Random(0)
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage()
+    start = time.perf_counter()
+    fill(storage, count, rand)
+    print("filled {} places in {:.1f} s".format(
+        count, time.perf_counter() - start))
+    start = time.perf_counter()
+    storage.within(Place, 0, 0, 0, 0)
+    print("built grid index in {:.1f} s".format(time.perf_counter() - start))
+    points = [point(rand) for i in range(1000)]
+    print("{:22} {:>10} {:>10} {:>10}".format("us/query", "mean", "p50",
+                                              "p99"))
+    print("{:22} {:10.1f} {:10.1f} {:10.1f}".format(
+        "near 5 km, limit 20", *timings(
+            lambda lat, lon: storage.near(Place, lat, lon, 5, 20), points)))
+    print("{:22} {:10.1f} {:10.1f} {:10.1f}".format(
+        "within 0.1 x 0.1 deg", *timings(
+            lambda lat, lon: storage.within(Place, lat, lon, lat + 0.1,
+                                            lon + 0.1), points)))
+    print("{:22} {:10.1f} {:10.1f} {:10.1f}".format(
+        "linear scan", *timings(
+            lambda lat, lon: scan(storage, lat, lon), points[:3])))
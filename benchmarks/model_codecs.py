@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+"""Compares the generic and per-class conversions of objects to records.
+
+Times, for States, Cities, Places and Reviews, how many JSON payloads per
+second are produced from objects (save) and objects built from records
+(reload): once the generic way BaseModel did it before ModelCodec, once
+through the ModelCodec of each class.
+
+Usage: ./benchmarks/model_codecs.py [number of objects per class]
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine import codec  # noqa: E402
+from models.city import City  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+from models.state import State  # noqa: E402
+
+
+def generic_to_dict(obj):
+    """Return the record of obj the way BaseModel.to_dict() used to."""
+    my_dict = obj.__dict__.copy()
+    my_dict["__class__"] = str(type(obj).__name__)
+    my_dict["created_at"] = obj.created_at.isoformat()
+    my_dict["updated_at"] = obj.updated_at.isoformat()
+    my_dict.pop("_sa_instance_state", None)
+    return my_dict
+
+
+def generic_from_dict(cls, record):
+    """Return the object of record built the way reload() used to."""
+    kwargs = dict(record)
+    for key in ("created_at", "updated_at"):
+        kwargs[key] = datetime.strptime(kwargs[key], "%Y-%m-%dT%H:%M:%S.%f")
+    return cls(**kwargs)
+
+
+def dataset(cls, count):
+    """Return count objects of cls with every column set."""
+    if cls == State:
+        return [State(name="State {}".format(i)) for i in range(count)]
+    if cls == City:
+        return [City(name="City {}".format(i), state_id="state-{}".format(i))
+                for i in range(count)]
+    if cls == Place:
+        return [Place(city_id="city-{}".format(i), user_id="user-{}".format(i),
+                      name="Place {}".format(i), description="A place",
+                      number_rooms=i % 5, number_bathrooms=i % 3,
+                      max_guest=i % 9, price_by_night=50 + i % 400,
+                      latitude=37.7, longitude=-122.4) for i in range(count)]
+    return [Review(place_id="place-{}".format(i), user_id="user-{}".format(i),
+                   text="Review number {}".format(i)) for i in range(count)]
+
+
+def generic_save(obj):
+    """Return the JSON payload of obj the way FileStorage used to."""
+    return json.dumps(generic_to_dict(obj), sort_keys=True)
+
+
+def codec_save(obj):
+    """Return the JSON payload of obj through its ModelCodec."""
+    return json.dumps(codec.model(type(obj)).to_dict(obj))
+
+
+def rate(func, items):
+    """Return how many items per second func converts."""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("{:8} {:>14} {:>14} {:>14} {:>14}".format(
+        "records/s", "save generic", "save codec", "load generic",
+        "load codec"))
+    for cls in (State, City, Place, Review):
+        objs = dataset(cls, count)
+        records = [generic_to_dict(o) for o in objs]
+        model = codec.model(cls)
+        assert [codec_save(o) for o in objs] == \
+            [generic_save(o) for o in objs]
+        print("{:8} {:14.0f} {:14.0f} {:14.0f} {:14.0f}".format(
+            cls.__name__, rate(generic_save, objs), rate(codec_save, objs),
+            rate(lambda r: generic_from_dict(cls, r), records),
+            rate(model.from_dict, records)))
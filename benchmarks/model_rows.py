@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""Measures the memory taken by model objects and by compact rows.
+
+For every model class, builds objects from records the way FileStorage
+does on reload, once as model instances and once as compact rows
+(HBNB_FILE_COMPACT=1), and reports the bytes allocated per object. The
+attribute values are shared with the records, so the figures are the
+per-object overhead plus the two parsed timestamps.
+
+Usage: ./benchmarks/model_rows.py [number of objects per class]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import classes  # noqa: E402
+from models.engine import codec  # noqa: E402
+
+
+def records(cls, count):
+    """Return count records of cls with every column set."""
+    model = codec.model(cls)
+    out = []
+    for i in range(count):
+        record = {k: "{}-{}".format(k, i) for k in model.fields}
+        obj = cls(**{k: v for k, v in record.items()
+                     if k not in ("created_at", "updated_at")})
+        out.append(obj.to_dict())
+    return out
+
+
+def size(build, items):
+    """Return the bytes allocated per item by build."""
+    gc.collect()
+    tracemalloc.start()
+    objs = [build(item) for item in items]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used / len(objs)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("{:10} {:>10} {:>10}".format("bytes/obj", "model", "row"))
+    for name, cls in classes.items():
+        if name == "BaseModel":
+            continue
+        items = records(cls, count)
+        model = codec.model(cls)
+        print("{:10} {:10.0f} {:10.0f}".format(
+            name, size(model.from_dict, items), size(model.to_row, items)))
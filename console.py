@@ -2,30 +2,16 @@
 """Defines the HBNB console."""
 import cmd
 from shlex import split
+from models import classes
 from models import storage
 from datetime import datetime
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.amenity import Amenity
-from models.place import Place
-from models.review import Review
 
 
 class HBNBCommand(cmd.Cmd):
     """Defines the HolbertonBnB command interpreter."""
 
     prompt = "(hbnb) "
-    __classes = {
-        "BaseModel",
-        "User",
-        "State",
-        "City",
-        "Amenity",
-        "Place",
-        "Review"
-    }
+    __classes = classes
 
     def emptyline(self):
         """Ignore empty spaces."""
@@ -61,10 +47,12 @@ class HBNBCommand(cmd.Cmd):
                         continue
                 kwargs[key] = value
 
+            if my_list[0] not in self.__classes:
+                raise NameError()
             if kwargs == {}:
-                obj = eval(my_list[0])()
+                obj = self.__classes[my_list[0]]()
             else:
-                obj = eval(my_list[0])(**kwargs)
+                obj = self.__classes[my_list[0]](**kwargs)
                 storage.new(obj)
             print(obj.id)
             obj.save()
@@ -90,12 +78,10 @@ class HBNBCommand(cmd.Cmd):
                 raise NameError()
             if len(my_list) < 2:
                 raise IndexError()
-            objects = storage.all()
-            key = my_list[0] + '.' + my_list[1]
-            if key in objects:
-                print(objects[key])
-            else:
+            obj = storage.get(my_list[0], my_list[1])
+            if obj is None:
                 raise KeyError()
+            print(obj)
         except SyntaxError:
             print("** class name missing **")
         except NameError:
@@ -121,13 +107,11 @@ class HBNBCommand(cmd.Cmd):
                 raise NameError()
             if len(my_list) < 2:
                 raise IndexError()
-            objects = storage.all()
-            key = my_list[0] + '.' + my_list[1]
-            if key in objects:
-                del objects[key]
-                storage.save()
-            else:
+            obj = storage.get(my_list[0], my_list[1])
+            if obj is None:
                 raise KeyError()
+            storage.delete(obj)
+            storage.save()
         except SyntaxError:
             print("** class name missing **")
         except NameError:
@@ -142,20 +126,29 @@ class HBNBCommand(cmd.Cmd):
         Display string representations of all instances of a given class.
         If no class is specified, displays all instantiated objects."""
         if not line:
-            o = storage.all()
-            print([o[k].__str__() for k in o])
+            self.__print_all(storage.iter())
             return
         try:
             args = line.split(" ")
             if args[0] not in self.__classes:
                 raise NameError()
 
-            o = storage.all(eval(args[0]))
-            print([o[k].__str__() for k in o])
+            self.__print_all(storage.iter(self.__classes[args[0]]))
 
         except NameError:
             print("** class doesn't exist **")
 
+    def __print_all(self, objs):
+        """Print the list of the string representations of objs.
+
+        Objects are printed as objs yields them, not collected first.
+        """
+        sep = "["
+        for obj in objs:
+            print(sep + repr(str(obj)), end="")
+            sep = ", "
+        print("[]" if sep == "[" else "]")
+
     def do_update(self, line):
         """Updates an instanceby adding or updating attribute
         Exceptions:
@@ -174,20 +167,19 @@ class HBNBCommand(cmd.Cmd):
                 raise NameError()
             if len(my_list) < 2:
                 raise IndexError()
-            objects = storage.all()
-            key = my_list[0] + '.' + my_list[1]
-            if key not in objects:
+            v = storage.get(my_list[0], my_list[1])
+            if v is None:
                 raise KeyError()
             if len(my_list) < 3:
                 raise AttributeError()
             if len(my_list) < 4:
                 raise ValueError()
-            v = objects[key]
             try:
-                v.__dict__[my_list[2]] = eval(my_list[3])
+                value = eval(my_list[3])
             except Exception:
-                v.__dict__[my_list[2]] = my_list[3]
-                v.save()
+                value = my_list[3]
+            setattr(v, my_list[2], value)
+            v.save()
         except SyntaxError:
             print("** class name missing **")
         except NameError:
@@ -204,17 +196,11 @@ class HBNBCommand(cmd.Cmd):
     def count(self, line):
         """count the number of instances of a class
         """
-        counter = 0
         try:
             my_list = split(line, " ")
             if my_list[0] not in self.__classes:
                 raise NameError()
-            objects = storage.all()
-            for key in objects:
-                name = key.split('.')
-                if name[0] == my_list[0]:
-                    counter += 1
-            print(counter)
+            print(storage.count(my_list[0]))
         except NameError:
             print("** class doesn't exist **")
 
@@ -258,7 +244,6 @@ class HBNBCommand(cmd.Cmd):
             elif my_list[1][:6] == "update":
                 args = self.strip_clean(my_list)
                 if isinstance(args, list):
-                    obj = storage.all()
                     key = args[0] + ' ' + args[1]
                     for k, v in args[2].items():
                         self.do_update(key + ' "{}" "{}"'.format(k, v))
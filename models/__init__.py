@@ -1,16 +1,45 @@
 #!/usr/bin/python3
 """Instantiates a storage object.
 
+-> classes maps every model class name to its class. Storage engines and
+   the console resolve class names through it.
+
 -> If the environmental variable 'HBNB_TYPE_STORAGE' is set to 'db',
    instantiates a database storage engine (DBStorage).
+-> If it is set to 'sqlite', instantiates a database storage engine on the
+   SQLite file HBNB_SQLITE_DB (hbnb.db by default).
+-> If it is set to 'mmap', instantiates a read-only storage engine serving
+   the binary snapshot written by FileStorage (MmapStorage).
 -> Otherwise, instantiates a file storage engine (FileStorage).
 """
 from os import getenv
+from models.base_model import BaseModel
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
 
+classes = {
+    "BaseModel": BaseModel,
+    "User": User,
+    "State": State,
+    "City": City,
+    "Amenity": Amenity,
+    "Place": Place,
+    "Review": Review
+}
 
 if getenv("HBNB_TYPE_STORAGE") == "db":
     from models.engine.db_storage import DBStorage
     storage = DBStorage()
+elif getenv("HBNB_TYPE_STORAGE") == "sqlite":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage("sqlite:///" + getenv("HBNB_SQLITE_DB", "hbnb.db"))
+elif getenv("HBNB_TYPE_STORAGE") == "mmap":
+    from models.engine.mmap_storage import MmapStorage
+    storage = MmapStorage()
 else:
     from models.engine.file_storage import FileStorage
     storage = FileStorage()
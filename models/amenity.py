@@ -18,6 +18,6 @@ class Amenity(BaseModel, Base):
         place_amenities (sqlalchemy relationship): Place-Amenity relationship.
     """
     __tablename__ = "amenities"
-    name = Column(String(128), nullable=False)
+    name = Column(String(128), nullable=False, index=True)
     place_amenities = relationship("Place", secondary="place_amenity",
                                    viewonly=False)
@@ -3,6 +3,7 @@
 import models
 from uuid import uuid4
 from datetime import datetime
+from models.engine import codec
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column
 from sqlalchemy import DateTime
@@ -30,15 +31,27 @@ class BaseModel:
         Args:
             *args (any): Unused.
             **kwargs (dict): Key/value pairs of attributes.
+
+        The new object is not stored yet: its attributes are set without
+        telling the storage.
         """
-        self.id = str(uuid4())
-        self.created_at = self.updated_at = datetime.utcnow()
+        assign = super().__setattr__
+        now = datetime.utcnow()
+        assign("id", str(uuid4()))
+        assign("created_at", now)
+        assign("updated_at", now)
         if kwargs:
             for key, value in kwargs.items():
-                if key == "created_at" or key == "updated_at":
-                    value = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
+                if (key == "created_at" or key == "updated_at") and \
+                        type(value) == str:
+                    value = datetime.fromisoformat(value)
                 if key != "__class__":
-                    setattr(self, key, value)
+                    assign(key, value)
+
+    def __setattr__(self, name, value):
+        """Set an attribute and tell the storage the object changed."""
+        super().__setattr__(name, value)
+        models.storage.changed(self)
 
     def save(self):
         """Update updated_at with the current datetime."""
@@ -52,12 +65,7 @@ class BaseModel:
         Includes the key/value pair __class__ representing
         the class name of the object.
         """
-        my_dict = self.__dict__.copy()
-        my_dict["__class__"] = str(type(self).__name__)
-        my_dict["created_at"] = self.created_at.isoformat()
-        my_dict["updated_at"] = self.updated_at.isoformat()
-        my_dict.pop("_sa_instance_state", None)
-        return my_dict
+        return codec.model(type(self)).to_dict(self)
 
     def delete(self):
         """Delete the current instance from storage."""
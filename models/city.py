@@ -4,6 +4,7 @@ from models.base_model import Base
 from models.base_model import BaseModel
 from sqlalchemy import Column
 from sqlalchemy import ForeignKey
+from sqlalchemy import Index
 from sqlalchemy import String
 from sqlalchemy.orm import relationship
 
@@ -15,10 +16,12 @@ class City(BaseModel, Base):
 
     Attributes:
         __tablename__ (str): The name of the MySQL table to store Cities.
+        __table_args__ (tuple): The index on the state_id foreign key.
         name (sqlalchemy String): The name of the City.
         state_id (sqlalchemy String): The state id of the City.
     """
     __tablename__ = "cities"
-    name = Column(String(128), nullable=False)
+    __table_args__ = (Index("ix_cities_state_id", "state_id"),)
+    name = Column(String(128), nullable=False, index=True)
     state_id = Column(String(60), ForeignKey("states.id"), nullable=False)
     places = relationship("Place", backref="cities", cascade="delete")
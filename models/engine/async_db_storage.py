@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+"""Defines the AsyncDBStorage engine."""
+import asyncio
+from os import getenv
+from models import classes
+from models.engine import pool
+from models.engine.db_storage import eager
+from models.base_model import Base
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_scoped_session
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+class AsyncDBStorage:
+    """Represents an asyncio database storage engine.
+
+    The counterpart of DBStorage for asyncio applications: the same models
+    and queries, but every method is a coroutine, so a worker serves other
+    requests while one waits on the database. Each asyncio task works in a
+    session of its own, which close() ends.
+
+    Relationships cannot be loaded lazily under asyncio: the ones to read
+    are passed to all() with load.
+
+    Attributes:
+        __engine (sqlalchemy.ext.asyncio.AsyncEngine): The working engine.
+        __session (sqlalchemy.ext.asyncio.async_scoped_session): The
+            registry of the sessions, one per task.
+        __classes (tuple): The mapped classes all() queries when no class
+            is given.
+    """
+
+    __engine = None
+    __session = None
+    __classes = (State, City, User, Place, Review, Amenity)
+
+    def __init__(self, url=None):
+        """Initialize a new AsyncDBStorage instance.
+
+        Args:
+            url (str): The URL of the database, naming an asyncio driver
+                such as "sqlite+aiosqlite:///hbnb.db". Defaults to the
+                MySQL database of the HBNB_MYSQL_* environment variables,
+                through aiomysql, with the pool settings of DBStorage
+                (see models/engine/pool.py).
+        """
+        options = {}
+        if url is None:
+            url = "mysql+aiomysql://{}:{}@{}/{}".format(
+                getenv("HBNB_MYSQL_USER"), getenv("HBNB_MYSQL_PWD"),
+                getenv("HBNB_MYSQL_HOST"), getenv("HBNB_MYSQL_DB"))
+            options = pool.options()
+            del options["poolclass"]
+        self.__engine = create_async_engine(url, **options)
+
+    async def all(self, cls=None, load=None):
+        """Query on the current task's session all objects of cls.
+
+        If cls is None, queries all types of objects.
+
+        Args:
+            cls (class or str): The class of the objects.
+            load (list): Relationships of cls to load with the objects,
+                as in DBStorage.all().
+
+        Return:
+            Dict of queried classes in the format <class name>.<obj id> = obj.
+
+        Raises:
+            ValueError: If load names an unknown relationship.
+        """
+        session = self.__session()
+        if type(cls) == str:
+            cls = classes[cls]
+        objs = {}
+        for c in self.__classes if cls is None else (cls,):
+            query = select(c)
+            if cls is not None:
+                query = query.options(*eager(c, load))
+            for o in await session.scalars(query):
+                objs["{}.{}".format(type(o).__name__, o.id)] = o
+        return objs
+
+    async def get(self, cls, id):
+        """Return the object of class cls with the given id, or None."""
+        if type(cls) == str:
+            cls = classes[cls]
+        if cls not in self.__classes:
+            return None
+        return await self.__session().get(cls, id)
+
+    async def count(self, cls=None):
+        """Return the number of objects of class cls, or of every class."""
+        if type(cls) == str:
+            cls = classes[cls]
+        session = self.__session()
+        total = 0
+        for c in self.__classes if cls is None else (cls,):
+            if c in self.__classes:
+                total += await session.scalar(
+                    select(func.count()).select_from(c))
+        return total
+
+    async def new(self, obj):
+        """Add obj to the current task's session."""
+        self.__session().add(obj)
+
+    async def save(self):
+        """Commit all changes of the current task's session."""
+        await self.__session().commit()
+
+    async def delete(self, obj=None):
+        """Delete obj from the current task's session."""
+        if obj is not None:
+            await self.__session().delete(obj)
+
+    async def reload(self):
+        """Create all tables in the database and set up the sessions."""
+        async with self.__engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=self.__engine,
+                                             expire_on_commit=False)
+        self.__session = async_scoped_session(
+            session_factory, scopefunc=asyncio.current_task)
+
+    async def close(self):
+        """Close the current task's session.
+
+        Each task using the storage should call close() when it is done,
+        like the teardown of a request.
+        """
+        await self.__session.remove()
+
+    async def dispose(self):
+        """Close the sessions tasks left open and every connection."""
+        sessions = self.__session.registry.registry
+        while sessions:
+            scope, session = sessions.popitem()
+            await session.close()
+        await self.__engine.dispose()
@@ -0,0 +1,609 @@
+#!/usr/bin/python3
+"""Defines the on-disk codecs used by FileStorage.
+
+A codec turns objects into payloads, the serialized form FileStorage
+caches for every object, and reads/writes whole snapshot files made of
+(key, payload) pairs.
+
+-> JSONCodec: The historical file.json format.
+-> BinaryCodec: A compact binary format. Records of a class share one
+   field schema instead of repeating key names, and datetimes are stored
+   as integers.
+
+Objects themselves are converted to and from records (to_dict() style
+dictionaries) by the ModelCodec of their class, see model().
+
+Usage: ./models/engine/codec.py <source> <destination>
+    Converts a snapshot between formats, picked from the file extensions.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from datetime import datetime
+from datetime import timedelta
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from models.engine import rows  # noqa: E402
+from sqlalchemy import inspect  # noqa: E402
+from sqlalchemy.orm import configure_mappers  # noqa: E402
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_TIMESTAMPS = ("created_at", "updated_at")
+
+
+def _stream(f, size=1 << 16):
+    """Yield (key, text, record) for each member of the JSON object in f.
+
+    f is read size characters at a time and each record is decoded as
+    soon as it is complete; text is its raw JSON source.
+
+    Raises:
+        ValueError: If f does not hold a complete JSON object.
+    """
+    decode = json.JSONDecoder().raw_decode
+    buf, pos, eof = "", 0, False
+    state, key = "{", None
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        try:
+            if pos == len(buf):
+                raise IndexError(pos)
+            if state == "key" and buf[pos] != "}" or state == "value":
+                o, end = decode(buf, pos)
+                if end == len(buf) and not eof:
+                    raise IndexError(end)
+                if state == "key":
+                    key, state = o, ":"
+                else:
+                    yield key, buf[pos:end], o
+                    state = ","
+                pos = end
+            elif buf[pos] == state or state == "key":
+                if buf[pos] == "}":
+                    return
+                state = {"{": "key", ":": "value", ",": "key"}[state]
+                pos += 1
+            elif state == "," and buf[pos] == "}":
+                return
+            else:
+                raise json.JSONDecodeError(
+                    "Expecting '{}'".format(state), buf, pos)
+        except (IndexError, ValueError) as e:
+            if eof and isinstance(e, ValueError):
+                raise
+            if eof:
+                raise json.JSONDecodeError(
+                    "Unterminated object", buf, pos) from None
+            chunk = f.read(size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+
+class JSONCodec:
+    """Stores a snapshot as one JSON object of <class name>.<id> = dict.
+
+    Payloads are the JSON text of each object's to_dict(), whose keys
+    ModelCodec already sorts.
+    """
+
+    name = "json"
+    extension = ".json"
+    binary = False
+    schemas = {}
+
+    def encode(self, obj):
+        """Return the payload of obj."""
+        return json.dumps(obj.to_dict())
+
+    def encode_record(self, record):
+        """Return the payload of a record read back from disk."""
+        return json.dumps(record, sort_keys=True)
+
+    def to_json(self, payload):
+        """Return payload as JSON text."""
+        return payload
+
+    def dump(self, f, items):
+        """Write the (key, payload) pairs in items to the text file f."""
+        f.write("{")
+        f.write(", ".join("{}: {}".format(json.dumps(k), v)
+                          for k, v in items))
+        f.write("}")
+
+    def load(self, f):
+        """Yield (key, payload, record) for each object stored in f."""
+        return _stream(f)
+
+
+class BinaryCodec:
+    """Stores a snapshot in a compact binary format.
+
+    A file is a magic number followed by one section per class and an end
+    marker. A section holds the class name, its field names and the
+    records of that class. Each record stores its fields in schema order
+    as tagged values, then any attributes missing from the schema with
+    their names. Integers are varints, strings are length-prefixed UTF-8
+    and datetimes are microseconds since the epoch.
+
+    The end marker is followed by an index for random access: one
+    (key hash, record offset) pair per record sorted by hash, a JSON table
+    of [name, fields, first record offset, end offset] per section, and a
+    fixed-size trailer locating both (see TRAILER).
+
+    Attributes:
+        schemas (dict): Field names of every class seen so far. Payloads
+            always follow these schemas; records read from a file written
+            with another schema are re-encoded.
+    """
+
+    name = "binary"
+    extension = ".bin"
+    binary = True
+    MAGIC = b"HBNB\x01"
+    ENTRY = struct.Struct("<QQ")
+    TRAILER = struct.Struct("<QQQ8s")
+    TRAILER_MAGIC = b"HBNBIDX1"
+    (MISSING, NONE, STR, INT, FLOAT, TRUE, FALSE, DATETIME, JSON) = range(9)
+
+    def __init__(self):
+        """Initialize a new BinaryCodec."""
+        self.schemas = {}
+
+    def schema(self, cls):
+        """Return the field names records of cls are stored with."""
+        fields = self.schemas.get(cls.__name__)
+        if fields is None:
+            fields = ["id", "created_at", "updated_at"]
+            table = getattr(cls, "__table__", None)
+            if table is not None:
+                fields += [c.name for c in table.columns
+                           if c.name not in fields]
+            self.schemas[cls.__name__] = fields
+        return fields
+
+    def encode(self, obj):
+        """Return the payload of obj."""
+        self.schema(type(obj))
+        if isinstance(obj, rows.Row):
+            return self.pack(type(obj).__name__, obj._values())
+        return self.pack(type(obj).__name__, obj.__dict__)
+
+    def encode_record(self, record):
+        """Return the payload of a record read back from disk.
+
+        The first record of a class not seen yet defines its schema.
+        """
+        name = record["__class__"]
+        if name not in self.schemas:
+            self.schemas[name] = [k for k in record if k != "__class__"]
+        values = dict(record)
+        for k in _TIMESTAMPS:
+            if type(values.get(k)) == str:
+                values[k] = datetime.fromisoformat(values[k])
+        return self.pack(name, values)
+
+    def to_json(self, payload):
+        """Return payload as JSON text."""
+        record = self.record(payload)
+        for k, v in record.items():
+            if type(v) == datetime:
+                record[k] = v.isoformat()
+        return json.dumps(record, sort_keys=True)
+
+    def record(self, payload):
+        """Return the record stored in a payload of this codec."""
+        name_len = payload[0]
+        name = payload[1:1 + name_len].decode("utf-8")
+        record = self.unpack(self.schemas[name], payload, 1 + name_len)
+        record["__class__"] = name
+        return record
+
+    def pack(self, name, values):
+        """Return the payload of values, an object of the class name.
+
+        The payload starts with the class name so it can be decoded on its
+        own; dump() strips it since a section already names the class.
+        """
+        fields = self.schemas[name]
+        out = bytearray()
+        raw = name.encode("utf-8")
+        out.append(len(raw))
+        out += raw
+        for k in fields:
+            self._value(out, values.get(k, self))
+        extras = [k for k in values if k not in fields and
+                  k != "__class__" and k != "_sa_instance_state"]
+        self._varint(out, len(extras))
+        for k in extras:
+            self._string(out, k)
+            self._value(out, values[k])
+        return bytes(out)
+
+    def unpack(self, fields, buf, pos=0):
+        """Return the record stored in buf at pos with the given fields."""
+        record = {}
+        for k in fields:
+            v, pos = self._read(buf, pos)
+            if v is not self:
+                record[k] = v
+        count, pos = self._read_varint(buf, pos)
+        for _ in range(count):
+            n, pos = self._read_varint(buf, pos)
+            k = buf[pos:pos + n].decode("utf-8")
+            record[k], pos = self._read(buf, pos + n)
+        return record
+
+    def _value(self, out, v):
+        """Append the tagged value v to out; self stands for a missing v."""
+        t = type(v)
+        if v is self:
+            out.append(self.MISSING)
+        elif v is None:
+            out.append(self.NONE)
+        elif t == str:
+            out.append(self.STR)
+            self._string(out, v)
+        elif t == bool:
+            out.append(self.TRUE if v else self.FALSE)
+        elif t == int and -(1 << 63) <= v < (1 << 63):
+            out.append(self.INT)
+            self._varint(out, (v << 1) ^ (v >> 63))
+        elif t == float:
+            out.append(self.FLOAT)
+            out += struct.pack("<d", v)
+        elif t == datetime and v.tzinfo is None:
+            out.append(self.DATETIME)
+            n = (v - _EPOCH) // _MICROSECOND
+            self._varint(out, (n << 1) ^ (n >> 63))
+        else:
+            out.append(self.JSON)
+            self._string(out, json.dumps(v, default=str))
+
+    def _read(self, buf, pos):
+        """Return the tagged value in buf at pos and the position after."""
+        tag = buf[pos]
+        pos += 1
+        if tag == self.STR:
+            n, pos = self._read_varint(buf, pos)
+            return buf[pos:pos + n].decode("utf-8"), pos + n
+        if tag == self.DATETIME or tag == self.INT:
+            n, pos = self._read_varint(buf, pos)
+            n = (n >> 1) ^ -(n & 1)
+            if tag == self.INT:
+                return n, pos
+            return _EPOCH + timedelta(microseconds=n), pos
+        if tag == self.MISSING:
+            return self, pos
+        if tag == self.NONE:
+            return None, pos
+        if tag == self.FLOAT:
+            return struct.unpack_from("<d", buf, pos)[0], pos + 8
+        if tag == self.TRUE or tag == self.FALSE:
+            return tag == self.TRUE, pos
+        if tag == self.JSON:
+            n, pos = self._read_varint(buf, pos)
+            return json.loads(buf[pos:pos + n].decode("utf-8")), pos + n
+        raise ValueError("Unknown tag {} at {}".format(tag, pos - 1))
+
+    @staticmethod
+    def _varint(out, n):
+        """Append the non-negative integer n to out as a varint."""
+        while n > 0x7f:
+            out.append(n & 0x7f | 0x80)
+            n >>= 7
+        out.append(n)
+
+    @staticmethod
+    def _read_varint(buf, pos):
+        """Return the varint in buf at pos and the position after it."""
+        n = shift = 0
+        while True:
+            b = buf[pos]
+            pos += 1
+            n |= (b & 0x7f) << shift
+            if b < 0x80:
+                return n, pos
+            shift += 7
+
+    def _string(self, out, s):
+        """Append the length-prefixed UTF-8 string s to out."""
+        raw = s.encode("utf-8")
+        self._varint(out, len(raw))
+        out += raw
+
+    @staticmethod
+    def key_hash(key):
+        """Return the 64-bit hash of key used by the index."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8)
+        return int.from_bytes(digest.digest(), "little")
+
+    def dump(self, f, items):
+        """Write the (key, payload) pairs in items to the binary file f."""
+        sections = {}
+        for k, v in items:
+            sections.setdefault(k.split(".", 1)[0], []).append((k, v))
+        out = bytearray(self.MAGIC)
+        offset = 0
+        index = []
+        table = []
+        for name, entries in sections.items():
+            out.append(ord("S"))
+            self._string(out, name)
+            fields = self.schemas[name]
+            self._varint(out, len(fields))
+            for k in fields:
+                self._string(out, k)
+            self._varint(out, len(entries))
+            start = offset + len(out)
+            skip = 1 + len(name.encode("utf-8"))
+            for key, payload in entries:
+                index.append((self.key_hash(key), offset + len(out)))
+                self._varint(out, len(payload) - skip)
+                out += memoryview(payload)[skip:]
+            table.append([name, fields, start, offset + len(out)])
+            f.write(out)
+            offset += len(out)
+            out.clear()
+        out.append(ord("E"))
+        index.sort()
+        index_offset = offset + len(out)
+        for entry in index:
+            out += self.ENTRY.pack(*entry)
+        table_offset = offset + len(out)
+        out += json.dumps(table).encode("utf-8")
+        out += self.TRAILER.pack(index_offset, len(index), table_offset,
+                                 self.TRAILER_MAGIC)
+        f.write(out)
+
+    def load(self, f):
+        """Yield (key, payload, record) for each object stored in f.
+
+        Raises:
+            ValueError: If f does not hold a complete binary snapshot.
+        """
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            buf = f.read()
+        try:
+            yield from self._load(buf)
+        finally:
+            if type(buf) == mmap.mmap:
+                buf.close()
+
+    def _load(self, buf):
+        """Yield (key, payload, record) for each object stored in buf."""
+        if buf[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError("Not a binary HBNB snapshot")
+        pos = len(self.MAGIC)
+        try:
+            while buf[pos] == ord("S"):
+                n, pos = self._read_varint(buf, pos + 1)
+                name = buf[pos:pos + n].decode("utf-8")
+                head = bytes([n]) + buf[pos:pos + n]
+                count, pos = self._read_varint(buf, pos + n)
+                fields = []
+                for _ in range(count):
+                    n, pos = self._read_varint(buf, pos)
+                    fields.append(buf[pos:pos + n].decode("utf-8"))
+                    pos += n
+                live = self.schemas.setdefault(name, fields)
+                count, pos = self._read_varint(buf, pos)
+                for _ in range(count):
+                    n, pos = self._read_varint(buf, pos)
+                    end = pos + n
+                    record = self.unpack(fields, buf, pos)
+                    if live == fields:
+                        payload = head + buf[pos:end]
+                    else:
+                        payload = self.pack(name, record)
+                    record["__class__"] = name
+                    pos = end
+                    yield "{}.{}".format(name, record["id"]), payload, record
+            if buf[pos] != ord("E"):
+                raise ValueError("Unexpected byte at {}".format(pos))
+        except IndexError:
+            raise ValueError("Truncated binary HBNB snapshot") from None
+
+
+class ModelCodec:
+    """Converts the objects of one model class to and from records.
+
+    Built once per class from its columns, so that to_dict() and
+    from_dict() skip the generic work of BaseModel: records come out with
+    their keys already sorted, timestamps are parsed with
+    datetime.fromisoformat() and objects are built without running
+    __init__ or setting their attributes one by one.
+
+    Attributes:
+        cls (type): The model class.
+        name (str): The class name stored in records.
+        fields (list): The sorted column names of the class.
+        indexed (tuple): The columns declared with index=True, which file
+            storage engines keep a SortedIndex of.
+        types (dict): The Python type of each column, by name.
+        new (callable): Returns a blank, initialized instance of cls.
+        row (type): The compact row class of cls (see rows.py), built on
+            first use by to_row().
+    """
+
+    row = None
+
+    def __init__(self, cls):
+        """Initialize a new ModelCodec for cls.
+
+        The SQLAlchemy mappers are configured first, as building a model
+        object would do: instances made by new() in a process that has
+        not built one yet would otherwise lack their instrumentation.
+        """
+        self.cls = cls
+        self.name = cls.__name__
+        fields = set(_TIMESTAMPS)
+        fields.add("id")
+        table = getattr(cls, "__table__", None)
+        self.indexed = ()
+        self.types = {"id": str, "created_at": datetime,
+                      "updated_at": datetime}
+        if table is not None:
+            fields.update(c.name for c in table.columns)
+            self.indexed = tuple(c.name for c in table.columns if c.index)
+            self.types.update((c.name, c.type.python_type)
+                              for c in table.columns)
+        self.fields = sorted(fields)
+        self.__ordered = all(k > "__class__" for k in self.fields)
+        mapper = inspect(cls, raiseerr=False)
+        if mapper is not None:
+            configure_mappers()
+            self.new = mapper.class_manager.new_instance
+        else:
+            self.new = lambda: cls.__new__(cls)
+
+    def to_dict(self, obj):
+        """Return the record of obj, as BaseModel.to_dict() describes it.
+
+        The timestamps are read as attributes first, which reloads the
+        values of an object the database session expired.
+        """
+        created_at = getattr(obj, "created_at").isoformat()
+        updated_at = getattr(obj, "updated_at").isoformat()
+        values = obj.__dict__
+        record = {"__class__": self.name}
+        for k in self.fields:
+            if k in values:
+                record[k] = values[k]
+        record["created_at"] = created_at
+        record["updated_at"] = updated_at
+        if len(record) != len(values) + 1 - \
+                ("_sa_instance_state" in values) or not self.__ordered:
+            for k, v in values.items():
+                if k not in record and k != "_sa_instance_state":
+                    record[k] = v
+            record = dict(sorted(record.items()))
+        return record
+
+    def from_dict(self, record):
+        """Return a new object built from record.
+
+        Records lacking an id or a timestamp go through the class
+        constructor, which fills them in.
+        """
+        if "id" not in record or "created_at" not in record or \
+                "updated_at" not in record:
+            return self.cls(**record)
+        obj = self.new()
+        values = obj.__dict__
+        values.update(record)
+        values.pop("__class__", None)
+        for k in _TIMESTAMPS:
+            if type(values[k]) == str:
+                values[k] = datetime.fromisoformat(values[k])
+        return obj
+
+    def coerce(self, attr, value):
+        """Return value converted to the Python type of the column attr.
+
+        None, values of other attributes and numbers given for a numeric
+        column are returned as they are.
+
+        Raises:
+            ValueError: If value cannot be converted.
+        """
+        kind = self.types.get(attr)
+        if value is None or kind is None or type(value) == kind:
+            return value
+        if kind in (int, float) and type(value) in (int, float):
+            return value
+        try:
+            if kind == datetime:
+                return datetime.fromisoformat(value)
+            if kind == str or type(value) == str:
+                return kind(value)
+        except (TypeError, ValueError):
+            pass
+        raise ValueError("{}.{} takes {} values, not {!r}".format(
+            self.name, attr, kind.__name__, value))
+
+    def value(self, obj, attr):
+        """Return the value of attr on obj, an object or a record.
+
+        The value is converted by coerce(). Values that cannot be
+        converted are read as None, so indexes and lookups leave them out
+        as they do NULLs.
+        """
+        if isinstance(obj, dict):
+            value = obj.get(attr)
+        else:
+            value = getattr(obj, attr, None)
+        try:
+            return self.coerce(attr, value)
+        except ValueError:
+            return None
+
+    def to_row(self, record):
+        """Return a new compact row built from record."""
+        if self.row is None:
+            self.row = rows.row_class(self.cls, self.fields)
+        return self.row(**record)
+
+
+codecs = {c.name: c for c in (JSONCodec, BinaryCodec)}
+_models = {}
+
+
+def model(cls):
+    """Return the ModelCodec of the model class cls."""
+    c = _models.get(cls)
+    if c is None:
+        c = _models[cls] = ModelCodec(cls)
+    return c
+
+
+def get(name):
+    """Return a new codec instance for the given codec name.
+
+    Raises:
+        ValueError: If no codec has that name.
+    """
+    try:
+        return codecs[name]()
+    except KeyError:
+        raise ValueError("Unknown codec: {}".format(name)) from None
+
+
+def convert(src, dst):
+    """Convert the snapshot file src into dst.
+
+    The format of each file is picked from its extension.
+    """
+    by_ext = {c.extension: c for c in codecs.values()}
+    reader = by_ext[src[src.rindex("."):]]()
+    writer = by_ext[dst[dst.rindex("."):]]()
+    with open(src, "rb" if reader.binary else "r",
+              encoding=None if reader.binary else "utf-8") as f:
+        items = []
+        for key, payload, record in reader.load(f):
+            if type(writer) == type(reader):
+                items.append((key, payload))
+            else:
+                for k in _TIMESTAMPS:
+                    if type(record.get(k)) == datetime:
+                        record[k] = record[k].isoformat()
+                items.append((key, writer.encode_record(record)))
+    with open(dst, "wb" if writer.binary else "w",
+              encoding=None if writer.binary else "utf-8") as f:
+        writer.dump(f, items)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: {} <source> <destination>".format(sys.argv[0]))
+        sys.exit(1)
+    convert(sys.argv[1], sys.argv[2])
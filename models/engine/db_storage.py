@@ -1,6 +1,15 @@
 #!/usr/bin/python3
 """Defines the DBStorage engine."""
+from datetime import datetime
+from itertools import count
+from itertools import islice
 from os import getenv
+from time import perf_counter
+from uuid import uuid4
+from models import classes
+from models.engine import geo
+from models.engine import lookups
+from models.engine import pool
 from models.base_model import Base
 from models.base_model import BaseModel
 from models.amenity import Amenity
@@ -10,57 +19,517 @@ from models.review import Review
 from models.state import State
 from models.user import User
 from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import inspect
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import object_session
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import scoped_session
 from sqlalchemy.orm import sessionmaker
 
 
+def eager(cls, load):
+    """Return the loader options eagerly loading the paths of load.
+
+    A path is a relationship of cls, or a chain of relationships joined by
+    dots: "reviews.user" loads the reviews of each object and the user of
+    each review. Collections are loaded by one more SELECT ... WHERE ... IN
+    per path (selectin), references by a JOIN in the query itself (joined),
+    so the number of queries depends on the paths and not on the number of
+    objects.
+
+    Raises:
+        ValueError: If a path names an unknown relationship.
+    """
+    options = []
+    for path in load or ():
+        option = None
+        owner = cls
+        for name in path.split("."):
+            relationships = inspect(owner).relationships
+            if name not in relationships:
+                raise ValueError("{} has no relationship {}".format(
+                    owner.__name__, name))
+            rel = relationships[name]
+            attr = getattr(owner, name)
+            if option is None:
+                option = selectinload(attr) if rel.uselist \
+                    else joinedload(attr)
+            elif rel.uselist:
+                option = option.selectinload(attr)
+            else:
+                option = option.joinedload(attr)
+            owner = rel.mapper.class_
+        options.append(option)
+    return options
+
+
 class DBStorage:
     """Represents a database storage engine.
 
+    With read replicas, the reads (all, get, count, page, filter, explain,
+    near, within and iter) of a session go to one replica, picked when the
+    session first reads, and everything else to the primary. Replicas may
+    lag behind the primary: read_your_writes() sends the reads of the
+    session to the primary instead.
+
     Attributes:
-        __engine (sqlalchemy.Engine): The working SQLAlchemy engine.
-        __session (sqlalchemy.Session): The working SQLAlchemy session.
+        __engine (sqlalchemy.Engine): The working SQLAlchemy engine, on the
+            primary database.
+        __session (sqlalchemy.Session): The working SQLAlchemy session, on
+            the primary database.
+        __replicas (list): The engines of the read replicas.
+        __readers (list): The session factory of each replica.
+        __reader (sqlalchemy.Session): The session reads go to, until
+            close(); None before the first read.
+        __routing (str): How a replica is picked, one of __routes
+            (HBNB_MYSQL_REPLICA_ROUTING).
+        __routes (tuple): The known routings.
+        __turns (itertools.count): The round robin counter.
+        __latencies (dict): The moving average of the statement latency
+            of each replica engine, in seconds.
+        __pinned (bool): Whether read_your_writes() is on for the session.
+        __chunk_size (int): Number of objects new_many() and bulk_save()
+            insert per batch (HBNB_BULK_CHUNK_SIZE).
+        __classes (tuple): The mapped classes all() and iter() query when
+            no class is given.
+        __sqlite_pragmas (tuple): The (pragma, value) pairs set on every
+            SQLite connection.
     """
 
     __engine = None
     __session = None
+    __reader = None
+    __pinned = False
+    __routes = ("round_robin", "least_latency")
+    __chunk_size = int(getenv("HBNB_BULK_CHUNK_SIZE", 1000))
+    __classes = (State, City, User, Place, Review, Amenity)
+    __sqlite_pragmas = (("journal_mode", "WAL"), ("synchronous", "NORMAL"),
+                        ("foreign_keys", "ON"), ("busy_timeout", 5000),
+                        ("cache_size", -64 * 1024), ("temp_store", "MEMORY"),
+                        ("mmap_size", 256 * 1024 * 1024))
+
+    def __init__(self, url=None, replicas=None, routing=None):
+        """Initialize a new DBStorage instance.
+
+        The connection pools are set up by the HBNB_MYSQL_POOL_* environment
+        variables (see models/engine/pool.py).
 
-    def __init__(self):
-        """Initialize a new DBStorage instance."""
-        self.__engine = create_engine("mysql+mysqldb://{}:{}@{}/{}".
-                                      format(getenv("HBNB_MYSQL_USER"),
-                                             getenv("HBNB_MYSQL_PWD"),
-                                             getenv("HBNB_MYSQL_HOST"),
-                                             getenv("HBNB_MYSQL_DB")),
-                                      pool_pre_ping=True)
+        Args:
+            url (str): The URL of the database. Defaults to the MySQL
+                database of the HBNB_MYSQL_* environment variables. With a
+                SQLite file, "sqlite:///<path>", every connection is set
+                up with __sqlite_pragmas: write-ahead logging, so readers
+                never wait on the writer, synchronous commits only at WAL
+                checkpoints, enforced foreign keys, a 5 second busy
+                timeout, a 64 MiB page cache, in-memory temporary tables
+                and 256 MiB of memory-mapped I/O.
+            replicas (list): The URLs of the read replicas of the database.
+                Defaults to the MySQL databases on the comma-separated
+                HBNB_MYSQL_REPLICA_HOSTS when url is None, to none
+                otherwise.
+            routing (str): How reads pick a replica: "round_robin" takes
+                them in turn, "least_latency" takes the one whose
+                statements ran the fastest lately, trying each at least
+                once. Defaults to HBNB_MYSQL_REPLICA_ROUTING, or
+                "round_robin".
+
+        Raises:
+            ValueError: If routing is unknown.
+        """
+        if url is None:
+            url = self.__mysql_url(getenv("HBNB_MYSQL_HOST"))
+            if replicas is None:
+                hosts = getenv("HBNB_MYSQL_REPLICA_HOSTS", "")
+                replicas = [self.__mysql_url(host.strip())
+                            for host in hosts.split(",") if host.strip()]
+        self.__routing = routing or \
+            getenv("HBNB_MYSQL_REPLICA_ROUTING", "round_robin")
+        if self.__routing not in self.__routes:
+            raise ValueError("unknown routing {}".format(self.__routing))
+        self.__engine = self.__connect(url)
+        self.__replicas = [self.__connect(r) for r in replicas or ()]
+        self.__readers = []
+        self.__turns = count()
+        self.__latencies = {}
+        for engine in self.__replicas:
+            event.listen(engine, "before_cursor_execute", self.__started)
+            event.listen(engine, "after_cursor_execute", self.__finished)
         if getenv("HBNB_ENV") == "test":
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
+    @staticmethod
+    def __mysql_url(host):
+        """Return the URL of the HBNB_MYSQL_DB database on host."""
+        return "mysql+mysqldb://{}:{}@{}/{}".format(
+            getenv("HBNB_MYSQL_USER"), getenv("HBNB_MYSQL_PWD"), host,
+            getenv("HBNB_MYSQL_DB"))
+
+    def __connect(self, url):
+        """Return a new engine on the database at url."""
+        engine = create_engine(url, **pool.options())
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", self.__set_pragmas)
+        return engine
+
+    def __started(self, conn, cursor, statement, params, context, many):
+        """Record when a statement starts on a replica."""
+        conn.info.setdefault("started", []).append(perf_counter())
+
+    def __finished(self, conn, cursor, statement, params, context, many):
+        """Fold the latency of a statement into its replica's average."""
+        latency = perf_counter() - conn.info["started"].pop()
+        average = self.__latencies.get(conn.engine)
+        self.__latencies[conn.engine] = latency if average is None \
+            else 0.8 * average + 0.2 * latency
+
+    def __read(self):
+        """Return the session reads go to.
+
+        That is the primary session without replicas or once
+        read_your_writes() is on, or else the session of the replica the
+        routing picks, kept until close().
+        """
+        if not self.__replicas or self.__pinned:
+            return self.__session
+        if self.__reader is None:
+            if self.__routing == "least_latency":
+                i = min(range(len(self.__replicas)), key=lambda i: (
+                    self.__latencies.get(self.__replicas[i], 0), i))
+            else:
+                i = next(self.__turns) % len(self.__replicas)
+            self.__reader = self.__readers[i]()
+        return self.__reader
+
+    def __write(self, obj):
+        """Return obj, or its copy in the primary session.
+
+        Objects read from a replica belong to its session: their state is
+        merged into the primary session, which writes it.
+        """
+        session = object_session(obj)
+        if session is not None and session is not self.__session:
+            return self.__session.merge(obj)
+        return obj
+
+    def read_your_writes(self, enabled=True):
+        """Send the reads of the current session to the primary or not.
+
+        Reads see the session's own committed writes at once, however far
+        the replicas lag. The setting holds until close().
+        """
+        self.__pinned = enabled
+
+    def __set_pragmas(self, dbapi_connection, record):
+        """Set __sqlite_pragmas on a new SQLite connection."""
+        cursor = dbapi_connection.cursor()
+        for pragma, value in self.__sqlite_pragmas:
+            cursor.execute("PRAGMA {} = {}".format(pragma, value))
+        cursor.close()
+
+    def all(self, cls=None, load=None):
         """Query on the curret database session all objects of the given class.
 
         If cls is None, queries all types of objects.
 
+        Args:
+            cls (class or str): The class of the objects.
+            load (list): Relationships of cls to load with the objects
+                rather than one query per object on first access, such as
+                ["cities"] or ["user", "reviews.user"] (see eager()).
+
         Return:
             Dict of queried classes in the format <class name>.<obj id> = obj.
+
+        Raises:
+            ValueError: If load names an unknown relationship.
         """
         if cls is None:
-            objs = self.__session.query(State).all()
-            objs.extend(self.__session.query(City).all())
-            objs.extend(self.__session.query(User).all())
-            objs.extend(self.__session.query(Place).all())
-            objs.extend(self.__session.query(Review).all())
-            objs.extend(self.__session.query(Amenity).all())
-        else:
-            if type(cls) == str:
-                cls = eval(cls)
-            objs = self.__session.query(cls)
+            return {"{}.{}".format(type(o).__name__, o.id): o
+                    for c in self.__classes for o in self.__read().query(c)}
+        if type(cls) == str:
+            cls = classes[cls]
+        objs = self.__read().scalars(
+            select(cls).options(*eager(cls, load)))
         return {"{}.{}".format(type(o).__name__, o.id): o for o in objs}
 
+    def get(self, cls, id):
+        """Return the object of class cls with the given id, or None.
+
+        The object is taken from the session's identity map if it is
+        already loaded, otherwise fetched by primary key.
+        """
+        if type(cls) == str:
+            cls = classes[cls]
+        if cls not in self.__classes:
+            return None
+        return self.__read().get(cls, id)
+
+    def count(self, cls=None):
+        """Return the number of objects of class cls, or of every class.
+
+        Rows are counted by the database with SELECT COUNT(*), one query
+        per class.
+        """
+        if type(cls) == str:
+            cls = classes[cls]
+        total = 0
+        for c in self.__classes if cls is None else (cls,):
+            if c in self.__classes:
+                total += self.__read().scalar(
+                    select(func.count()).select_from(c))
+        return total
+
+    def page(self, cls, order_by="name", after=None, limit=20,
+             load=None):
+        """Return a page of the objects of class cls sorted by order_by.
+
+        The page is a keyset (seek) query: rather than an OFFSET, it asks
+        for the rows sorting after the cursor, which an index on order_by
+        answers with a single seek whatever the page's offset. Rows whose
+        order_by is NULL are left out.
+
+        Args:
+            cls (class or str): The class of the objects.
+            order_by (str): The column to sort by, ties broken by id.
+            after (tuple): The cursor returned with the previous page, or
+                None for the first page.
+            limit (int): The maximum number of objects on the page.
+            load (list): Relationships to load with the objects, as in
+                all().
+
+        Return:
+            The list of objects and the cursor of the next page, None on
+            the last page.
+
+        Raises:
+            ValueError: If order_by names an unknown column, or load an
+                unknown relationship.
+        """
+        if type(cls) == str:
+            cls = classes[cls]
+        if order_by not in cls.__table__.columns.keys():
+            raise ValueError("{} has no column {}".format(
+                cls.__name__, order_by))
+        column = getattr(cls, order_by)
+        query = select(cls).where(column.isnot(None))
+        if after is not None:
+            value, id = after
+            query = query.where(column >= value,
+                                or_(column > value, cls.id > id))
+        query = query.order_by(column, cls.id).limit(limit + 1)
+        query = query.options(*eager(cls, load))
+        objs = list(self.__read().scalars(query))
+        if len(objs) <= limit:
+            return objs, None
+        last = objs[limit - 1]
+        return objs[:limit], (getattr(last, order_by), last.id)
+
+    def filter(self, cls, order_by=None, limit=None, **criteria):
+        """Return the list of objects of class cls matching criteria.
+
+        criteria are lookups such as city_id="...", price_by_night__lte=200
+        or max_guest__gte=4 (see models/engine/lookups.py), compiled into
+        the WHERE clause of a single SELECT. explain() shows its plan.
+
+        Args:
+            cls (class or str): The class of the objects.
+            order_by (str): A column to sort the objects by, ties broken
+                by id, prefixed with "-" for descending order. Rows whose
+                order_by is NULL are left out, as in page().
+            limit (int): The maximum number of objects to return.
+            **criteria: The lookups.
+
+        Raises:
+            ValueError: If a lookup or order_by names an unknown column,
+                or a lookup an unknown operator.
+        """
+        statement, predicates = self.__select(cls, criteria, order_by,
+                                              limit)
+        return list(self.__read().scalars(statement))
+
+    def explain(self, cls, order_by=None, limit=None, **criteria):
+        """Return how filter() answers the same call, without running it.
+
+        Return:
+            A dictionary: the class name, the path ("sql"), the lookups
+            (filters), the SELECT statement and the rows of the database's
+            EXPLAIN for it (EXPLAIN QUERY PLAN on SQLite).
+        """
+        statement, predicates = self.__select(cls, criteria, order_by,
+                                              limit)
+        connection = self.__read().connection()
+        dialect = connection.dialect
+        compiled = statement.compile(
+            dialect=dialect, compile_kwargs={"render_postcompile": True})
+        params = compiled.params
+        if compiled.positiontup is not None:
+            params = tuple(params[k] for k in compiled.positiontup)
+        prefix = "EXPLAIN QUERY PLAN " if dialect.name == "sqlite" \
+            else "EXPLAIN "
+        plan = connection.exec_driver_sql(prefix + str(compiled), params)
+        name = statement.column_descriptions[0]["entity"].__name__
+        return {"class": name, "path": "sql",
+                "filters": lookups.describe(predicates),
+                "sql": str(compiled), "plan": [tuple(r) for r in plan]}
+
+    def __select(self, cls, criteria, order_by=None, limit=None):
+        """Return the SELECT of the cls objects matching criteria.
+
+        Return:
+            The statement and the predicates parsed from criteria.
+        """
+        if type(cls) == str:
+            cls = classes[cls]
+        fields = cls.__table__.columns.keys()
+        predicates = lookups.parse(cls.__name__, fields, criteria)
+        statement = select(cls)
+        if order_by is not None:
+            attr = order_by.lstrip("-")
+            if attr not in fields:
+                raise ValueError("{} has no column {}".format(
+                    cls.__name__, attr))
+            column = getattr(cls, attr)
+            statement = statement.where(column.isnot(None))
+            if order_by.startswith("-"):
+                statement = statement.order_by(column.desc(), cls.id.desc())
+            else:
+                statement = statement.order_by(column, cls.id)
+        if limit is not None:
+            statement = statement.limit(limit)
+        for attr, op, value in predicates:
+            column = getattr(cls, attr)
+            if op == "in":
+                statement = statement.where(column.in_(value))
+            else:
+                statement = statement.where(
+                    lookups.OPERATORS[op](column, value))
+        return statement, predicates
+
+    def near(self, cls, latitude, longitude, radius_km, limit=None):
+        """Return the objects of class cls within radius_km of a point.
+
+        The database selects the rows inside the circle's bounding box
+        through the indexes on latitude and longitude, and the great
+        circle distance of each is then checked.
+
+        Args:
+            cls (class or str): A class with latitude and longitude.
+            latitude (float): The latitude of the point, in degrees.
+            longitude (float): The longitude of the point, in degrees.
+            radius_km (float): The radius of the search, in kilometers.
+            limit (int): The maximum number of objects to return.
+
+        Return:
+            The list of objects, nearest first.
+
+        Raises:
+            ValueError: If cls has no latitude and longitude columns.
+        """
+        box = geo.bounds(latitude, longitude, radius_km)
+        found = []
+        for obj in self.__read().scalars(self.__within(cls, box)):
+            d = geo.distance(latitude, longitude, obj.latitude,
+                             obj.longitude)
+            if d <= radius_km:
+                found.append((d, obj.id, obj))
+        found.sort(key=lambda f: f[:2])
+        return [obj for d, id, obj in found[:limit]]
+
+    def within(self, cls, south, west, north, east, limit=None):
+        """Return the objects of class cls inside a bounding box.
+
+        The box spans latitudes south to north and longitudes west to
+        east, west greater than east if it crosses the antimeridian.
+
+        Raises:
+            ValueError: If cls has no latitude and longitude columns.
+        """
+        statement = self.__within(cls, (south, west, north, east))
+        return list(self.__read().scalars(statement.limit(limit)))
+
+    def __within(self, cls, box):
+        """Return the SELECT of the cls objects inside the box."""
+        if type(cls) == str:
+            cls = classes[cls]
+        columns = cls.__table__.columns
+        if "latitude" not in columns or "longitude" not in columns:
+            raise ValueError("{} has no latitude and longitude".format(
+                cls.__name__))
+        south, west, north, east = box
+        lon = cls.longitude
+        return select(cls).where(
+            cls.latitude.between(south, north),
+            lon.between(west, east) if west <= east
+            else or_(lon >= west, lon <= east))
+
+    def iter(self, cls=None, batch_size=1000):
+        """Yield the objects of class cls, or of every class, one at a time.
+
+        Rows are streamed from a server-side cursor and turned into objects
+        batch_size at a time, so the result set is never loaded whole.
+        """
+        if type(cls) == str:
+            cls = classes[cls]
+        for c in self.__classes if cls is None else (cls,):
+            query = select(c).execution_options(yield_per=batch_size)
+            for obj in self.__read().scalars(query):
+                yield obj
+
     def new(self, obj):
         """Add obj to the current database session."""
-        self.__session.add(obj)
+        self.__session.add(self.__write(obj))
+
+    def changed(self, obj):
+        """Do nothing: the session tracks changes to its objects itself."""
+
+    def new_many(self, objs, chunk_size=None):
+        """Add every object of objs to the database, chunk by chunk.
+
+        Each chunk of chunk_size objects (__chunk_size by default) is
+        flushed as one multi-row INSERT per table and committed.
+        """
+        objs = iter(objs)
+        while True:
+            batch = list(islice(objs, chunk_size or self.__chunk_size))
+            if not batch:
+                break
+            self.__session.add_all(batch)
+            self.__session.commit()
+
+    def bulk_save(self, cls, rows, chunk_size=None):
+        """Insert rows, dictionaries of attributes, as new cls objects.
+
+        No object is built: each chunk of chunk_size rows (__chunk_size by
+        default) is sent as a single executemany INSERT and committed.
+        Missing ids and timestamps are filled in, and ISO format timestamps
+        are parsed, so to_dict() output can be inserted as is.
+        """
+        if type(cls) == str:
+            cls = classes[cls]
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, chunk_size or self.__chunk_size))
+            if not batch:
+                break
+            now = datetime.utcnow()
+            mappings = []
+            for row in batch:
+                mapping = {"id": str(uuid4()), "created_at": now,
+                           "updated_at": now}
+                mapping.update(row)
+                mapping.pop("__class__", None)
+                for k in ("created_at", "updated_at"):
+                    if type(mapping[k]) == str:
+                        mapping[k] = datetime.fromisoformat(mapping[k])
+                mappings.append(mapping)
+            self.__session.execute(insert(cls), mappings)
+            self.__session.commit()
 
     def save(self):
         """Commit all changes to the current database session."""
@@ -69,7 +538,7 @@ class DBStorage:
     def delete(self, obj=None):
         """Delete obj from the current database session."""
         if obj is not None:
-            self.__session.delete(obj)
+            self.__session.delete(self.__write(obj))
 
     def reload(self):
         """Create all tables in the database and initialize a new session."""
@@ -78,7 +547,24 @@ class DBStorage:
                                        expire_on_commit=False)
         Session = scoped_session(session_factory)
         self.__session = Session()
+        self.__readers = [sessionmaker(bind=engine, expire_on_commit=False)
+                          for engine in self.__replicas]
+
+    def pool_metrics(self):
+        """Return the metrics of the connection pool.
+
+        See MeteredPool.metrics() in models/engine/pool.py.
+        """
+        return self.__engine.pool.metrics()
 
     def close(self):
-        """Close the working SQLAlchemy session."""
+        """Close the working SQLAlchemy session.
+
+        The session's replica session is closed too, and read_your_writes()
+        turned off.
+        """
         self.__session.close()
+        if self.__reader is not None:
+            self.__reader.close()
+            self.__reader = None
+        self.__pinned = False
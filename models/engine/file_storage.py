@@ -1,67 +1,941 @@
 #!/usr/bin/python3
 """Defines the FileStorage class."""
 import json
-from models.base_model import BaseModel
-from models.amenity import Amenity
-from models.city import City
-from models.place import Place
-from models.review import Review
-from models.state import State
-from models.user import User
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from itertools import repeat
+from os import getenv
+from models.engine import codec
+from models.engine import geo
+from models.engine import lookups
+from models.engine.index import GridIndex
+from models.engine.index import SortedIndex
+from models import classes
+
+
+def _read_shard(path, codec_name):
+    """Return the entries stored in the shard at path and their schemas.
+
+    Runs in a worker process during a parallel reload, so the timestamps
+    are parsed here as well to take that work off the parent process.
+    The entries are (key, payload, record) tuples.
+    """
+    reader = codec.get(codec_name)
+    entries = []
+    with open(path, "rb" if reader.binary else "r",
+              encoding=None if reader.binary else "utf-8") as f:
+        for key, payload, o in reader.load(f):
+            for name in ("created_at", "updated_at"):
+                if type(o.get(name)) == str:
+                    o[name] = datetime.fromisoformat(o[name])
+            entries.append((key, payload, o))
+    return entries, reader.schemas
+
+
+class _Record(dict):
+    """A stored record whose model instance has not been built yet."""
+
+    __slots__ = ()
 
 
 class FileStorage:
     """Represent an abstracted storage engine.
 
     Attributes:
-        __file_path (str): The name of the file to save objects to.
-        __objects (dict): A dictionary of instantiated objects.
+        __file_path (str): The name of the file to save objects to. Its
+            extension is replaced by the one of __codec.
+        __codec (codec.JSONCodec or codec.BinaryCodec): The on-disk format
+            (HBNB_FILE_CODEC, "json" by default or "binary").
+        __objects (dict): A dictionary of instantiated objects. Objects
+            reload() has not built yet are held as their stored record.
+        __by_class (dict): Index of __objects keyed by class name.
+        __lazy (dict): Keys of the records in __objects not built yet,
+            keyed by class name.
+        __indexed (dict): The __objects dictionary __by_class was built for.
+        __foreign_keys (dict): The attribute holding the foreign key
+            indexed for each class name.
+        __referrers (dict): Reverse index of __foreign_keys: the keys of
+            the objects referring to each id, keyed by class name then id.
+        __references (dict): The id each indexed key currently refers to.
+        __sorted (dict): The SortedIndexes of each class, keyed by class
+            name then attribute: one per column declared with index=True
+            and per attribute page() ordered by, built on first use.
+        __grids (dict): The GridIndex of the latitude and longitude of
+            each class near() or within() was asked about, by class name.
+        __geo_cell (float): The side in degrees of the cells of a
+            GridIndex (HBNB_FILE_GEO_CELL).
+        __journal (bool): Whether save() appends changes to a journal
+            instead of rewriting __file_path (HBNB_FILE_JOURNAL=1).
+        __journal_max (int): Journal size in bytes above which it is
+            compacted into __file_path (HBNB_FILE_JOURNAL_MAX).
+        __persisted (dict): The serialized form of every object as it
+            currently stands on disk, keyed like __objects.
+        __dirty (set): Keys added, modified or deleted since the last save.
+            Setting an attribute of a stored object marks it through
+            changed().
+        __lock (threading.RLock): Guards __objects, its index and __dirty.
+        __commit (threading.Condition): Coordinates group commits.
+        __commit_window (float): Seconds a save waits for other saves to
+            join the same physical write (HBNB_FILE_COMMIT_WINDOW).
+        __requested (int): Number of saves requested so far.
+        __flushed (int): Number of requested saves already on disk.
+        __flushing (bool): Whether a thread is currently writing.
+        __shards (str): On-disk layout (HBNB_FILE_SHARDS). Unset for a
+            single __file_path, "class" for one file per class or a number
+            N for N shards partitioned by a hash of the object id. Shards
+            live in the directory named after __file_path plus ".d".
+        __relayout (bool): Whether reload() read shards written with
+            another layout, which the next save rewrites in full.
+        __workers (int): Number of processes reload() may use to parse
+            shards in parallel (HBNB_FILE_WORKERS, defaults to CPU count).
+        __rows (bool): Whether objects read back from disk are built as
+            compact rows instead of model instances (HBNB_FILE_COMPACT=1).
+        __chunk_size (int): Number of objects new_many() adds per lock
+            acquisition (HBNB_BULK_CHUNK_SIZE).
     """
 
     __file_path = "file.json"
+    __codec = codec.get(getenv("HBNB_FILE_CODEC", "json"))
+    __journal = getenv("HBNB_FILE_JOURNAL") == "1"
+    __journal_max = int(getenv("HBNB_FILE_JOURNAL_MAX", 8 * 1024 * 1024))
+    __persisted = {}
+    __dirty = set()
+    __lock = threading.RLock()
+    __commit = threading.Condition()
+    __commit_window = float(getenv("HBNB_FILE_COMMIT_WINDOW", 0))
+    __requested = 0
+    __flushed = 0
+    __flushing = False
+    __shards = getenv("HBNB_FILE_SHARDS")
+    __relayout = False
+    __workers = int(getenv("HBNB_FILE_WORKERS", os.cpu_count() or 1))
+    __rows = getenv("HBNB_FILE_COMPACT") == "1"
+    __chunk_size = int(getenv("HBNB_BULK_CHUNK_SIZE", 1000))
     __objects = {}
+    __by_class = {}
+    __lazy = {}
+    __indexed = None
+    __foreign_keys = {"City": "state_id", "Place": "city_id",
+                      "Review": "place_id"}
+    __referrers = {}
+    __references = {}
+    __sorted = {}
+    __grids = {}
+    __geo_cell = float(getenv("HBNB_FILE_GEO_CELL", 0.1))
+
+    def __index(self):
+        """Return the per-class index of __objects.
+
+        The index is kept up to date by new() and delete(). It is rebuilt
+        whenever __objects was replaced or changed size behind its back, in
+        which case keys that appeared or vanished are also marked dirty.
+        """
+        objects = self.__objects
+        by_class = FileStorage.__by_class
+        if FileStorage.__indexed is not objects or \
+                sum(map(len, by_class.values())) != len(objects):
+            by_class.clear()
+            lazy = FileStorage.__lazy
+            lazy.clear()
+            FileStorage.__referrers.clear()
+            FileStorage.__references.clear()
+            FileStorage.__sorted.clear()
+            FileStorage.__grids.clear()
+            for k, v in objects.items():
+                if type(v) == _Record:
+                    name = v["__class__"]
+                    lazy.setdefault(name, set()).add(k)
+                else:
+                    name = type(v).__name__
+                by_class.setdefault(name, {})[k] = v
+                self.__reindex(name, k, v)
+            FileStorage.__indexed = objects
+            persisted = FileStorage.__persisted
+            self.__dirty.update(objects.keys() - persisted.keys())
+            self.__dirty.update(persisted.keys() - objects.keys())
+        return by_class
+
+    def __reindex(self, name, key, obj):
+        """Index obj, stored under key, in the indexes of its class.
+
+        These are __referrers, __sorted and __grids. obj is an object or a
+        _Record of the class name, or None to drop key from the indexes.
+        """
+        id = key.split(".", 1)[1]
+        for index in FileStorage.__sorted.get(name, {}).values():
+            if obj is None:
+                index.discard(id)
+            else:
+                index.add(id, self.__value(name, obj, index.attr))
+        grid = FileStorage.__grids.get(name)
+        if grid is not None:
+            if obj is None:
+                grid.discard(id)
+            else:
+                grid.add(id, self.__value(name, obj, "latitude"),
+                         self.__value(name, obj, "longitude"))
+        fk = self.__foreign_keys.get(name)
+        if fk is None:
+            return
+        referrers = FileStorage.__referrers.setdefault(name, {})
+        old = FileStorage.__references.pop(key, None)
+        if old is not None:
+            keys = referrers[old]
+            del keys[key]
+            if not keys:
+                del referrers[old]
+        if obj is not None:
+            value = self.__value(name, obj, fk)
+            if value is not None:
+                FileStorage.__references[key] = value
+                referrers.setdefault(value, {})[key] = None
+
+    @staticmethod
+    def __value(name, obj, attr):
+        """Return the value of attr on obj, an object or a _Record.
 
-    def all(self, cls=None):
+        The value is converted to the type of its column of class name,
+        see ModelCodec.value(): indexes and lookups only ever compare
+        values of one type.
+        """
+        return codec.model(classes[name]).value(obj, attr)
+
+    def __materialize(self, name=None, keys=None):
+        """Build the objects reload() left as records in __objects.
+
+        Builds every pending object, only those of the class name, or only
+        those of that class stored under the given keys.
+        """
+        if not FileStorage.__lazy:
+            return
+        with self.__lock:
+            by_class = self.__index()
+            lazy = FileStorage.__lazy
+            for n in list(lazy) if name is None else [name]:
+                pending = lazy.get(n, set())
+                if keys is not None:
+                    batch = pending.intersection(keys)
+                    pending -= batch
+                else:
+                    batch = pending
+                for k in batch:
+                    o = self.__objects.get(k)
+                    if type(o) == _Record:
+                        model = codec.model(classes[n])
+                        if self.__rows:
+                            obj = model.to_row(o)
+                        else:
+                            obj = model.from_dict(o)
+                        self.__objects[k] = obj
+                        by_class[n][k] = obj
+                if keys is None or not pending:
+                    lazy.pop(n, None)
+
+    def all(self, cls=None, load=None):
         """Return a dictionary of instantiated objects in __objects.
 
         If a cls is specified, returns a dictionary of objects of that type.
-        Otherwise, returns the __objects dictionary.
+        Otherwise, returns the __objects dictionary. load, the relationships
+        DBStorage loads eagerly, is accepted and ignored: relationships are
+        read from the in-memory indexes.
         """
         if cls is not None:
-            if type(cls) == str:
-                cls = eval(cls)
-            cls_dict = {}
-            for k, v in self.__objects.items():
-                if type(v) == cls:
-                    cls_dict[k] = v
-            return cls_dict
+            if type(cls) != str:
+                cls = cls.__name__
+            self.__materialize(cls)
+            return dict(self.__index().get(cls, {}))
+        self.__materialize()
         return self.__objects
 
+    def get(self, cls, id):
+        """Return the object of class cls with the given id, or None.
+
+        Only that object is built if reload() left it as a record.
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        key = "{}.{}".format(cls, id)
+        self.__materialize(cls, (key,))
+        return self.__index().get(cls, {}).get(key)
+
+    def count(self, cls=None):
+        """Return the number of objects of class cls, or of every class.
+
+        Counts are read off __objects and its per-class index, so no
+        object is built or scanned.
+        """
+        if cls is None:
+            return len(self.__objects)
+        if type(cls) != str:
+            cls = cls.__name__
+        with self.__lock:
+            return len(self.__index().get(cls, ()))
+
+    def related(self, cls, attr, value):
+        """Return the list of objects of class cls whose attr equals value.
+
+        Uses the reverse index when attr is the foreign key indexed for
+        cls, in which case only the matching objects are built. Objects
+        modified in place must go through new() to be reindexed.
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        if self.__foreign_keys.get(cls) != attr:
+            return [o for o in self.all(cls).values()
+                    if getattr(o, attr, None) == value]
+        with self.__lock:
+            self.__index()
+            keys = list(FileStorage.__referrers.get(cls, {}).get(value, ()))
+            self.__materialize(cls, keys)
+            return [self.__objects[key] for key in keys]
+
+    def page(self, cls, order_by="name", after=None, limit=20,
+             load=None):
+        """Return a page of the objects of class cls sorted by order_by.
+
+        Pages are read from a SortedIndex of cls on order_by, built on
+        first use and kept up to date by new() and delete(), so reaching a
+        page costs a binary search whatever its offset. Only the objects
+        on the page are built. Objects whose order_by is None are left out.
+
+        Args:
+            cls (class or str): The class of the objects.
+            order_by (str): The column to sort by, ties broken by id.
+            after (tuple): The cursor returned with the previous page, or
+                None for the first page.
+            limit (int): The maximum number of objects on the page.
+            load (list): Ignored, as in all().
+
+        Return:
+            The list of objects and the cursor of the next page, None on
+            the last page.
+
+        Raises:
+            ValueError: If order_by is not a column of cls.
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        if order_by not in codec.model(classes[cls]).fields:
+            raise ValueError("{} has no column {}".format(cls, order_by))
+        with self.__lock:
+            entries = self.__sorted_index(cls, order_by).after(after,
+                                                               limit + 1)
+            keys = ["{}.{}".format(cls, id) for v, id in entries[:limit]]
+            self.__materialize(cls, keys)
+            objs = [self.__objects[k] for k in keys]
+        return objs, entries[limit - 1] if len(entries) > limit else None
+
+    def filter(self, cls, order_by=None, limit=None, **criteria):
+        """Return the list of objects of class cls matching criteria.
+
+        criteria are lookups such as city_id="...", price_by_night__lte=200
+        or max_guest__gte=4 (see models/engine/lookups.py). The candidates
+        come from the foreign key index or a SortedIndex of cls when one
+        covers a lookup, picking whichever yields the fewest, and from the
+        whole class otherwise. Lookups are checked on stored records, so
+        only the matching objects are built. explain() reports the path.
+
+        SortedIndexes are kept of the columns declared with index=True,
+        such as Place.price_by_night, and of those page() ordered by.
+
+        Args:
+            cls (class or str): The class of the objects.
+            order_by (str): A column to sort the objects by, ties broken
+                by id, prefixed with "-" for descending order. Objects
+                whose order_by is None are left out, as in page().
+            limit (int): The maximum number of objects to return. With
+                order_by, these are the top limit objects: when no index
+                narrows the candidates, the SortedIndex of order_by is
+                walked in order until limit objects match.
+            **criteria: The lookups.
+
+        Raises:
+            ValueError: If a lookup or order_by names an unknown column,
+                or a lookup an unknown operator or a value its column
+                cannot take.
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        predicates, order = self.__parse(cls, order_by, criteria)
+        with self.__lock:
+            keys, report = self.__plan(cls, predicates, order)
+            objects = self.__objects
+            value_of = codec.model(classes[cls]).value
+            matches = lookups.matches
+            found = []
+            for k in keys:
+                if limit is not None and len(found) >= limit and \
+                        (order is None or report["ordered"]):
+                    break
+                o = objects[k]
+                for attr, op, value in predicates:
+                    if not matches(value_of(o, attr), op, value):
+                        break
+                else:
+                    found.append(k)
+            if order is not None and not report["ordered"]:
+                attr, reverse = order
+                found = [k for v, k in sorted(
+                    ((value_of(objects[k], attr), k) for k in found
+                     if value_of(objects[k], attr) is not None),
+                    reverse=reverse)][:limit]
+            self.__materialize(cls, found)
+            return [objects[k] for k in found]
+
+    def explain(self, cls, order_by=None, limit=None, **criteria):
+        """Return how filter() answers the same call, without running it.
+
+        Return:
+            A dictionary: the class name, the path taken ("index" or
+            "scan"), the index used (the attribute indexed, or None), the
+            number of candidates the lookups are checked against, whether
+            the candidates come in order_by order (ordered) so the walk
+            stops after limit matches, and the lookups (filters).
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        predicates, order = self.__parse(cls, order_by, criteria)
+        with self.__lock:
+            return self.__plan(cls, predicates, order)[1]
+
+    def __parse(self, name, order_by, criteria):
+        """Return the predicates of criteria and the order of order_by.
+
+        The order is None or an (attribute, descending) pair.
+        """
+        model = codec.model(classes[name])
+        fields = model.fields
+        predicates = lookups.parse(name, fields, criteria, model.coerce)
+        if order_by is None:
+            return predicates, None
+        attr = order_by.lstrip("-")
+        if attr not in fields:
+            raise ValueError("{} has no column {}".format(name, attr))
+        return predicates, (attr, order_by.startswith("-"))
+
+    def __sorted_index(self, name, attr):
+        """Return the SortedIndex of class name on attr, built if needed."""
+        indexes = FileStorage.__sorted.setdefault(name, {})
+        if attr not in indexes:
+            bucket = self.__index().get(name, {})
+            indexes[attr] = SortedIndex(attr, (
+                (k.split(".", 1)[1], self.__value(name, o, attr))
+                for k, o in bucket.items()))
+        return indexes[attr]
+
+    def __plan(self, name, predicates, order=None):
+        """Return the candidate keys for predicates on class name.
+
+        The comparisons on one indexed attribute are merged into a single
+        range of its SortedIndex. order is the (attribute, descending)
+        pair results are sorted by, if any: when the candidates come from
+        a range of that attribute, or no index narrows them and they are
+        those of its whole SortedIndex, the keys come in that order.
+
+        Return:
+            The keys and the report explain() returns.
+        """
+        fk = self.__foreign_keys.get(name)
+        sortable = set(codec.model(classes[name]).indexed)
+        sortable.update(FileStorage.__sorted.get(name, {}))
+        candidates = []
+        bounds = {}
+        for attr, op, value in predicates:
+            if value is None or op == "ne":
+                continue
+            values = dict.fromkeys(value if op == "in" else [value])
+            if attr == fk and op in ("eq", "in"):
+                referrers = FileStorage.__referrers.get(name, {})
+                candidates.append((attr, False, [
+                    k.split(".", 1)[1] for v in values
+                    for k in referrers.get(v, ())]))
+            elif attr in sortable and op in ("eq", "in"):
+                index = self.__sorted_index(name, attr)
+                candidates.append((attr, len(values) == 1, [
+                    id for v in values if v is not None
+                    for found, id in index.range(v, v)]))
+            elif attr in sortable:
+                low, with_low, high, with_high = bounds.get(
+                    attr, (None, True, None, True))
+                if op[0] == "g" and (low is None or value > low or
+                                     value == low and op == "gt"):
+                    low, with_low = value, op == "gte"
+                elif op[0] == "l" and (high is None or value < high or
+                                       value == high and op == "lt"):
+                    high, with_high = value, op == "lte"
+                bounds[attr] = (low, with_low, high, with_high)
+        for attr, (low, with_low, high, with_high) in bounds.items():
+            index = self.__sorted_index(name, attr)
+            candidates.append((attr, True, [
+                id for v, id in index.range(low, high, with_low,
+                                            with_high)]))
+        if candidates:
+            attr, ordered, ids = min(candidates, key=lambda c: len(c[2]))
+            ordered = ordered and order is not None and order[0] == attr
+            if ordered and order[1]:
+                ids.reverse()
+            size = len(ids)
+        elif order is not None:
+            attr, reverse = order
+            index = self.__sorted_index(name, attr)
+            ids = (id for v, id in (reversed(index) if reverse else index))
+            ordered = True
+            size = len(index)
+        else:
+            attr, ordered = None, False
+            keys = list(self.__index().get(name, {}))
+            ids = None
+            size = len(keys)
+        if ids is not None:
+            keys = ("{}.{}".format(name, id) for id in ids)
+        return keys, {"class": name,
+                      "path": "scan" if attr is None else "index",
+                      "index": attr, "candidates": size,
+                      "ordered": ordered,
+                      "filters": lookups.describe(predicates)}
+
+    def near(self, cls, latitude, longitude, radius_km, limit=None):
+        """Return the objects of class cls within radius_km of a point.
+
+        Candidates are read from the cells of a GridIndex of cls that the
+        circle's bounding box overlaps, then kept if their great circle
+        distance is within radius_km. Only the objects returned are built.
+
+        Args:
+            cls (class or str): A class with latitude and longitude.
+            latitude (float): The latitude of the point, in degrees.
+            longitude (float): The longitude of the point, in degrees.
+            radius_km (float): The radius of the search, in kilometers.
+            limit (int): The maximum number of objects to return.
+
+        Return:
+            The list of objects, nearest first.
+
+        Raises:
+            ValueError: If cls has no latitude and longitude columns.
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        box = geo.bounds(latitude, longitude, radius_km)
+        with self.__lock:
+            found = []
+            for id, lat, lon in self.__grid(cls).within(box):
+                d = geo.distance(latitude, longitude, lat, lon)
+                if d <= radius_km:
+                    found.append((d, id))
+            found.sort()
+            keys = ["{}.{}".format(cls, id) for d, id in found[:limit]]
+            self.__materialize(cls, keys)
+            return [self.__objects[k] for k in keys]
+
+    def within(self, cls, south, west, north, east, limit=None):
+        """Return the objects of class cls inside a bounding box.
+
+        The box spans latitudes south to north and longitudes west to
+        east, west greater than east if it crosses the antimeridian. See
+        near() for the index used.
+
+        Raises:
+            ValueError: If cls has no latitude and longitude columns.
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        with self.__lock:
+            keys = ["{}.{}".format(cls, id) for id, lat, lon in islice(
+                self.__grid(cls).within((south, west, north, east)), limit)]
+            self.__materialize(cls, keys)
+            return [self.__objects[k] for k in keys]
+
+    def __grid(self, name):
+        """Return the GridIndex of class name, built if needed."""
+        grid = FileStorage.__grids.get(name)
+        if grid is None:
+            fields = codec.model(classes[name]).fields
+            if "latitude" not in fields or "longitude" not in fields:
+                raise ValueError("{} has no latitude and longitude".format(
+                    name))
+            bucket = self.__index().get(name, {})
+            value = codec.model(classes[name]).value
+            grid = GridIndex(self.__geo_cell, (
+                (k.split(".", 1)[1], value(o, "latitude"),
+                 value(o, "longitude")) for k, o in bucket.items()))
+            FileStorage.__grids[name] = grid
+        return grid
+
+    def iter(self, cls=None, batch_size=1000):
+        """Yield the objects of class cls, or every object, one at a time.
+
+        Nothing is copied but the keys of each class: objects reload() left
+        as records are built batch_size at a time as the iteration reaches
+        them. Objects added or deleted meanwhile may or may not be seen.
+        """
+        if cls is not None and type(cls) != str:
+            cls = cls.__name__
+        with self.__lock:
+            names = list(self.__index()) if cls is None else [cls]
+        for name in names:
+            with self.__lock:
+                keys = list(self.__index().get(name, ()))
+            for i in range(0, len(keys), batch_size):
+                batch = keys[i:i + batch_size]
+                with self.__lock:
+                    self.__materialize(name, batch)
+                    bucket = self.__index().get(name, {})
+                    objs = [bucket.get(key) for key in batch]
+                for obj in objs:
+                    if obj is not None:
+                        yield obj
+
     def new(self, obj):
         """Set in __objects obj with key <obj_class_name>.id."""
-        self.__objects["{}.{}".format(type(obj).__name__, obj.id)] = obj
+        name = type(obj).__name__
+        key = "{}.{}".format(name, obj.id)
+        with self.__lock:
+            by_class = self.__index()
+            self.__reindex(name, key, obj)
+            self.__objects[key] = obj
+            by_class.setdefault(name, {})[key] = obj
+            self.__lazy.get(name, set()).discard(key)
+            self.__dirty.add(key)
+
+    def changed(self, obj):
+        """Mark obj dirty if it is the object stored under its key.
+
+        BaseModel and Row call it whenever an attribute is set, so objects
+        modified in place are saved without going through new().
+        """
+        key = "{}.{}".format(type(obj).__name__, getattr(obj, "id", None))
+        if self.__objects.get(key) is obj:
+            with self.__lock:
+                self.__dirty.add(key)
+
+    def new_many(self, objs, chunk_size=None):
+        """Add every object of objs to __objects, then save once.
+
+        The objects are added chunk_size (__chunk_size by default) at a
+        time under the lock, so other threads are not blocked for the
+        whole import.
+        """
+        objs = iter(objs)
+        while True:
+            batch = list(islice(objs, chunk_size or self.__chunk_size))
+            if not batch:
+                break
+            with self.__lock:
+                for obj in batch:
+                    self.new(obj)
+        self.save()
+
+    def bulk_save(self, cls, rows, chunk_size=None):
+        """Store rows, dictionaries of attributes, as new cls objects.
+
+        The objects are built straight from the rows by the ModelCodec of
+        cls (as compact rows with HBNB_FILE_COMPACT=1), then added with
+        new_many(). Missing ids and timestamps are filled in.
+        """
+        if type(cls) == str:
+            cls = classes[cls]
+        model = codec.model(cls)
+        build = model.to_row if self.__rows else model.from_dict
+        self.new_many((build(row) for row in rows), chunk_size)
 
     def save(self):
-        """Serialize __objects to the JSON file __file_path."""
-        odict = {o: self.__objects[o].to_dict() for o in self.__objects.keys()}
-        with open(self.__file_path, "w", encoding="utf-8") as f:
-            json.dump(odict, f)
+        """Serialize __objects to the JSON file __file_path.
 
-    def reload(self):
-        """Deserialize the JSON file __file_path to __objects, if it exists."""
+        Saves are group-committed: one thread writes at a time, and every
+        save requested while it waits out __commit_window or writes is
+        covered by the next single write. save() returns once the changes
+        made before it was called are on disk.
+        """
+        commit = FileStorage.__commit
+        with commit:
+            FileStorage.__requested += 1
+            ticket = FileStorage.__requested
+            while FileStorage.__flushing:
+                commit.wait()
+                if FileStorage.__flushed >= ticket:
+                    return
+            FileStorage.__flushing = True
+        done = None
         try:
-            with open(self.__file_path, "r", encoding="utf-8") as f:
-                for o in json.load(f).values():
-                    name = o["__class__"]
-                    del o["__class__"]
-                    self.new(eval(name)(**o))
+            if self.__commit_window > 0:
+                time.sleep(self.__commit_window)
+            with commit:
+                batch = FileStorage.__requested
+            self.__flush()
+            done = batch
+        finally:
+            with commit:
+                FileStorage.__flushing = False
+                if done is not None:
+                    FileStorage.__flushed = done
+                commit.notify_all()
+
+    def __flush(self):
+        """Write every change made since the last flush to disk.
+
+        Only objects marked dirty by new(), changed() or delete() are
+        serialized again; every other object reuses its cached form from
+        __persisted.
+
+        In journal mode, only the objects that changed or were deleted
+        since the last flush are appended to the journal, which is
+        compacted back into __file_path once it grows past __journal_max.
+        """
+        with self.__lock:
+            self.__index()
+            dirty = FileStorage.__dirty
+            FileStorage.__dirty = set()
+        objects = self.__objects
+        persisted = FileStorage.__persisted
+        changes = {}
+        journal = self.__path() + ".log"
+        try:
+            for key in dirty:
+                obj = objects.get(key)
+                if type(obj) == _Record:
+                    continue
+                if obj is not None:
+                    text = self.__encode(obj)
+                    if persisted.get(key) != text:
+                        changes[key] = text
+                elif key in persisted:
+                    changes[key] = None
+            if self.__journal and changes:
+                with open(journal, "a", encoding="utf-8") as f:
+                    for key, text in changes.items():
+                        f.write("{{{}: {}}}\n".format(
+                            json.dumps(key), "null" if text is None
+                            else self.__codec.to_json(text)))
+                    f.flush()
+                    os.fsync(f.fileno())
+        except BaseException:
+            with self.__lock:
+                self.__dirty.update(dirty)
+            raise
+        for key, text in changes.items():
+            if text is None:
+                del persisted[key]
+            else:
+                persisted[key] = text
+        if not self.__journal:
+            self.__compact(None if self.__relayout else
+                           {self.__shard(key) for key in changes})
+        elif changes and os.path.getsize(journal) > self.__journal_max:
+            self.__compact()
+
+    def __path(self):
+        """Return the path of the snapshot file for the current codec."""
+        return os.path.splitext(self.__file_path)[0] + self.__codec.extension
+
+    def __shard(self, key):
+        """Return the name of the shard key is stored in."""
+        if not self.__shards:
+            return None
+        name, id = key.split(".", 1)
+        if self.__shards == "class":
+            return name
+        return str(zlib.crc32(id.encode("utf-8")) % int(self.__shards))
+
+    def __compact(self, shards=None):
+        """Rewrite the snapshot from __persisted and drop the journal.
+
+        With a sharded layout, only the given shards (all of them if None)
+        and any shard missing on disk are rewritten.
+        """
+        if shards is None:
+            FileStorage.__relayout = False
+        path = self.__path()
+        if not self.__shards:
+            self.__write(path, FileStorage.__persisted.items())
+        else:
+            folder = path + ".d"
+            ext = self.__codec.extension
+            os.makedirs(folder, exist_ok=True)
+            groups = {}
+            for k, v in FileStorage.__persisted.items():
+                groups.setdefault(self.__shard(k), []).append((k, v))
+            on_disk = {n[:-len(ext)] for n in os.listdir(folder)
+                       if n.endswith(ext)}
+            if shards is None:
+                shards = on_disk | groups.keys()
+            for name in shards | (groups.keys() - on_disk):
+                if name in groups:
+                    self.__write(os.path.join(folder, name + ext),
+                                 groups[name])
+                elif name in on_disk:
+                    os.remove(os.path.join(folder, name + ext))
+        try:
+            os.remove(path + ".log")
+        except FileNotFoundError:
+            pass
+
+    def __write(self, path, items):
+        """Atomically replace the snapshot file at path with the items.
+
+        The items are (key, payload) pairs. They are written to a
+        temporary file, fsynced and renamed over path, so readers only
+        ever see a complete file.
+        """
+        folder = os.path.dirname(os.path.abspath(path))
+        try:
+            mode = os.stat(path).st_mode & 0o777
         except FileNotFoundError:
+            mode = 0o644
+        fd, tmp = tempfile.mkstemp(
+            dir=folder, prefix=".{}.".format(os.path.basename(path)))
+        try:
+            os.chmod(tmp, mode)
+            binary = self.__codec.binary
+            with open(fd, "wb" if binary else "w",
+                      encoding=None if binary else "utf-8") as f:
+                self.__codec.dump(f, items)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        try:
+            fd = os.open(folder, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
             pass
 
+    def __encode(self, obj):
+        """Return the payload stored on disk for obj."""
+        return self.__codec.encode(obj)
+
+    def reload(self):
+        """Deserialize the file __file_path to __objects, if it exists.
+
+        The file is streamed one record at a time, so the whole parsed
+        document is never held in memory next to the objects built from it.
+        With a sharded layout, the shards are parsed in parallel by up to
+        __workers processes. Any journal left next to the snapshot is
+        replayed on top of it.
+
+        Objects are not built yet: their records are kept in __objects
+        until all(), get() or a relationship property first reaches them.
+        """
+        with self.__lock:
+            for key, text, o in self.__records():
+                self.__load(key, o, text)
+            try:
+                with open(self.__path() + ".log", "r",
+                          encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        for key, o in record.items():
+                            self.__load(key, o)
+            except FileNotFoundError:
+                pass
+
+    def __records(self):
+        """Yield the (key, payload, record) entries of the snapshot.
+
+        A payload is None when it no longer matches the schema __codec
+        uses for its class and must be encoded again. With a sharded
+        layout, __relayout is set if a key is read from a shard the
+        current layout does not store it in.
+        """
+        reader = self.__codec
+        if not self.__shards:
+            paths = [self.__path()]
+        else:
+            folder = self.__path() + ".d"
+            try:
+                paths = [os.path.join(folder, n) for n in os.listdir(folder)
+                         if n.endswith(reader.extension)]
+            except FileNotFoundError:
+                paths = []
+        workers = min(self.__workers, len(paths))
+        if workers > 1 and \
+                "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                for path, (entries, schemas) in zip(paths, pool.map(
+                        _read_shard, paths, repeat(reader.name))):
+                    stale = {n for n, fields in schemas.items()
+                             if reader.schemas.setdefault(n, fields) !=
+                             fields}
+                    for key, payload, o in self.__placed(path, entries):
+                        if o["__class__"] in stale:
+                            payload = None
+                        yield key, payload, o
+            return
+        for path in paths:
+            try:
+                with open(path, "rb" if reader.binary else "r",
+                          encoding=None if reader.binary else "utf-8") as f:
+                    yield from self.__placed(path, reader.load(f))
+            except FileNotFoundError:
+                pass
+
+    def __placed(self, path, entries):
+        """Yield the entries read from the snapshot file at path.
+
+        With a sharded layout, __relayout is set if an entry's key belongs
+        in another shard than the one at path.
+        """
+        if not self.__shards:
+            yield from entries
+            return
+        name = os.path.basename(path)[:-len(self.__codec.extension)]
+        for entry in entries:
+            if self.__shard(entry[0]) != name:
+                FileStorage.__relayout = True
+            yield entry
+
+    def __load(self, key, o, text=None):
+        """Apply one stored record o (None for a deletion) under key.
+
+        text is the record's payload, if already at hand.
+        """
+        by_class = self.__index()
+        name = key.split(".", 1)[0]
+        self.__lazy.get(name, set()).discard(key)
+        if o is None:
+            FileStorage.__persisted.pop(key, None)
+            if self.__objects.pop(key, None) is not None:
+                del by_class[name][key]
+                self.__reindex(name, key, None)
+        else:
+            if text is None:
+                text = self.__codec.encode_record(o)
+            FileStorage.__persisted[key] = text
+            record = _Record(o)
+            self.__objects[key] = record
+            by_class.setdefault(name, {})[key] = record
+            self.__lazy.setdefault(name, set()).add(key)
+            self.__reindex(name, key, record)
+        self.__dirty.discard(key)
+
     def delete(self, obj=None):
         """Delete a given object from __objects, if it exists."""
         try:
-            del self.__objects["{}.{}".format(type(obj).__name__, obj.id)]
+            name = type(obj).__name__
+            key = "{}.{}".format(name, obj.id)
+            with self.__lock:
+                by_class = self.__index()
+                del self.__objects[key]
+                del by_class[name][key]
+                self.__lazy.get(name, set()).discard(key)
+                self.__reindex(name, key, None)
+                self.__dirty.add(key)
         except (AttributeError, KeyError):
             pass
 
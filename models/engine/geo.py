@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Defines the geometry storage engines use for near() and within().
+
+Coordinates are latitudes and longitudes in degrees, distances are great
+circle distances in kilometers on a spherical Earth. A bounding box is a
+(south, west, north, east) tuple; west is greater than east when the box
+crosses the antimeridian.
+"""
+from math import asin
+from math import cos
+from math import degrees
+from math import radians
+from math import sin
+from math import sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """Return the great circle distance in kilometers between two points."""
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + \
+        cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+def bounds(latitude, longitude, radius_km):
+    """Return the smallest bounding box holding a circle.
+
+    Args:
+        latitude (float): The latitude of the center of the circle.
+        longitude (float): The longitude of the center of the circle.
+        radius_km (float): The radius of the circle in kilometers.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    south = latitude - degrees(angle)
+    north = latitude + degrees(angle)
+    if south <= -90 or north >= 90:
+        return max(south, -90.0), -180.0, min(north, 90.0), 180.0
+    ratio = sin(angle) / cos(radians(latitude))
+    if ratio >= 1:
+        return south, -180.0, north, 180.0
+    dlon = degrees(asin(ratio))
+    west = longitude - dlon
+    east = longitude + dlon
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return south, west, north, east
+
+
+def contains(box, latitude, longitude):
+    """Return whether the bounding box box holds the given point."""
+    south, west, north, east = box
+    if not south <= latitude <= north:
+        return False
+    if west <= east:
+        return west <= longitude <= east
+    return longitude >= west or longitude <= east
@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+"""Defines the in-memory indexes file storage engines keep."""
+import bisect
+from math import floor
+from models.engine import geo
+
+
+class _Top:
+    """A value sorting after every id, to bisect past all ids of a value."""
+
+    def __lt__(self, other):
+        """Return False: nothing sorts after _Top."""
+        return False
+
+    def __gt__(self, other):
+        """Return True: _Top sorts after everything."""
+        return True
+
+
+_TOP = _Top()
+
+
+class SortedIndex:
+    """Represents the ids of one class sorted by the value of an attribute.
+
+    Entries are (value, id) pairs, so objects sharing a value are ordered
+    by id and every entry is unique. Objects whose value is None are not
+    indexed.
+
+    Attributes:
+        attr (str): The attribute the index is sorted by.
+    """
+
+    def __init__(self, attr, items=()):
+        """Initialize a new SortedIndex.
+
+        Args:
+            attr (str): The attribute the index is sorted by.
+            items (iterable): (id, value) pairs to index to begin with.
+        """
+        self.attr = attr
+        self.__values = {id: v for id, v in items if v is not None}
+        self.__entries = sorted((v, id) for id, v in self.__values.items())
+
+    def __len__(self):
+        """Return the number of indexed ids."""
+        return len(self.__entries)
+
+    def __iter__(self):
+        """Iterate over the entries in ascending order."""
+        return iter(self.__entries)
+
+    def __reversed__(self):
+        """Iterate over the entries in descending order."""
+        return reversed(self.__entries)
+
+    def add(self, id, value):
+        """Index id under value, replacing its previous value if any.
+
+        The new entry is inserted before the previous one is removed, so
+        the index is left unchanged if value does not compare with the
+        values indexed.
+        """
+        if id in self.__values and self.__values[id] == value:
+            return
+        if value is not None:
+            bisect.insort(self.__entries, (value, id))
+        self.discard(id)
+        if value is not None:
+            self.__values[id] = value
+
+    def discard(self, id):
+        """Remove id from the index, if it is in it."""
+        if id not in self.__values:
+            return
+        entry = (self.__values.pop(id), id)
+        i = bisect.bisect_left(self.__entries, entry)
+        del self.__entries[i]
+
+    def after(self, cursor=None, limit=None):
+        """Return the entries that sort after cursor, in order.
+
+        Args:
+            cursor (tuple): A (value, id) entry, or None to start from the
+                first entry.
+            limit (int): The maximum number of entries to return.
+        """
+        i = 0 if cursor is None else \
+            bisect.bisect_right(self.__entries, tuple(cursor))
+        return self.__entries[i:None if limit is None else i + limit]
+
+    def range(self, low=None, high=None, include_low=True,
+              include_high=True, limit=None):
+        """Return the entries whose value lies between low and high.
+
+        Args:
+            low: The lowest value, or None for no lower bound.
+            high: The highest value, or None for no upper bound.
+            include_low (bool): Whether entries valued low are included.
+            include_high (bool): Whether entries valued high are included.
+            limit (int): The maximum number of entries to return.
+        """
+        entries = self.__entries
+        i = 0 if low is None else bisect.bisect_left(
+            entries, (low,) if include_low else (low, _TOP))
+        j = len(entries) if high is None else bisect.bisect_left(
+            entries, (high, _TOP) if include_high else (high,))
+        if limit is not None:
+            j = min(j, i + limit)
+        return entries[i:j]
+
+
+class GridIndex:
+    """Represents the ids of one class bucketed by latitude and longitude.
+
+    The globe is cut into square cells of cell degrees, and each id is
+    stored in the cell its point falls in, so a bounding box query only
+    visits the cells the box overlaps. Ids without a latitude or a
+    longitude are not indexed.
+
+    Attributes:
+        cell (float): The side of a cell, in degrees.
+    """
+
+    def __init__(self, cell, items=()):
+        """Initialize a new GridIndex.
+
+        Args:
+            cell (float): The side of a cell, in degrees.
+            items (iterable): (id, latitude, longitude) triples to index to
+                begin with.
+        """
+        self.cell = cell
+        self.__points = {}
+        self.__cells = {}
+        for id, lat, lon in items:
+            self.add(id, lat, lon)
+
+    def __len__(self):
+        """Return the number of indexed ids."""
+        return len(self.__points)
+
+    def __key(self, lat, lon):
+        """Return the cell a point falls in."""
+        return floor(lat / self.cell), floor(lon / self.cell)
+
+    def add(self, id, lat, lon):
+        """Index id at (lat, lon), replacing its previous point if any."""
+        point = self.__points.get(id)
+        if point is not None and point == (lat, lon):
+            return
+        self.discard(id)
+        if lat is not None and lon is not None:
+            self.__points[id] = (lat, lon)
+            self.__cells.setdefault(self.__key(lat, lon), {})[id] = None
+
+    def discard(self, id):
+        """Remove id from the index, if it is in it."""
+        point = self.__points.pop(id, None)
+        if point is None:
+            return
+        key = self.__key(*point)
+        ids = self.__cells[key]
+        del ids[id]
+        if not ids:
+            del self.__cells[key]
+
+    def within(self, box):
+        """Yield the (id, latitude, longitude) of the points inside box.
+
+        Args:
+            box (tuple): A (south, west, north, east) bounding box, west
+                greater than east if it crosses the antimeridian.
+        """
+        south, west, north, east = box
+        rows = range(floor(south / self.cell), floor(north / self.cell) + 1)
+        if west <= east:
+            cols = [range(floor(west / self.cell),
+                          floor(east / self.cell) + 1)]
+        else:
+            cols = [range(floor(west / self.cell),
+                          floor(180 / self.cell) + 1),
+                    range(floor(-180 / self.cell),
+                          floor(east / self.cell) + 1)]
+        cells = self.__cells
+        if len(rows) * sum(map(len, cols)) <= len(cells):
+            keys = ((r, c) for r in rows for span in cols for c in span)
+        else:
+            keys = (k for k in cells
+                    if k[0] in rows and any(k[1] in span for span in cols))
+        points = self.__points
+        for key in keys:
+            for id in cells.get(key, ()):
+                lat, lon = points[id]
+                if geo.contains(box, lat, lon):
+                    yield id, lat, lon
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""Defines the lookups the filter() method of storage engines accepts.
+
+Lookups are keyword arguments naming a column, optionally followed by a
+double underscore and an operator: city_id="...", price_by_night__lte=200,
+max_guest__gte=4 or name__in=[...]. Comparisons follow SQL: None only
+matches eq (IS NULL) and ne (IS NOT NULL), and a None column never
+matches any other comparison.
+"""
+import operator
+
+OPERATORS = {"eq": operator.eq, "ne": operator.ne, "lt": operator.lt,
+             "lte": operator.le, "gt": operator.gt, "gte": operator.ge,
+             "in": lambda actual, values: actual in values}
+
+
+def parse(name, fields, criteria, coerce=None):
+    """Return the (attribute, operator, value) predicates of criteria.
+
+    Args:
+        name (str): The name of the class queried.
+        fields (iterable): The column names of that class.
+        criteria (dict): The lookups given to filter().
+        coerce (callable): If given, called as coerce(attribute, value)
+            to convert each value compared, such as ModelCodec.coerce().
+
+    Raises:
+        ValueError: If a lookup names an unknown column or operator, or
+            coerce raises it.
+    """
+    predicates = []
+    for key, value in criteria.items():
+        attr, sep, op = key.partition("__")
+        if not sep:
+            op = "eq"
+        if op not in OPERATORS:
+            raise ValueError("Unknown operator {} in {}".format(op, key))
+        if attr not in fields:
+            raise ValueError("{} has no column {}".format(name, attr))
+        if op == "in":
+            value = list(value)
+        if coerce is not None:
+            if op == "in":
+                value = [coerce(attr, v) for v in value]
+            else:
+                value = coerce(attr, value)
+        predicates.append((attr, op, value))
+    return predicates
+
+
+def matches(actual, op, value):
+    """Return whether the value of a column, actual, satisfies op value."""
+    if actual is None or value is None:
+        if op == "eq":
+            return actual is None and value is None
+        return op == "ne" and value is None and actual is not None
+    return OPERATORS[op](actual, value)
+
+
+def describe(predicates):
+    """Return the predicates as readable "attribute op value" strings."""
+    return ["{} {} {!r}".format(attr, op, value)
+            for attr, op, value in predicates]
@@ -0,0 +1,404 @@
+#!/usr/bin/python3
+"""Defines the MmapStorage engine."""
+import bisect
+import io
+import json
+import mmap
+import os
+import weakref
+from os import getenv
+from models.engine import codec
+from models.engine import geo
+from models.engine import lookups
+from models.engine.index import SortedIndex
+from models import classes
+
+
+class MmapStorage:
+    """Represents a read-only storage engine over a memory-mapped file.
+
+    Serves the binary snapshot written by FileStorage with
+    HBNB_FILE_CODEC=binary. The file is mapped read-only, so its pages live
+    in the OS page cache and are shared by every process serving it, and
+    objects are decoded from it only when they are asked for. Decoded
+    objects are cached weakly: they are dropped once no caller holds them.
+    Changes still waiting in the FileStorage journal are applied on top.
+
+    Attributes:
+        __file_path (str): The binary snapshot to serve.
+        __codec (codec.BinaryCodec): Decodes the records of the snapshot.
+        __map (mmap.mmap): The mapped snapshot.
+        __stat (tuple): Identity of the mapped file, to notice it being
+            replaced by a new snapshot.
+        __index (tuple): Offset and number of the (hash, offset) entries.
+        __sections (list): [name, fields, start, end] of every class.
+        __overlay (dict): Journal records applied over the snapshot, with
+            None for deleted keys.
+        __cache (weakref.WeakValueDictionary): Objects already decoded.
+        __counts (dict): The number of records of each class name in the
+            snapshot, counted on first use.
+        __sorted (dict): The SortedIndex page() built for each (class
+            name, attribute) pair, dropped when the data changes.
+        __rows (bool): Whether objects are built as compact rows instead
+            of model instances (HBNB_FILE_COMPACT=1).
+    """
+
+    __file_path = "file.bin"
+    __codec = None
+    __map = None
+    __stat = None
+    __index = (0, 0)
+    __sections = []
+    __overlay = {}
+    __cache = weakref.WeakValueDictionary()
+    __counts = None
+    __sorted = {}
+    __rows = getenv("HBNB_FILE_COMPACT") == "1"
+
+    def all(self, cls=None, load=None):
+        """Return a dictionary of the objects stored in the snapshot.
+
+        If a cls is specified, returns only the objects of that type. load
+        is ignored, as in FileStorage.all().
+        """
+        if cls is not None and type(cls) != str:
+            cls = cls.__name__
+        objs = {}
+        for name, fields, start, end in self.__sections:
+            if cls is None or cls == name:
+                pos = start
+                while pos < end:
+                    obj, pos = self.__decode(name, fields, pos, True)
+                    if obj is not None:
+                        objs["{}.{}".format(name, obj.id)] = obj
+        for key, o in self.__overlay.items():
+            if cls is None or key.split(".", 1)[0] == cls:
+                if o is None:
+                    objs.pop(key, None)
+                else:
+                    objs[key] = self.__build(key, dict(o))
+        return objs
+
+    def iter(self, cls=None, batch_size=1000):
+        """Yield the objects of class cls, or every object, one at a time.
+
+        Objects are decoded as the iteration reaches them; batch_size is
+        accepted for compatibility with the other engines.
+        """
+        if cls is not None and type(cls) != str:
+            cls = cls.__name__
+        overlay = self.__overlay
+        for name, fields, start, end in self.__sections:
+            if cls is None or cls == name:
+                pos = start
+                while pos < end:
+                    obj, pos = self.__decode(name, fields, pos, True)
+                    if obj is not None:
+                        yield obj
+        for key, o in overlay.items():
+            if o is not None and (cls is None or
+                                  key.split(".", 1)[0] == cls):
+                yield self.__build(key, dict(o))
+
+    def get(self, cls, id):
+        """Return the object of class cls with the given id, or None.
+
+        Looks the key up in the snapshot's hash index instead of decoding
+        every object of the class.
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        key = "{}.{}".format(cls, id)
+        if key in self.__overlay:
+            o = self.__overlay[key]
+            return None if o is None else self.__build(key, dict(o))
+        return self.__lookup(cls, id)
+
+    def __lookup(self, cls, id):
+        """Return the snapshot's object of class name cls with id, or None.
+
+        The journal is not consulted.
+        """
+        offset, count = self.__index
+        if not count:
+            return None
+        h = codec.BinaryCodec.key_hash("{}.{}".format(cls, id))
+        size = codec.BinaryCodec.ENTRY.size
+        entry = codec.BinaryCodec.ENTRY.unpack_from
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if entry(self.__map, offset + mid * size)[0] < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        starts = [s[2] for s in self.__sections]
+        while lo < count:
+            found, pos = entry(self.__map, offset + lo * size)
+            if found != h:
+                break
+            name, fields, start, end = \
+                self.__sections[bisect.bisect_right(starts, pos) - 1]
+            if name == cls:
+                obj, pos = self.__decode(name, fields, pos)
+                if obj.id == id:
+                    return obj
+            lo += 1
+        return None
+
+    def count(self, cls=None):
+        """Return the number of objects of class cls, or of every class.
+
+        The records of the snapshot are counted once per mapping by
+        skipping over their length prefixes, without decoding them. The
+        journal is applied on top.
+        """
+        if cls is not None and type(cls) != str:
+            cls = cls.__name__
+        counts = self.__counts
+        if counts is None:
+            counts = {}
+            for name, fields, start, end in self.__sections:
+                n, pos = 0, start
+                while pos < end:
+                    size, pos = self.__codec._read_varint(self.__map, pos)
+                    pos += size
+                    n += 1
+                counts[name] = counts.get(name, 0) + n
+            MmapStorage.__counts = counts
+        total = sum(counts.values()) if cls is None else counts.get(cls, 0)
+        for key, o in self.__overlay.items():
+            name, id = key.split(".", 1)
+            if cls is None or cls == name:
+                total += (o is not None) - \
+                    (self.__lookup(name, id) is not None)
+        return total
+
+    def page(self, cls, order_by="name", after=None, limit=20,
+             load=None):
+        """Return a page of the objects of class cls sorted by order_by.
+
+        The first page of a class and order builds a SortedIndex of it,
+        which serves every later page until the snapshot or journal
+        changes. See FileStorage.page(); load is ignored.
+
+        Raises:
+            ValueError: If order_by is not a column of cls.
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        model = codec.model(classes[cls])
+        if order_by not in model.fields:
+            raise ValueError("{} has no column {}".format(cls, order_by))
+        index = self.__sorted.get((cls, order_by))
+        if index is None:
+            index = SortedIndex(order_by, (
+                (o.id, model.value(o, order_by)) for o in self.iter(cls)))
+            MmapStorage.__sorted[(cls, order_by)] = index
+        entries = index.after(after, limit + 1)
+        objs = [self.get(cls, id) for v, id in entries[:limit]]
+        return objs, entries[limit - 1] if len(entries) > limit else None
+
+    def filter(self, cls, order_by=None, limit=None, **criteria):
+        """Return the list of objects of class cls matching criteria.
+
+        The snapshot indexes no attribute, so every object of cls is
+        decoded and checked. See FileStorage.filter() for the arguments.
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        model = codec.model(classes[cls])
+        fields = model.fields
+        predicates = lookups.parse(cls, fields, criteria, model.coerce)
+        value = model.value
+        objs = [o for o in self.iter(cls) if all(
+            lookups.matches(value(o, attr), op, v)
+            for attr, op, v in predicates)]
+        if order_by is not None:
+            attr = order_by.lstrip("-")
+            if attr not in fields:
+                raise ValueError("{} has no column {}".format(cls, attr))
+            objs = sorted((o for o in objs if value(o, attr) is not None),
+                          key=lambda o: (value(o, attr), o.id),
+                          reverse=order_by.startswith("-"))
+        return objs[:limit]
+
+    def explain(self, cls, order_by=None, limit=None, **criteria):
+        """Return how filter() answers the same call: always by a scan."""
+        if type(cls) != str:
+            cls = cls.__name__
+        model = codec.model(classes[cls])
+        predicates = lookups.parse(cls, model.fields, criteria, model.coerce)
+        return {"class": cls, "path": "scan", "index": None,
+                "candidates": self.count(cls), "ordered": False,
+                "filters": lookups.describe(predicates)}
+
+    def near(self, cls, latitude, longitude, radius_km, limit=None):
+        """Return the objects of class cls within radius_km of a point.
+
+        Every object of cls is decoded and checked. See FileStorage.near().
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        value = codec.model(classes[cls]).value
+        found = []
+        for obj in self.within(cls, *geo.bounds(latitude, longitude,
+                                                radius_km)):
+            d = geo.distance(latitude, longitude, value(obj, "latitude"),
+                             value(obj, "longitude"))
+            if d <= radius_km:
+                found.append((d, obj.id, obj))
+        found.sort(key=lambda f: f[:2])
+        return [obj for d, id, obj in found[:limit]]
+
+    def within(self, cls, south, west, north, east, limit=None):
+        """Return the objects of class cls inside a bounding box.
+
+        Every object of cls is decoded and checked. See
+        FileStorage.within().
+        """
+        if type(cls) != str:
+            cls = cls.__name__
+        model = codec.model(classes[cls])
+        if "latitude" not in model.fields or "longitude" not in model.fields:
+            raise ValueError("{} has no latitude and longitude".format(cls))
+        box = (south, west, north, east)
+        found = []
+        for o in self.iter(cls):
+            lat, lon = model.value(o, "latitude"), model.value(o, "longitude")
+            if lat is not None and lon is not None and \
+                    geo.contains(box, lat, lon):
+                found.append(o)
+        return found[:limit]
+
+    def related(self, cls, attr, value):
+        """Return the list of objects of class cls whose attr equals value."""
+        return [o for o in self.all(cls).values()
+                if getattr(o, attr, None) == value]
+
+    def __decode(self, name, fields, pos, skip=False):
+        """Return the object whose record starts at pos, and its end.
+
+        The cache holds the journal's objects for the keys the journal
+        overlays, so the snapshot's objects of those keys are built apart
+        from it, or not at all when skip is True, giving None.
+        """
+        c = self.__codec
+        n, pos = c._read_varint(self.__map, pos)
+        end = pos + n
+        key = None
+        if fields and fields[0] == "id":
+            v = c._read(self.__map, pos)[0]
+            key = "{}.{}".format(name, v)
+            if skip and key in self.__overlay:
+                return None, end
+            obj = self.__cache.get(key)
+            if obj is not None and key not in self.__overlay:
+                return obj, end
+        record = c.unpack(fields, self.__map, pos)
+        if key is None:
+            key = "{}.{}".format(name, record["id"])
+            if skip and key in self.__overlay:
+                return None, end
+        record["__class__"] = name
+        return self.__build(key, record, key not in self.__overlay), end
+
+    def __build(self, key, record, cache=True):
+        """Return the cached object for key, built from record if needed.
+
+        With cache False, a new object is built and left out of the cache.
+        """
+        obj = self.__cache.get(key) if cache else None
+        if obj is None:
+            name = record.pop("__class__")
+            model = codec.model(classes[name])
+            if self.__rows:
+                obj = model.to_row(record)
+            else:
+                obj = model.from_dict(record)
+            if cache:
+                self.__cache[key] = obj
+        return obj
+
+    def new(self, obj):
+        """Refuse to add obj: the storage is read-only."""
+        raise io.UnsupportedOperation("MmapStorage is read-only")
+
+    def changed(self, obj):
+        """Do nothing: changes to objects are never saved."""
+
+    def save(self):
+        """Refuse to save: the storage is read-only."""
+        raise io.UnsupportedOperation("MmapStorage is read-only")
+
+    def delete(self, obj=None):
+        """Refuse to delete obj: the storage is read-only."""
+        raise io.UnsupportedOperation("MmapStorage is read-only")
+
+    def reload(self):
+        """Map the snapshot __file_path and read its journal, if any.
+
+        Raises:
+            ValueError: If the snapshot has no index trailer.
+        """
+        try:
+            f = open(self.__file_path, "rb")
+        except FileNotFoundError:
+            self.__unmap()
+            MmapStorage.__sections = []
+            MmapStorage.__index = (0, 0)
+            MmapStorage.__counts = None
+        else:
+            with f:
+                st = os.fstat(f.fileno())
+                stat = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+                if stat != MmapStorage.__stat:
+                    self.__map_file(f, stat)
+        overlay = {}
+        try:
+            with open(self.__file_path + ".log", "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        overlay.update(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        if overlay != MmapStorage.__overlay:
+            MmapStorage.__cache = weakref.WeakValueDictionary()
+            MmapStorage.__sorted = {}
+        MmapStorage.__overlay = overlay
+
+    def __map_file(self, f, stat):
+        """Map the snapshot open in f and read its index trailer."""
+        trailer = codec.BinaryCodec.TRAILER
+        new = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(new) < trailer.size or \
+                new[-8:] != codec.BinaryCodec.TRAILER_MAGIC:
+            new.close()
+            raise ValueError("{} has no index".format(self.__file_path))
+        index, count, table, magic = trailer.unpack_from(
+            new, len(new) - trailer.size)
+        self.__unmap()
+        MmapStorage.__map = new
+        MmapStorage.__stat = stat
+        MmapStorage.__codec = codec.BinaryCodec()
+        MmapStorage.__index = (index, count)
+        MmapStorage.__sections = json.loads(
+            new[table:len(new) - trailer.size].decode("utf-8"))
+        MmapStorage.__cache = weakref.WeakValueDictionary()
+        MmapStorage.__counts = None
+        MmapStorage.__sorted = {}
+
+    def __unmap(self):
+        """Forget the current mapping.
+
+        The map itself is closed by garbage collection, since objects
+        handed out earlier never point into it.
+        """
+        MmapStorage.__map = None
+        MmapStorage.__stat = None
+
+    def close(self):
+        """Pick up a new snapshot or journal, if one was written."""
+        self.reload()
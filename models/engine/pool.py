@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""Defines the connection pool database storage engines use.
+
+The pool is configured by environment variables, read by options():
+    HBNB_MYSQL_POOL_SIZE: Connections kept open (default 5).
+    HBNB_MYSQL_POOL_MAX_OVERFLOW: Connections opened beyond the pool size
+        under load and closed when returned (default 10).
+    HBNB_MYSQL_POOL_RECYCLE: Seconds after which a connection is replaced
+        on checkout, -1 for never (default -1).
+    HBNB_MYSQL_POOL_TIMEOUT: Seconds a checkout waits for a connection
+        before raising sqlalchemy.exc.TimeoutError (default 30).
+    HBNB_MYSQL_POOL_PRE_PING: "1" to test every connection with a round
+        trip on checkout, "0" to rely on HBNB_MYSQL_POOL_RECYCLE to retire
+        connections the server may have closed (default "1").
+"""
+import threading
+from collections import deque
+from os import getenv
+from time import perf_counter
+from sqlalchemy import event
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+def options():
+    """Return the create_engine() pool arguments set by the environment."""
+    return {"poolclass": MeteredPool,
+            "pool_size": int(getenv("HBNB_MYSQL_POOL_SIZE", 5)),
+            "max_overflow": int(getenv("HBNB_MYSQL_POOL_MAX_OVERFLOW", 10)),
+            "pool_recycle": int(getenv("HBNB_MYSQL_POOL_RECYCLE", -1)),
+            "pool_timeout": float(getenv("HBNB_MYSQL_POOL_TIMEOUT", 30)),
+            "pool_pre_ping": getenv("HBNB_MYSQL_POOL_PRE_PING", "1") == "1"}
+
+
+class MeteredPool(QueuePool):
+    """Represents a QueuePool recording how its connections are used.
+
+    Metrics start over when the pool is recreated, as on Engine.dispose().
+
+    Attributes:
+        samples (int): The number of latest checkouts the latency
+            percentiles are computed over.
+    """
+
+    samples = 1000
+
+    def __init__(self, *args, **kwargs):
+        """Initialize a new MeteredPool with the QueuePool arguments."""
+        super().__init__(*args, **kwargs)
+        self.__lock = threading.Lock()
+        self.__latencies = deque(maxlen=self.samples)
+        self.__checkouts = 0
+        self.__total = 0.0
+        self.__slowest = 0.0
+        self.__peak = 0
+        self.__overflows = 0
+        self.__timeouts = 0
+        event.listen(self, "connect", self.__connected)
+
+    def recreate(self):
+        """Return a new MeteredPool with the same settings and listeners.
+
+        The listener counting overflows is left out, the new pool adding
+        its own.
+        """
+        event.remove(self, "connect", self.__connected)
+        return super().recreate()
+
+    def __connected(self, dbapi_connection, record):
+        """Count the connections opened beyond the pool size.
+
+        Connections re-opened by a record, once recycled or invalidated,
+        were counted when the record first connected.
+        """
+        if "metered" in record.info:
+            return
+        record.info["metered"] = True
+        if self.overflow() > 0:
+            with self.__lock:
+                self.__overflows += 1
+
+    def connect(self):
+        """Return a connection from the pool, timing the checkout.
+
+        The time includes waiting for a free connection, opening a new one
+        and the pre-ping, if any.
+
+        Raises:
+            sqlalchemy.exc.TimeoutError: If no connection is free within
+                the pool timeout.
+        """
+        start = perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            with self.__lock:
+                self.__timeouts += 1
+            raise
+        latency = perf_counter() - start
+        in_use = self.checkedout()
+        with self.__lock:
+            self.__checkouts += 1
+            self.__total += latency
+            self.__slowest = max(self.__slowest, latency)
+            self.__latencies.append(latency)
+            self.__peak = max(self.__peak, in_use)
+        return connection
+
+    def metrics(self):
+        """Return a dictionary of the pool's metrics.
+
+        Return:
+            size and max_overflow, the pool's settings; in_use and
+            overflow, the connections checked out and opened beyond size
+            right now; peak_in_use, the most connections ever checked out
+            at once; overflows, the connections ever opened beyond size;
+            timeouts, the checkouts that timed out; checkouts, the
+            successful checkouts; and their mean, median, 99th percentile
+            and maximum latencies in milliseconds, checkout_mean_ms,
+            checkout_p50_ms, checkout_p99_ms and checkout_max_ms.
+        """
+        with self.__lock:
+            latencies = sorted(self.__latencies)
+            metrics = {"size": self.size(),
+                       "max_overflow": self._max_overflow,
+                       "in_use": self.checkedout(),
+                       "overflow": max(self.overflow(), 0),
+                       "peak_in_use": self.__peak,
+                       "overflows": self.__overflows,
+                       "timeouts": self.__timeouts,
+                       "checkouts": self.__checkouts,
+                       "checkout_mean_ms": 0.0, "checkout_p50_ms": 0.0,
+                       "checkout_p99_ms": 0.0,
+                       "checkout_max_ms": self.__slowest * 1000}
+            if latencies:
+                metrics["checkout_mean_ms"] = \
+                    self.__total / self.__checkouts * 1000
+                metrics["checkout_p50_ms"] = \
+                    latencies[len(latencies) // 2] * 1000
+                metrics["checkout_p99_ms"] = \
+                    latencies[int(len(latencies) * 0.99)] * 1000
+        return metrics
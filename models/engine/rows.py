@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+"""Defines the compact, slot-based rows file storage engines may use.
+
+Instances of the model classes are SQLAlchemy-mapped: each one carries a
+__dict__ and an InstanceState even in file mode, where SQLAlchemy is never
+used. A row class mirrors one model class with its columns stored in
+__slots__ instead, and no SQLAlchemy state. Rows have the same attribute
+access, to_dict(), __str__, save(), delete() and file-mode relationship
+properties as the model objects they stand for.
+"""
+import models
+from datetime import datetime
+from uuid import uuid4
+from sqlalchemy.orm.attributes import QueryableAttribute
+
+_TIMESTAMPS = ("created_at", "updated_at")
+
+
+class Row:
+    """Base of the row classes built by row_class().
+
+    Attributes:
+        _columns (frozenset): The column names of the model class, read as
+            None while unset like on the model objects.
+        _members (tuple): The (name, slot descriptor) pair of each column.
+    """
+
+    __slots__ = ("__dict__", "__weakref__")
+    _columns = frozenset()
+    _members = ()
+
+    def __init__(self, **kwargs):
+        """Initialize a new row from key/value pairs of attributes.
+
+        Like BaseModel, a missing id or timestamp is filled in, and the
+        attributes are set without telling the storage.
+        """
+        assign = super().__setattr__
+        if "id" not in kwargs:
+            assign("id", str(uuid4()))
+        if "created_at" not in kwargs or "updated_at" not in kwargs:
+            now = datetime.utcnow()
+            assign("created_at", now)
+            assign("updated_at", now)
+        for key, value in kwargs.items():
+            if key in _TIMESTAMPS and type(value) == str:
+                value = datetime.fromisoformat(value)
+            if key != "__class__":
+                assign(key, value)
+
+    def __getattr__(self, name):
+        """Return None for unset columns."""
+        if name in self._columns:
+            return None
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            type(self).__name__, name))
+
+    def _values(self):
+        """Return a dictionary of the attributes set on the row."""
+        values = {}
+        for k, member in self._members:
+            try:
+                values[k] = member.__get__(self)
+            except AttributeError:
+                pass
+        values.update(self.__dict__)
+        return values
+
+    def __setattr__(self, name, value):
+        """Set an attribute and tell the storage the row changed."""
+        super().__setattr__(name, value)
+        models.storage.changed(self)
+
+    def save(self):
+        """Update updated_at with the current datetime."""
+        self.updated_at = datetime.utcnow()
+        models.storage.new(self)
+        models.storage.save()
+
+    def to_dict(self):
+        """Return a dictionary representation of the row.
+
+        Matches BaseModel.to_dict(), keys sorted.
+        """
+        record = self._values()
+        record["__class__"] = type(self).__name__
+        record["created_at"] = self.created_at.isoformat()
+        record["updated_at"] = self.updated_at.isoformat()
+        return dict(sorted(record.items()))
+
+    def delete(self):
+        """Delete the current row from storage."""
+        models.storage.delete(self)
+
+    def __str__(self):
+        """Return the print/str representation of the row."""
+        return "[{}] ({}) {}".format(type(self).__name__, self.id,
+                                     self._values())
+
+
+def row_class(cls, fields):
+    """Return a new row class standing for the model class cls.
+
+    fields are the column names stored in slots. Plain class attributes
+    and properties of cls, such as its file-mode relationships, are
+    copied over.
+    """
+    namespace = {"__slots__": tuple(fields),
+                 "__module__": cls.__module__,
+                 "__table__": getattr(cls, "__table__", None),
+                 "__doc__": "Compact row of a {}.".format(cls.__name__),
+                 "_columns": frozenset(fields)}
+    for klass in reversed(cls.__mro__):
+        if issubclass(klass, models.base_model.BaseModel) and \
+                klass is not models.base_model.BaseModel:
+            for name, value in vars(klass).items():
+                if not name.startswith("_") and name not in fields and \
+                        not isinstance(value, QueryableAttribute):
+                    namespace[name] = value
+    row = type(cls.__name__, (Row,), namespace)
+    row._members = tuple((k, vars(row)[k]) for k in fields)
+    return row
@@ -9,6 +9,7 @@ from models.review import Review
 from sqlalchemy import Column
 from sqlalchemy import Float
 from sqlalchemy import ForeignKey
+from sqlalchemy import Index
 from sqlalchemy import Integer
 from sqlalchemy import String
 from sqlalchemy import Table
@@ -21,7 +22,8 @@ association_table = Table("place_amenity", Base.metadata,
                                  primary_key=True, nullable=False),
                           Column("amenity_id", String(60),
                                  ForeignKey("amenities.id"),
-                                 primary_key=True, nullable=False))
+                                 primary_key=True, nullable=False),
+                          Index("ix_place_amenity_amenity_id", "amenity_id"))
 
 
 class Place(BaseModel, Base):
@@ -31,6 +33,7 @@ class Place(BaseModel, Base):
 
     Attributes:
         __tablename__ (str): The name of the MySQL table to store places.
+        __table_args__ (tuple): The indexes on the foreign keys.
         city_id (sqlalchemy String): The place's city id.
         user_id (sqlalchemy String): The place's user id.
         name (sqlalchemy String): The name.
@@ -46,41 +49,40 @@ class Place(BaseModel, Base):
         amenity_ids (list): An id list of all linked amenities.
     """
     __tablename__ = "places"
+    __table_args__ = (Index("ix_places_city_id", "city_id"),
+                      Index("ix_places_user_id", "user_id"))
     city_id = Column(String(60), ForeignKey("cities.id"), nullable=False)
     user_id = Column(String(60), ForeignKey("users.id"), nullable=False)
-    name = Column(String(128), nullable=False)
+    name = Column(String(128), nullable=False, index=True)
     description = Column(String(1024))
-    number_rooms = Column(Integer, default=0)
+    number_rooms = Column(Integer, default=0, index=True)
     number_bathrooms = Column(Integer, default=0)
-    max_guest = Column(Integer, default=0)
-    price_by_night = Column(Integer, default=0)
-    latitude = Column(Float)
-    longitude = Column(Float)
+    max_guest = Column(Integer, default=0, index=True)
+    price_by_night = Column(Integer, default=0, index=True)
+    latitude = Column(Float, index=True)
+    longitude = Column(Float, index=True)
     reviews = relationship("Review", backref="place", cascade="delete")
     amenities = relationship("Amenity", secondary="place_amenity",
                              viewonly=False)
     amenity_ids = []
 
-    if getenv("HBNB_TYPE_STORAGE", None) != "db":
+    if getenv("HBNB_TYPE_STORAGE", None) not in ("db", "sqlite"):
         @property
         def reviews(self):
             """Get a list of all linked Reviews."""
-            review_list = []
-            for review in list(models.storage.all(Review).values()):
-                if review.place_id == self.id:
-                    review_list.append(review)
-            return review_list
+            return models.storage.related(Review, "place_id", self.id)
 
         @property
         def amenities(self):
             """Get/set linked Amenities."""
             amenity_list = []
-            for amenity in list(models.storage.all(Amenity).values()):
-                if amenity.id in self.amenity_ids:
+            for amenity_id in dict.fromkeys(self.amenity_ids):
+                amenity = models.storage.get(Amenity, amenity_id)
+                if amenity is not None:
                     amenity_list.append(amenity)
             return amenity_list
 
         @amenities.setter
         def amenities(self, value):
-            if type(value) == Amenity:
+            if type(value).__name__ == "Amenity":
                 self.amenity_ids.append(value.id)
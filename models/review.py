@@ -4,6 +4,7 @@ from models.base_model import Base
 from models.base_model import BaseModel
 from sqlalchemy import Column
 from sqlalchemy import ForeignKey
+from sqlalchemy import Index
 from sqlalchemy import String
 from sqlalchemy.orm import relationship
 
@@ -15,11 +16,14 @@ class Review(BaseModel, Base):
 
     Attributes:
         __tablename__ (str): The name of the MySQL table to store Reviews.
+        __table_args__ (tuple): The indexes on the foreign keys.
         text (sqlalchemy String): The review description.
         place_id (sqlalchemy String): The review's place id.
         user_id (sqlalchemy String): The review's user id.
     """
     __tablename__ = "reviews"
+    __table_args__ = (Index("ix_reviews_place_id", "place_id"),
+                      Index("ix_reviews_user_id", "user_id"))
     text = Column(String(1024), nullable=False)
     place_id = Column(String(60), ForeignKey("places.id"), nullable=False)
     user_id = Column(String(60), ForeignKey("users.id"), nullable=False)
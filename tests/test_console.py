@@ -130,6 +130,9 @@ class TestHBNBCommand(unittest.TestCase):
         with patch("sys.stdout", new=StringIO()) as f:
             self.HBNB.onecmd("all BaseModel")
             self.assertIn(bm, f.getvalue())
+            objs = models.storage.all("BaseModel").values()
+            self.assertEqual("{}\n".format([str(o) for o in objs]),
+                             f.getvalue())
         with patch("sys.stdout", new=StringIO()) as f:
             self.HBNB.onecmd("all User")
             self.assertIn(us, f.getvalue())
@@ -269,6 +272,30 @@ class TestHBNBCommand(unittest.TestCase):
             self.HBNB.onecmd("State.count()")
             self.assertEqual("0\n", f.getvalue())
 
+    @unittest.skipIf(type(models.storage) == DBStorage, "Testing DBStorage")
+    def test_z_lookup(self):
+        """Test show, count and destroy on an existing instance."""
+        with patch("sys.stdout", new=StringIO()) as f:
+            self.HBNB.onecmd('create State name="Ohio"')
+            my_id = f.getvalue().strip()
+        with patch("sys.stdout", new=StringIO()) as f:
+            self.HBNB.onecmd("State.count()")
+            self.assertEqual("1\n", f.getvalue())
+        with patch("sys.stdout", new=StringIO()) as f:
+            self.HBNB.onecmd("show State " + my_id)
+            self.assertIn("[State] ({})".format(my_id), f.getvalue())
+            self.assertIn("'name': 'Ohio'", f.getvalue())
+        with patch("sys.stdout", new=StringIO()) as f:
+            self.HBNB.onecmd("destroy State " + my_id)
+            self.assertEqual("", f.getvalue())
+        self.assertIsNone(models.storage.get("State", my_id))
+        with patch("sys.stdout", new=StringIO()) as f:
+            self.HBNB.onecmd("State.count()")
+            self.assertEqual("0\n", f.getvalue())
+        with patch("sys.stdout", new=StringIO()) as f:
+            self.HBNB.onecmd("show State " + my_id)
+            self.assertEqual("** no instance found **\n", f.getvalue())
+
     def test_z_show(self):
         """Test alternate show command inpout"""
         with patch('sys.stdout', new=StringIO()) as f:
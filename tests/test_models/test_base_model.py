@@ -2,9 +2,11 @@
 """Defines unnittests for models/base_model.py."""
 import os
 import pep8
+import models
 import unittest
 from datetime import datetime
 from models.base_model import BaseModel
+from models.engine.db_storage import DBStorage
 from models.engine.file_storage import FileStorage
 
 
@@ -92,6 +94,20 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(bm.id, "5")
         self.assertEqual(bm.created_at, dt)
 
+    def test_init_datetime_kwargs(self):
+        """Test initialization with already parsed datetimes."""
+        dt = datetime.utcnow()
+        bm = BaseModel(created_at=dt, updated_at=dt)
+        self.assertEqual(bm.created_at, dt)
+        self.assertEqual(bm.updated_at, dt)
+
+    def test_init_datetime_no_microseconds(self):
+        """Test initialization with timestamps whose microseconds are 0."""
+        dt = datetime(2017, 9, 28, 21, 5, 54)
+        bm = BaseModel(created_at=dt.isoformat(), updated_at=dt.isoformat())
+        self.assertEqual(bm.created_at, dt)
+        self.assertEqual(BaseModel(**bm.to_dict()).updated_at, dt)
+
     def test_str(self):
         """Test __str__ representation."""
         s = self.base.__str__()
@@ -100,6 +116,7 @@ class TestBaseModel(unittest.TestCase):
         self.assertIn("'created_at': {}".format(repr(self.base.created_at)), s)
         self.assertIn("'updated_at': {}".format(repr(self.base.updated_at)), s)
 
+    @unittest.skipIf(type(models.storage) == DBStorage, "Testing DBStorage")
     @unittest.skipIf(os.getenv("HBNB_ENV") is not None, "Testing DBStorage")
     def test_save(self):
         """Test save method."""
@@ -121,6 +138,7 @@ class TestBaseModel(unittest.TestCase):
                          base_dict["updated_at"])
         self.assertEqual(base_dict.get("_sa_instance_state", None), None)
 
+    @unittest.skipIf(type(models.storage) == DBStorage, "Testing DBStorage")
     @unittest.skipIf(os.getenv("HBNB_ENV") is not None, "Testing DBStorage")
     def test_delete(self):
         """Test delete method."""
@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/async_db_storage.py."""
+import asyncio
+import os
+import pep8
+import unittest
+from models.engine.async_db_storage import AsyncDBStorage
+from models.base_model import BaseModel
+from models.city import City
+from models.state import State
+
+try:
+    import aiosqlite
+    import greenlet
+except ImportError:
+    aiosqlite = None
+
+
+@unittest.skipIf(aiosqlite is None, "aiosqlite is not installed")
+class TestAsyncDBStorage(unittest.IsolatedAsyncioTestCase):
+    """Unittests for testing the AsyncDBStorage class."""
+
+    async def asyncSetUp(self):
+        """AsyncDBStorage testing setup.
+
+        Create a storage on a SQLite file holding a State and a City.
+        The setup runs in a task of its own, whose session is closed.
+        """
+        self.storage = AsyncDBStorage("sqlite+aiosqlite:///test_async.db")
+        await self.storage.reload()
+        self.state = State(name="California")
+        self.city = City(name="San_Jose", state_id=self.state.id)
+        await self.storage.new(self.state)
+        await self.storage.new(self.city)
+        await self.storage.save()
+        await self.storage.close()
+
+    async def asyncTearDown(self):
+        """AsyncDBStorage testing teardown.
+
+        Close the storage and delete the SQLite file.
+        """
+        await self.storage.close()
+        await self.storage.dispose()
+        try:
+            os.remove("test_async.db")
+        except IOError:
+            pass
+
+    def test_pep8(self):
+        """Test pep8 styling."""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/async_db_storage.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_docstrings(self):
+        """Check for docstrings."""
+        self.assertIsNotNone(AsyncDBStorage.__doc__)
+        self.assertIsNotNone(AsyncDBStorage.all.__doc__)
+        self.assertIsNotNone(AsyncDBStorage.get.__doc__)
+        self.assertIsNotNone(AsyncDBStorage.count.__doc__)
+        self.assertIsNotNone(AsyncDBStorage.new.__doc__)
+        self.assertIsNotNone(AsyncDBStorage.save.__doc__)
+        self.assertIsNotNone(AsyncDBStorage.delete.__doc__)
+        self.assertIsNotNone(AsyncDBStorage.reload.__doc__)
+        self.assertIsNotNone(AsyncDBStorage.close.__doc__)
+        self.assertIsNotNone(AsyncDBStorage.dispose.__doc__)
+
+    async def test_all(self):
+        """Test all method, with and without a class."""
+        objs = await self.storage.all()
+        self.assertEqual({"State." + self.state.id, "City." + self.city.id},
+                         set(objs))
+        objs = await self.storage.all("State")
+        self.assertEqual(["State." + self.state.id], list(objs))
+        with self.assertRaises(ValueError):
+            await self.storage.all(State, load=["governor"])
+
+    async def test_get(self):
+        """Test get method."""
+        state = await self.storage.get(State, self.state.id)
+        self.assertEqual(self.state.name, state.name)
+        self.assertIsNot(self.state, state)
+        self.assertIs(state, await self.storage.get("State", state.id))
+        self.assertIsNone(await self.storage.get("City", self.state.id))
+        self.assertIsNone(await self.storage.get(BaseModel, "id"))
+
+    async def test_count(self):
+        """Test count method."""
+        self.assertEqual(2, await self.storage.count())
+        self.assertEqual(1, await self.storage.count("City"))
+        self.assertEqual(0, await self.storage.count(BaseModel))
+
+    async def test_delete(self):
+        """Test delete and save methods."""
+        await self.storage.delete(await self.storage.get(City,
+                                                         self.city.id))
+        await self.storage.delete(None)
+        await self.storage.save()
+        self.assertIsNone(await self.storage.get(City, self.city.id))
+        self.assertEqual(1, await self.storage.count())
+
+    async def test_tasks(self):
+        """Test concurrent tasks work in sessions of their own."""
+        async def task(i):
+            state = await self.storage.get(State, self.state.id)
+            await self.storage.new(City(name="City_{}".format(i),
+                                        state_id=state.id))
+            objs = await self.storage.all(City)
+            await self.storage.close()
+            return state, len(objs)
+
+        results = await asyncio.gather(*(task(i) for i in range(50)))
+        self.assertEqual(50, len({id(state) for state, n in results}))
+        self.assertEqual({2}, {n for state, n in results})
+        self.assertEqual(1, await self.storage.count(City))
+
+
+if __name__ == "__main__":
+    unittest.main()
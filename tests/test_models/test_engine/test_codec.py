@@ -0,0 +1,273 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/codec.py."""
+import io
+import os
+import json
+import pep8
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from models.engine import codec
+from models.engine.codec import BinaryCodec
+from models.engine.codec import JSONCodec
+from models.engine.codec import ModelCodec
+from models.base_model import Base
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.state import State
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+
+class TestCodec(unittest.TestCase):
+    """Unittests for testing the FileStorage codecs."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Codec testing setup.
+
+        Creates objects covering every kind of value a codec stores.
+        """
+        cls.place = Place(name="Loft", city_id="c1", user_id="u1",
+                          number_rooms=3, latitude=37.77, description=None)
+        cls.place.tags = ["wifi", {"floor": 2}]
+        cls.place.pets = False
+        cls.place.huge = 1 << 70
+        cls.state = State(name="Calé")
+
+    @classmethod
+    def tearDownClass(cls):
+        """Codec testing teardown.
+
+        Delete created files and the test instances.
+        """
+        for name in ("test_codec.json", "test_codec.bin"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        del cls.place
+        del cls.state
+
+    def test_pep8(self):
+        """Test pep8 styling."""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/codec.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_docstrings(self):
+        """Check for docstrings."""
+        self.assertIsNotNone(codec.__doc__)
+        self.assertIsNotNone(codec.get.__doc__)
+        self.assertIsNotNone(codec.convert.__doc__)
+        self.assertIsNotNone(JSONCodec.__doc__)
+        self.assertIsNotNone(BinaryCodec.__doc__)
+        self.assertIsNotNone(BinaryCodec.dump.__doc__)
+        self.assertIsNotNone(BinaryCodec.load.__doc__)
+        self.assertIsNotNone(codec.model.__doc__)
+        self.assertIsNotNone(ModelCodec.__doc__)
+        self.assertIsNotNone(ModelCodec.to_dict.__doc__)
+        self.assertIsNotNone(ModelCodec.from_dict.__doc__)
+        self.assertIsNotNone(ModelCodec.coerce.__doc__)
+        self.assertIsNotNone(ModelCodec.value.__doc__)
+
+    def test_get(self):
+        """Test codec lookup by name."""
+        self.assertIsInstance(codec.get("json"), JSONCodec)
+        self.assertIsInstance(codec.get("binary"), BinaryCodec)
+        with self.assertRaises(ValueError):
+            codec.get("xml")
+
+    def dump_load(self, c):
+        """Return what c reads back after dumping the test objects."""
+        items = [("Place." + self.place.id, c.encode(self.place)),
+                 ("State." + self.state.id, c.encode(self.state))]
+        f = io.BytesIO() if c.binary else io.StringIO()
+        c.dump(f, items)
+        f.seek(0)
+        return f, list(c.load(f))
+
+    def test_json_roundtrip(self):
+        """Test that JSON payloads are the objects' to_dict()."""
+        c = JSONCodec()
+        f, out = self.dump_load(c)
+        self.assertEqual(self.place.to_dict(), out[0][2])
+        self.assertEqual(self.state.to_dict(), json.loads(out[1][1]))
+        self.assertEqual(json.loads(f.getvalue()),
+                         {k: o for k, p, o in out})
+
+    def test_binary_roundtrip(self):
+        """Test that binary records match the objects' attributes."""
+        c = BinaryCodec()
+        f, out = self.dump_load(c)
+        key, payload, record = out[0]
+        self.assertEqual("Place." + self.place.id, key)
+        self.assertEqual(c.encode(self.place), payload)
+        self.assertEqual("Place", record.pop("__class__"))
+        expected = self.place.__dict__.copy()
+        expected.pop("_sa_instance_state")
+        self.assertEqual(expected, record)
+        self.assertEqual(datetime, type(record["created_at"]))
+        self.assertEqual(self.state.name, out[1][2]["name"])
+
+    def test_binary_smaller(self):
+        """Test that records do not repeat key names or ISO strings."""
+        c = BinaryCodec()
+        payload = c.encode(self.state)
+        self.assertNotIn(b"created_at", payload)
+        self.assertLess(len(payload), len(JSONCodec().encode(self.state)))
+
+    def test_binary_schema_change(self):
+        """Test reading a file written with another field schema."""
+        c = BinaryCodec()
+        f, out = self.dump_load(c)
+        other = BinaryCodec()
+        other.schemas["State"] = ["id", "name"]
+        f.seek(0)
+        records = {k: (p, o) for k, p, o in other.load(f)}
+        payload, record = records["State." + self.state.id]
+        self.assertEqual(out[1][2], record)
+        self.assertEqual(record, other.record(payload))
+
+    def test_binary_truncated(self):
+        """Test that a truncated binary file raises ValueError."""
+        c = BinaryCodec()
+        f, out = self.dump_load(c)
+        for data in (b"", b"HBNB\x01", f.getvalue()[:40]):
+            with self.assertRaises(ValueError):
+                list(c.load(io.BytesIO(data)))
+
+    def test_to_json(self):
+        """Test the JSON text written to the journal for a payload."""
+        c = BinaryCodec()
+        self.assertEqual(self.place.to_dict(),
+                         json.loads(c.to_json(c.encode(self.place))))
+
+    def test_convert(self):
+        """Test converting a snapshot between JSON and binary."""
+        c = JSONCodec()
+        with open("test_codec.json", "w", encoding="utf-8") as f:
+            c.dump(f, [("State." + self.state.id, c.encode(self.state))])
+        codec.convert("test_codec.json", "test_codec.bin")
+        os.remove("test_codec.json")
+        codec.convert("test_codec.bin", "test_codec.json")
+        with open("test_codec.json", "r", encoding="utf-8") as f:
+            self.assertEqual({"State." + self.state.id: self.state.to_dict()},
+                             json.load(f))
+
+    def test_model(self):
+        """Test that model() builds one ModelCodec per class."""
+        self.assertIs(codec.model(Place), codec.model(Place))
+        self.assertEqual(Place, codec.model(Place).cls)
+        self.assertIn("price_by_night", codec.model(Place).fields)
+        self.assertIn("price_by_night", codec.model(Place).indexed)
+        self.assertNotIn("city_id", codec.model(Place).indexed)
+
+    def test_model_fresh_process(self):
+        """Test objects reloaded before any model is built are usable."""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        record = self.state.to_dict()
+        script = "from models import storage\n" \
+            "obj = storage.all()['State.{}']\n" \
+            "print(obj.id, obj.name, obj.to_dict() == {})\n".format(
+                record["id"], record)
+        env = dict(os.environ, PYTHONPATH=root)
+        env.pop("HBNB_TYPE_STORAGE", None)
+        with tempfile.TemporaryDirectory() as cwd:
+            with open(os.path.join(cwd, "file.json"), "w",
+                      encoding="utf-8") as f:
+                json.dump({"State." + record["id"]: record}, f)
+            out = subprocess.run([sys.executable, "-c", script], cwd=cwd,
+                                 env=env, capture_output=True, text=True)
+        self.assertEqual("", out.stderr)
+        expected = "{} {} True\n".format(record["id"], record["name"])
+        self.assertEqual(expected, out.stdout)
+
+    def test_model_to_dict(self):
+        """Test that records are sorted and keep non-column attributes."""
+        record = codec.model(Place).to_dict(self.place)
+        self.assertEqual(sorted(record), list(record))
+        self.assertEqual(["wifi", {"floor": 2}], record["tags"])
+        self.assertEqual(self.place.created_at.isoformat(),
+                         record["created_at"])
+        self.assertNotIn("_sa_instance_state", record)
+        self.assertEqual(json.dumps(record, sort_keys=True),
+                         JSONCodec().encode(self.place))
+
+    def test_model_to_dict_expired(self):
+        """Test records of objects a database session expired."""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            state = State(name="Nevada")
+            record = state.to_dict()
+            session.add(state)
+            session.commit()
+            self.assertNotIn("created_at", state.__dict__)
+            self.assertEqual(record, codec.model(State).to_dict(state))
+        engine.dispose()
+
+    def test_model_from_dict(self):
+        """Test building objects from records."""
+        record = self.place.to_dict()
+        record["updated_at"] = "2017-09-28T21:05:54"
+        place = codec.model(Place).from_dict(record)
+        self.assertIsInstance(place, Place)
+        self.assertEqual(datetime(2017, 9, 28, 21, 5, 54), place.updated_at)
+        self.assertEqual(self.place.created_at, place.created_at)
+        self.assertEqual(self.place.tags, place.tags)
+        self.assertEqual("Place", record["__class__"])
+        place.name = "Studio"
+        self.assertEqual("Studio", place.to_dict()["name"])
+        state = codec.model(State).from_dict({"name": "Utah"})
+        self.assertEqual("Utah", state.name)
+        self.assertEqual(datetime, type(state.created_at))
+
+    def test_model_coerce(self):
+        """Test values are converted to the type of their column."""
+        model = codec.model(Place)
+        self.assertEqual(12, model.coerce("max_guest", "12"))
+        self.assertEqual(2.5, model.coerce("latitude", "2.5"))
+        self.assertEqual(3, model.coerce("latitude", 3))
+        self.assertEqual("5", model.coerce("name", 5))
+        self.assertEqual(datetime(2017, 9, 28),
+                         model.coerce("created_at", "2017-09-28T00:00:00"))
+        self.assertIsNone(model.coerce("max_guest", None))
+        self.assertEqual(["wifi"], model.coerce("tags", ["wifi"]))
+        for value in ("abc", [1], True):
+            with self.assertRaises(ValueError):
+                model.coerce("max_guest", value)
+        self.assertEqual(12, model.value({"max_guest": "12"}, "max_guest"))
+        self.assertIsNone(model.value({"max_guest": "abc"}, "max_guest"))
+        self.assertIsNone(model.value(self.place, "max_guest"))
+
+    def test_file_storage_binary(self):
+        """Test saving and reloading FileStorage with the binary codec."""
+        store = FileStorage._FileStorage__objects
+        persisted = FileStorage._FileStorage__persisted
+        storage = FileStorage()
+        FileStorage._FileStorage__codec = codec.get("binary")
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__persisted = {}
+        try:
+            storage.new(self.place)
+            storage.new(self.state)
+            storage.save()
+            self.assertTrue(os.path.isfile("file.bin"))
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            place = storage.all(Place)["Place." + self.place.id]
+            self.assertIsNot(self.place, place)
+            self.assertEqual(self.place.to_dict(), place.to_dict())
+        finally:
+            FileStorage._FileStorage__codec = codec.get("json")
+            FileStorage._FileStorage__objects = store
+            FileStorage._FileStorage__persisted = persisted
+            os.remove("file.bin")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,6 +14,7 @@ from models.place import Place
 from models.review import Review
 from models.engine.db_storage import DBStorage
 from models.engine.file_storage import FileStorage
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.session import Session
 from sqlalchemy.engine.base import Engine
@@ -84,6 +85,16 @@ class TestDBStorage(unittest.TestCase):
         self.assertIsNotNone(DBStorage.__init__.__doc__)
         self.assertIsNotNone(DBStorage.all.__doc__)
         self.assertIsNotNone(DBStorage.new.__doc__)
+        self.assertIsNotNone(DBStorage.new_many.__doc__)
+        self.assertIsNotNone(DBStorage.iter.__doc__)
+        self.assertIsNotNone(DBStorage.get.__doc__)
+        self.assertIsNotNone(DBStorage.count.__doc__)
+        self.assertIsNotNone(DBStorage.filter.__doc__)
+        self.assertIsNotNone(DBStorage.explain.__doc__)
+        self.assertIsNotNone(DBStorage.near.__doc__)
+        self.assertIsNotNone(DBStorage.within.__doc__)
+        self.assertIsNotNone(DBStorage.page.__doc__)
+        self.assertIsNotNone(DBStorage.bulk_save.__doc__)
         self.assertIsNotNone(DBStorage.save.__doc__)
         self.assertIsNotNone(DBStorage.delete.__doc__)
         self.assertIsNotNone(DBStorage.reload.__doc__)
@@ -127,6 +138,129 @@ class TestDBStorage(unittest.TestCase):
         self.assertEqual(len(obj), 1)
         self.assertEqual(self.state, list(obj.values())[0])
 
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_all_load(self):
+        """Test all and page methods with eagerly loaded relationships."""
+        session = self.storage._DBStorage__session
+        engine = self.storage._DBStorage__engine
+        ids = (self.place.id, self.user.id, self.city.id)
+        queries = []
+
+        def count(*args):
+            queries.append(args)
+        self.storage._DBStorage__session = sessionmaker(bind=engine)()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            places = self.storage.all(
+                Place, load=["user", "amenities", "reviews.user"])
+            page, cursor = self.storage.page(State, load=["cities"])
+            loaded = len(queries)
+            place = places["Place." + ids[0]]
+            self.assertEqual(ids[1], place.user.id)
+            self.assertEqual([], place.amenities)
+            self.assertEqual([ids[1]], [r.user.id for r in place.reviews])
+            self.assertEqual([ids[2]], [c.id for c in page[0].cities])
+            self.assertEqual(loaded, len(queries))
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+            self.storage._DBStorage__session.close()
+            self.storage._DBStorage__session = session
+        with self.assertRaises(ValueError):
+            self.storage.all(Place, load=["reviews.owner"])
+
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_iter(self):
+        """Test iter method."""
+        objs = list(self.storage.iter(batch_size=2))
+        self.assertEqual(6, len(objs))
+        self.assertIn(self.state, objs)
+        self.assertEqual([self.city], list(self.storage.iter("City")))
+
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_get(self):
+        """Test get method."""
+        self.assertIs(self.state, self.storage.get(State, self.state.id))
+        self.assertIs(self.city, self.storage.get("City", self.city.id))
+        self.assertIsNone(self.storage.get(State, "missing"))
+        self.assertIsNone(self.storage.get("BaseModel", self.state.id))
+
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_count(self):
+        """Test count method."""
+        self.assertEqual(6, self.storage.count())
+        self.assertEqual(1, self.storage.count(State))
+        self.assertEqual(1, self.storage.count("Place"))
+        self.assertEqual(0, self.storage.count("BaseModel"))
+
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_filter(self):
+        """Test filter method."""
+        self.assertEqual([self.place], self.storage.filter(
+            Place, city_id=self.city.id, price_by_night__lte=200,
+            max_guest__gte=0))
+        self.assertEqual([], self.storage.filter("Place", max_guest__gt=0))
+        self.assertEqual([self.place], self.storage.filter(
+            Place, order_by="-price_by_night", limit=1))
+        with self.assertRaises(ValueError):
+            self.storage.filter(Place, rooms=2)
+
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_explain(self):
+        """Test explain method."""
+        plan = self.storage.explain(Place, city_id=self.city.id,
+                                    price_by_night__lte=200)
+        self.assertEqual("sql", plan["path"])
+        self.assertIn("WHERE places.city_id = ", plan["sql"])
+        self.assertNotEqual([], plan["plan"])
+
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_near(self):
+        """Test near and within methods."""
+        spots = [(37.7749, -122.4194), (37.8044, -122.2712),
+                 (34.0522, -118.2437)]
+        places = [Place(city_id=self.city.id, user_id=self.user.id,
+                        name="Geo", latitude=lat, longitude=lon)
+                  for lat, lon in spots]
+        self.storage.new_many(places)
+        self.assertEqual(places[:2], self.storage.near(
+            Place, 37.78, -122.41, 20))
+        self.assertEqual(places[:1], self.storage.near(
+            "Place", 37.78, -122.41, 20, limit=1))
+        self.assertCountEqual(places[:2], self.storage.within(
+            Place, 37, -123, 38, -122))
+        with self.assertRaises(ValueError):
+            self.storage.near(State, 37.78, -122.41, 20)
+        for pl in places:
+            self.storage.delete(pl)
+        self.storage.save()
+
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_page(self):
+        """Test page method."""
+        states = [State(name="Page_{}".format(i % 2)) for i in range(3)]
+        self.storage.new_many(states)
+        expected = sorted(states + [self.state],
+                          key=lambda st: (st.name, st.id))
+        page, cursor = self.storage.page(State, limit=2)
+        self.assertEqual(expected[:2], page)
+        self.assertEqual((page[-1].name, page[-1].id), cursor)
+        page, cursor = self.storage.page("State", after=cursor, limit=2)
+        self.assertEqual(expected[2:], page)
+        self.assertIsNone(cursor)
+        with self.assertRaises(ValueError):
+            self.storage.page(State, order_by="cities")
+        for st in states:
+            self.storage.delete(st)
+        self.storage.save()
+
     @unittest.skipIf(type(models.storage) == FileStorage,
                      "Testing FileStorage")
     def test_new(self):
@@ -136,6 +270,39 @@ class TestDBStorage(unittest.TestCase):
         store = list(self.storage._DBStorage__session.new)
         self.assertIn(st, store)
 
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_new_many(self):
+        """Test new_many method."""
+        states = [State(name="State_{}".format(i)) for i in range(5)]
+        self.storage.new_many(iter(states), chunk_size=2)
+        for st in states:
+            self.assertNotIn(st, self.storage._DBStorage__session.new)
+            self.assertIn("State." + st.id, self.storage.all(State))
+            self.storage.delete(st)
+        self.storage.save()
+
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_bulk_save(self):
+        """Test bulk_save method."""
+        record = State(name="Maine").to_dict()
+        self.storage.bulk_save("State", [record, {"name": "Vermont"}],
+                               chunk_size=1)
+        db = MySQLdb.connect(user="hbnb_test",
+                             passwd="hbnb_test_pwd",
+                             db="hbnb_test_db")
+        cursor = db.cursor()
+        cursor.execute("SELECT id FROM states WHERE name IN "
+                       "('Maine', 'Vermont') ORDER BY name")
+        query = cursor.fetchall()
+        self.assertEqual(2, len(query))
+        self.assertEqual(record["id"], query[0][0])
+        cursor.execute("DELETE FROM states WHERE name IN "
+                       "('Maine', 'Vermont')")
+        db.commit()
+        cursor.close()
+
     @unittest.skipIf(type(models.storage) == FileStorage,
                      "Testing FileStorage")
     def test_save(self):
@@ -172,6 +339,17 @@ class TestDBStorage(unittest.TestCase):
         except Exception:
             self.fail
 
+    @unittest.skipIf(type(models.storage) == FileStorage,
+                     "Testing FileStorage")
+    def test_pool_metrics(self):
+        """Test pool_metrics method."""
+        checkouts = self.storage.pool_metrics()["checkouts"]
+        self.storage.count(State)
+        metrics = self.storage.pool_metrics()
+        self.assertGreaterEqual(metrics["checkouts"], checkouts)
+        self.assertEqual(int(getenv("HBNB_MYSQL_POOL_SIZE", 5)),
+                         metrics["size"])
+
     @unittest.skipIf(type(models.storage) == FileStorage,
                      "Testing FileStorage")
     def test_reload(self):
@@ -1,9 +1,14 @@
 #!/usr/bin/python3
 """Defines unnittests for models/engine/file_storage.py."""
+import io
 import os
 import json
 import pep8
+import shutil
+import threading
 import unittest
+import models
+from unittest.mock import patch
 from datetime import datetime
 from models.base_model import BaseModel
 from models.user import User
@@ -12,7 +17,10 @@ from models.city import City
 from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
+from models.engine import codec
+from models.engine.db_storage import DBStorage
 from models.engine.file_storage import FileStorage
+from models.engine.file_storage import _Record
 
 
 class TestFileStorage(unittest.TestCase):
@@ -65,6 +73,11 @@ class TestFileStorage(unittest.TestCase):
             os.remove("file.json")
         except IOError:
             pass
+        try:
+            os.remove("file.json.log")
+        except IOError:
+            pass
+        shutil.rmtree("file.json.d", ignore_errors=True)
         try:
             os.rename("tmp", "file.json")
         except IOError:
@@ -88,6 +101,12 @@ class TestFileStorage(unittest.TestCase):
         """Check for docstrings."""
         self.assertIsNotNone(FileStorage.__doc__)
         self.assertIsNotNone(FileStorage.all.__doc__)
+        self.assertIsNotNone(FileStorage.get.__doc__)
+        self.assertIsNotNone(FileStorage.count.__doc__)
+        self.assertIsNotNone(FileStorage.filter.__doc__)
+        self.assertIsNotNone(FileStorage.explain.__doc__)
+        self.assertIsNotNone(FileStorage.near.__doc__)
+        self.assertIsNotNone(FileStorage.within.__doc__)
         self.assertIsNotNone(FileStorage.new.__doc__)
         self.assertIsNotNone(FileStorage.reload.__doc__)
         self.assertIsNotNone(FileStorage.delete.__doc__)
@@ -122,6 +141,31 @@ class TestFileStorage(unittest.TestCase):
         self.assertEqual(len(obj), 1)
         self.assertEqual(self.base, list(obj.values())[0])
 
+    def test_all_load(self):
+        """Test all method ignores the relationships to load."""
+        self.assertEqual(self.storage.all(BaseModel),
+                         self.storage.all(BaseModel, load=["cities"]))
+
+    def test_all_cls_name(self):
+        """Test all method with a class name string."""
+        obj = self.storage.all("State")
+        self.assertEqual(type(obj), dict)
+        self.assertIn("State." + self.state.id, obj)
+        self.assertEqual(obj, self.storage.all(State))
+        self.assertEqual({}, self.storage.all("NotAClass"))
+
+    def test_all_cls_index(self):
+        """Test that all(cls) follows new, delete and direct inserts."""
+        st = State()
+        self.storage.new(st)
+        self.assertIn("State." + st.id, self.storage.all(State))
+        self.storage.delete(st)
+        self.assertNotIn("State." + st.id, self.storage.all(State))
+        FileStorage._FileStorage__objects["State." + st.id] = st
+        self.assertIn("State." + st.id, self.storage.all(State))
+        del FileStorage._FileStorage__objects["State." + st.id]
+        self.assertNotIn("State." + st.id, self.storage.all(State))
+
     def test_new(self):
         """Test new method."""
         bm = BaseModel()
@@ -153,6 +197,656 @@ class TestFileStorage(unittest.TestCase):
         store = FileStorage._FileStorage__objects
         self.assertIn("BaseModel." + bm.id, store)
 
+    def test_reload_lazy(self):
+        """Test that reload builds objects only when they are reached."""
+        store = FileStorage._FileStorage__objects
+        self.storage.save()
+
+        def built():
+            return {k for k, v in FileStorage._FileStorage__objects.items()
+                    if type(v) != _Record}
+        try:
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            self.assertEqual(store.keys(),
+                             FileStorage._FileStorage__objects.keys())
+            self.assertEqual(set(), built())
+            st = self.storage.get(State, self.state.id)
+            self.assertEqual(self.state.to_dict(), st.to_dict())
+            self.assertEqual({"State." + self.state.id}, built())
+            self.assertIs(st, self.storage.all(State)[
+                "State." + self.state.id])
+            self.assertEqual(1, len(self.storage.all(City)))
+            self.assertEqual(2, len(built()))
+            self.storage.save()
+            self.assertEqual(2, len(built()))
+            self.assertEqual(len(store), len(self.storage.all()))
+            self.assertEqual(store.keys(), built())
+            self.assertIsNone(self.storage.get(State, "missing"))
+        finally:
+            FileStorage._FileStorage__objects = store
+
+    def test_reload_registry(self):
+        """Test that reload resolves class names without eval."""
+        self.storage.save()
+        with patch("builtins.eval", side_effect=AssertionError):
+            FileStorage._FileStorage__objects.clear()
+            self.storage.reload()
+            objs = self.storage.all()
+        self.assertIn(type(objs["State." + self.state.id]),
+                      (State, codec.model(State).row))
+        self.assertEqual(models.classes["State"], State)
+        for obj in (self.base, self.user, self.state, self.place,
+                    self.city, self.amenity, self.review):
+            self.storage.new(obj)
+        self.storage.save()
+
+    def test_count(self):
+        """Test counting objects without building them."""
+        self.assertEqual(7, self.storage.count())
+        self.assertEqual(1, self.storage.count(State))
+        self.assertEqual(1, self.storage.count("Review"))
+        self.assertEqual(0, self.storage.count("Missing"))
+        st = State(name="Ohio")
+        self.storage.new(st)
+        self.assertEqual(2, self.storage.count(State))
+        self.storage.delete(st)
+        self.assertEqual(1, self.storage.count(State))
+        store = FileStorage._FileStorage__objects
+        self.storage.save()
+        try:
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            self.assertEqual(1, self.storage.count(State))
+            self.assertEqual(7, self.storage.count())
+            self.assertFalse(any(type(v) != _Record for v in
+                                 FileStorage._FileStorage__objects.values()))
+        finally:
+            FileStorage._FileStorage__objects = store
+
+    @unittest.skipIf(type(models.storage) == DBStorage,
+                     "Testing DBStorage")
+    def test_related(self):
+        """Test the reverse foreign key index behind relationships."""
+        st = State(name="Iowa")
+        other = State(name="Idaho")
+        city = City(name="Ames", state_id=st.id)
+        self.storage.new(city)
+        try:
+            self.assertEqual([city],
+                             self.storage.related(City, "state_id", st.id))
+            self.assertEqual([city], st.cities)
+            city.state_id = other.id
+            self.storage.new(city)
+            self.assertEqual([], st.cities)
+            self.assertEqual([city], other.cities)
+            self.assertEqual([city],
+                             self.storage.related("City", "name", "Ames"))
+            self.storage.save()
+            FileStorage._FileStorage__objects.clear()
+            self.storage.reload()
+            self.assertEqual([], self.storage.related(City, "state_id",
+                                                      st.id))
+            cities = other.cities
+            self.assertEqual([city.id], [c.id for c in cities])
+            self.storage.delete(cities[0])
+            self.assertEqual([], other.cities)
+        finally:
+            self.storage.delete(city)
+            for obj in (self.base, self.user, self.state, self.place,
+                        self.city, self.amenity, self.review):
+                self.storage.new(obj)
+            self.storage.save()
+
+    def test_page(self):
+        """Test keyset pagination over the sorted index."""
+        places = [Place(name="Page {}".format(i % 3)) for i in range(7)]
+        for pl in places:
+            self.storage.new(pl)
+        expected = sorted(places, key=lambda pl: (pl.name, pl.id))
+        try:
+            page, cursor = self.storage.page(Place, limit=3)
+            self.assertEqual(expected[:3], page)
+            self.assertEqual((page[-1].name, page[-1].id), cursor)
+            page, cursor = self.storage.page("Place", after=cursor, limit=3)
+            self.assertEqual(expected[3:6], page)
+            page, cursor = self.storage.page(Place, after=cursor, limit=3)
+            self.assertEqual(expected[6:], page)
+            self.assertIsNone(cursor)
+            moved = expected[0]
+            moved.name = "Page 9"
+            self.storage.new(moved)
+            self.storage.delete(expected[1])
+            page, cursor = self.storage.page(Place, limit=10)
+            self.assertEqual(expected[2:] + [moved], page)
+            self.assertIsNone(cursor)
+            page, cursor = self.storage.page(Place, order_by="created_at",
+                                             limit=1)
+            first = min(self.storage.all(Place).values(),
+                        key=lambda pl: (pl.created_at, pl.id))
+            self.assertEqual([first], page)
+            with self.assertRaises(ValueError):
+                self.storage.page(Place, order_by="reviews")
+        finally:
+            for pl in places:
+                self.storage.delete(pl)
+
+    def test_page_reload(self):
+        """Test pages only build the objects they hold after reload()."""
+        store = FileStorage._FileStorage__objects
+        states = [State(name="Paged {}".format(i)) for i in range(4)]
+        try:
+            FileStorage._FileStorage__objects = {}
+            for st in states:
+                self.storage.new(st)
+            self.storage.save()
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            page, cursor = self.storage.page(State, limit=2)
+            self.assertEqual([st.id for st in states[:2]],
+                             [st.id for st in page])
+            built = [v for v in FileStorage._FileStorage__objects.values()
+                     if type(v) != _Record]
+            self.assertCountEqual(page, built)
+            page, cursor = self.storage.page(State, after=cursor, limit=2)
+            self.assertEqual([st.id for st in states[2:]],
+                             [st.id for st in page])
+            self.assertIsNone(cursor)
+        finally:
+            FileStorage._FileStorage__objects = store
+            self.storage.save()
+
+    def test_filter(self):
+        """Test filtering objects on lookups."""
+        city = City(name="Reno")
+        places = [Place(name="Spot {}".format(i), city_id=city.id,
+                        price_by_night=50 * i, max_guest=i)
+                  for i in range(6)]
+        for pl in places:
+            self.storage.new(pl)
+        try:
+            self.assertEqual(places[2:5], self.storage.filter(
+                Place, city_id=city.id, price_by_night__lte=200,
+                max_guest__gte=2))
+            self.assertEqual([places[0]], self.storage.filter(
+                "Place", price_by_night=0, name__in=["Spot 0", "Spot 1"]))
+            self.assertEqual([self.place],
+                             self.storage.filter(Place, name=None))
+            self.assertEqual(6, len(self.storage.filter(Place,
+                                                        name__ne=None)))
+            self.assertEqual([], self.storage.filter(Place, city_id="none"))
+            with self.assertRaises(ValueError):
+                self.storage.filter(Place, rooms=2)
+        finally:
+            for pl in places:
+                self.storage.delete(pl)
+
+    def test_filter_types(self):
+        """Test values of the wrong type are converted or left out."""
+        places = [Place(name="Spot {}".format(i), max_guest=i)
+                  for i in range(4)]
+        for pl in places:
+            self.storage.new(pl)
+        try:
+            self.storage.filter(Place, max_guest__gte=1)
+            places[1].max_guest = "abc"
+            self.storage.new(places[1])
+            places[2].max_guest = "12"
+            self.storage.new(places[2])
+            self.assertIs(places[1], self.storage.all()[
+                "Place." + places[1].id])
+            self.assertEqual(places[2:], self.storage.filter(
+                Place, max_guest__gte="3", order_by="-max_guest"))
+            self.assertEqual([places[0], places[3], places[2]],
+                             self.storage.page(Place, "max_guest")[0][:3])
+            with self.assertRaises(ValueError):
+                self.storage.filter(Place, max_guest__gte="abc")
+        finally:
+            for pl in places:
+                self.storage.delete(pl)
+
+    def test_filter_reload(self):
+        """Test filtering builds only the matching objects after reload()."""
+        store = FileStorage._FileStorage__objects
+        places = [Place(name="Spot {}".format(i), price_by_night=50 * i)
+                  for i in range(6)]
+        try:
+            FileStorage._FileStorage__objects = {}
+            for pl in places:
+                self.storage.new(pl)
+            self.storage.save()
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            found = self.storage.filter(Place, price_by_night__gt=150,
+                                        name__ne="Spot 5")
+            self.assertEqual([pl.id for pl in places[4:5]],
+                             [pl.id for pl in found])
+            built = [v for v in FileStorage._FileStorage__objects.values()
+                     if type(v) != _Record]
+            self.assertEqual(found, built)
+        finally:
+            FileStorage._FileStorage__objects = store
+            self.storage.save()
+
+    def test_explain(self):
+        """Test explain() reports the path filter() takes."""
+        city = City(name="Reno")
+        places = [Place(name="Spot {}".format(i), city_id=city.id,
+                        user_id="u{}".format(i % 2), number_bathrooms=1,
+                        price_by_night=50 * i) for i in range(6)]
+        for pl in places:
+            self.storage.new(pl)
+        try:
+            plan = self.storage.explain(Place, number_bathrooms=1)
+            self.assertEqual({"class": "Place", "path": "scan",
+                              "index": None, "candidates": 7,
+                              "ordered": False,
+                              "filters": ["number_bathrooms eq 1"]}, plan)
+            plan = self.storage.explain(Place, city_id=city.id,
+                                        number_bathrooms=1)
+            self.assertEqual("index", plan["path"])
+            self.assertEqual("city_id", plan["index"])
+            self.assertEqual(6, plan["candidates"])
+            plan = self.storage.explain(Place, city_id=city.id,
+                                        price_by_night__lte=100)
+            self.assertEqual("price_by_night", plan["index"])
+            self.assertEqual(3, plan["candidates"])
+            self.assertEqual(places[:3], self.storage.filter(
+                Place, city_id=city.id, price_by_night__lte=100))
+            self.assertEqual("scan", self.storage.explain(
+                Place, user_id="u1")["path"])
+            self.storage.page(Place, order_by="user_id")
+            plan = self.storage.explain(Place, user_id="u1")
+            self.assertEqual("user_id", plan["index"])
+            self.assertEqual(3, plan["candidates"])
+        finally:
+            for pl in places:
+                self.storage.delete(pl)
+
+    def test_filter_order(self):
+        """Test top-K queries over the sorted indexes."""
+        city = City(name="Reno")
+        places = [Place(name="Spot {}".format(i), city_id=city.id,
+                        price_by_night=(7 * i) % 10, number_bathrooms=i % 3)
+                  for i in range(10)]
+        for pl in places:
+            self.storage.new(pl)
+        by_price = sorted(places, key=lambda pl: (pl.price_by_night, pl.id))
+        try:
+            plan = self.storage.explain(Place, order_by="-price_by_night",
+                                        number_bathrooms=1)
+            self.assertTrue(plan["ordered"])
+            self.assertEqual("price_by_night", plan["index"])
+            self.assertEqual(by_price[:3], self.storage.filter(
+                Place, order_by="price_by_night", limit=3))
+            top = [pl for pl in reversed(by_price)
+                   if pl.number_bathrooms == 1][:2]
+            self.assertEqual(top, self.storage.filter(
+                Place, order_by="-price_by_night", limit=2,
+                number_bathrooms=1))
+            self.assertEqual("city_id", self.storage.explain(
+                Place, order_by="price_by_night", city_id=city.id)["index"])
+            self.assertEqual(by_price[:2], self.storage.filter(
+                Place, order_by="price_by_night", limit=2, city_id=city.id))
+            plan = self.storage.explain(Place, order_by="price_by_night",
+                                        price_by_night__gte=3,
+                                        price_by_night__lt=5)
+            self.assertEqual(2, plan["candidates"])
+            self.assertTrue(plan["ordered"])
+            self.assertEqual(by_price[3:5], self.storage.filter(
+                Place, order_by="price_by_night", price_by_night__gte=3,
+                price_by_night__lt=5))
+            places[0].price_by_night = 100
+            self.storage.new(places[0])
+            self.assertEqual([places[0]], self.storage.filter(
+                Place, order_by="-price_by_night", limit=1))
+            self.storage.delete(places[0])
+            self.assertEqual([], self.storage.filter(
+                Place, price_by_night__gt=9))
+            with self.assertRaises(ValueError):
+                self.storage.filter(Place, order_by="-rooms")
+        finally:
+            for pl in places:
+                self.storage.delete(pl)
+
+    def test_near(self):
+        """Test radius and bounding box searches over the grid index."""
+        spots = [(37.7749, -122.4194), (37.8044, -122.2712),
+                 (37.3382, -121.8863), (34.0522, -118.2437)]
+        places = [Place(name="Geo {}".format(i), latitude=lat,
+                        longitude=lon) for i, (lat, lon) in enumerate(spots)]
+        for pl in places:
+            self.storage.new(pl)
+        try:
+            self.assertEqual(places[:2], self.storage.near(
+                Place, 37.78, -122.41, 20))
+            self.assertEqual(places[1:3], self.storage.near(
+                "Place", 37.6, -122.0, 50, limit=2)[::-1])
+            self.assertEqual(places[:3], self.storage.near(
+                Place, 37.78, -122.41, 80))
+            self.assertCountEqual(places[:3], self.storage.within(
+                Place, 37, -123, 38, -121))
+            self.assertEqual(1, len(self.storage.within(
+                Place, 37, -123, 38, -121, limit=1)))
+            places[3].latitude, places[3].longitude = 37.77, -122.43
+            self.storage.new(places[3])
+            self.storage.delete(places[0])
+            self.assertEqual([places[3], places[1]], self.storage.near(
+                Place, 37.7749, -122.4194, 20))
+            with self.assertRaises(ValueError):
+                self.storage.near(State, 37.78, -122.41, 20)
+        finally:
+            for pl in places:
+                self.storage.delete(pl)
+
+    def test_iter(self):
+        """Test iterating over objects without building them all first."""
+        self.assertEqual(list(self.storage.all().values()),
+                         list(self.storage.iter()))
+        self.assertEqual(list(self.storage.all(State).values()),
+                         list(self.storage.iter(State)))
+        self.assertIn(self.city, list(self.storage.iter("City")))
+        store = FileStorage._FileStorage__objects
+        self.storage.save()
+        try:
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            objs = self.storage.iter(batch_size=2)
+            first = next(objs)
+            built = [v for v in FileStorage._FileStorage__objects.values()
+                     if type(v) != _Record]
+            self.assertLessEqual(len(built), 2)
+            self.assertIn(first, built)
+            self.assertEqual(len(store), 1 + len(list(objs)))
+        finally:
+            FileStorage._FileStorage__objects = store
+
+    def test_new_many(self):
+        """Test adding objects in chunks with a single save."""
+        states = [State(name="State {}".format(i)) for i in range(5)]
+        try:
+            with patch.object(FileStorage, "save") as mock:
+                self.storage.new_many(iter(states), chunk_size=2)
+                self.assertEqual(1, mock.call_count)
+            objs = self.storage.all(State)
+            for st in states:
+                self.assertIs(st, objs["State." + st.id])
+        finally:
+            for st in states:
+                self.storage.delete(st)
+
+    def test_bulk_save(self):
+        """Test storing rows of attributes as new objects."""
+        record = State(name="Maine").to_dict()
+        self.storage.bulk_save("State", [record, {"name": "Vermont"}])
+        try:
+            st = self.storage.get(State, record["id"])
+            self.assertEqual(record, st.to_dict())
+            vermont = [o for o in self.storage.all(State).values()
+                       if o.name == "Vermont"]
+            self.assertEqual(1, len(vermont))
+            self.assertEqual(datetime, type(vermont[0].created_at))
+            with open("file.json", "r", encoding="utf-8") as f:
+                self.assertIn("State." + vermont[0].id, json.load(f))
+        finally:
+            self.storage.delete(st)
+            self.storage.delete(vermont[0])
+            self.storage.save()
+
+    def test_save_dirty_only(self):
+        """Test that save only re-serializes objects marked dirty."""
+        st = State(name="Utah")
+        self.storage.new(st)
+        self.storage.save()
+        to_dict = BaseModel.to_dict
+        with patch.object(BaseModel, "to_dict", autospec=True,
+                          side_effect=to_dict) as mock:
+            self.storage.save()
+            self.assertEqual(0, mock.call_count)
+            st.name = "Nevada"
+            self.storage.new(st)
+            self.storage.save()
+            self.assertEqual(1, mock.call_count)
+            self.assertIs(st, mock.call_args[0][0])
+        with open("file.json", "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        self.assertEqual("Nevada", saved["State." + st.id]["name"])
+        self.assertEqual(len(self.storage.all()), len(saved))
+        self.storage.delete(st)
+
+    @unittest.skipIf(type(models.storage) == DBStorage,
+                     "Testing DBStorage")
+    def test_save_in_place(self):
+        """Test that objects modified in place are saved without new()."""
+        st = State(name="Utah")
+        self.storage.new(st)
+        self.storage.save()
+        try:
+            to_dict = BaseModel.to_dict
+            with patch.object(BaseModel, "to_dict", autospec=True,
+                              side_effect=to_dict) as mock:
+                State(name="Ohio").name = "Iowa"
+                self.storage.save()
+                self.assertEqual(0, mock.call_count)
+                st.name = "Nevada"
+                self.storage.save()
+                self.assertEqual(1, mock.call_count)
+            with open("file.json", "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            self.assertEqual("Nevada", saved["State." + st.id]["name"])
+        finally:
+            self.storage.delete(st)
+            self.storage.save()
+
+    def test_save_atomic(self):
+        """Test that a failed save leaves the previous file.json intact."""
+        self.storage.save()
+        with open("file.json", "r", encoding="utf-8") as f:
+            before = f.read()
+        st = State(name="Idaho")
+        self.storage.new(st)
+        with patch("os.fsync", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.storage.save()
+        with open("file.json", "r", encoding="utf-8") as f:
+            self.assertEqual(before, f.read())
+        self.assertEqual([], [n for n in os.listdir(".")
+                              if n.startswith(".file.json.")])
+        self.storage.delete(st)
+        self.storage.save()
+
+    def test_save_group_commit(self):
+        """Test that concurrent saves are merged into fewer writes."""
+        states = [State(name="State_{}".format(i)) for i in range(8)]
+        barrier = threading.Barrier(len(states))
+
+        def save(st):
+            barrier.wait()
+            self.storage.new(st)
+            self.storage.save()
+
+        flush = FileStorage._FileStorage__flush
+        FileStorage._FileStorage__commit_window = 0.2
+        try:
+            with patch.object(FileStorage, "_FileStorage__flush",
+                              autospec=True, side_effect=flush) as mock:
+                threads = [threading.Thread(target=save, args=(st,))
+                           for st in states]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+            self.assertLess(mock.call_count, len(states))
+        finally:
+            FileStorage._FileStorage__commit_window = 0
+        with open("file.json", "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        for st in states:
+            self.assertIn("State." + st.id, saved)
+            self.storage.delete(st)
+        self.storage.save()
+
+    def test_save_shards_class(self):
+        """Test the one-file-per-class layout."""
+        store = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__shards = "class"
+        st = State(name="Ohio")
+        try:
+            self.storage.save()
+            with open("file.json.d/State.json", "r") as f:
+                self.assertIn("State." + self.state.id, json.load(f))
+            with open("file.json.d/User.json", "r") as f:
+                self.assertEqual(["User." + self.user.id], list(json.load(f)))
+            mtime = os.stat("file.json.d/User.json").st_mtime_ns
+            self.storage.new(st)
+            self.storage.save()
+            self.assertEqual(
+                mtime, os.stat("file.json.d/User.json").st_mtime_ns)
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            self.assertEqual(store.keys(),
+                             FileStorage._FileStorage__objects.keys())
+        finally:
+            FileStorage._FileStorage__shards = None
+            FileStorage._FileStorage__objects = store
+            self.storage.delete(st)
+            self.storage.save()
+            shutil.rmtree("file.json.d", ignore_errors=True)
+
+    def test_reload_shards_parallel(self):
+        """Test parsing hash-partitioned shards in worker processes."""
+        store = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__shards = "3"
+        FileStorage._FileStorage__workers = 2
+        try:
+            self.storage.save()
+            names = sorted(os.listdir("file.json.d"))
+            self.assertLessEqual(len(names), 3)
+            self.assertTrue(set(names) <= {"0.json", "1.json", "2.json"})
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            reloaded = self.storage.all()
+            self.assertEqual(store.keys(), reloaded.keys())
+            st = reloaded["State." + self.state.id]
+            self.assertEqual(self.state.created_at, st.created_at)
+            self.assertEqual(self.state.updated_at, st.updated_at)
+        finally:
+            FileStorage._FileStorage__shards = None
+            FileStorage._FileStorage__workers = os.cpu_count() or 1
+            FileStorage._FileStorage__objects = store
+            shutil.rmtree("file.json.d", ignore_errors=True)
+
+    def test_save_shards_relayout(self):
+        """Test that shards written with another layout are rewritten."""
+        store = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__shards = "4"
+        states = [State(name="S{}".format(i)) for i in range(8)]
+        try:
+            for st in states:
+                self.storage.new(st)
+            self.storage.save()
+            FileStorage._FileStorage__shards = "3"
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            ids = {st.id for st in states}
+            for st in list(self.storage.iter(State)):
+                if st.id in ids:
+                    self.storage.delete(st)
+            self.storage.save()
+            self.assertTrue(set(os.listdir("file.json.d")) <=
+                            {"0.json", "1.json", "2.json"})
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            self.assertEqual([self.state.id],
+                             [st.id for st in self.storage.iter(State)])
+        finally:
+            FileStorage._FileStorage__shards = None
+            FileStorage._FileStorage__relayout = False
+            FileStorage._FileStorage__objects = store
+            for st in states:
+                self.storage.delete(st)
+            self.storage.save()
+            shutil.rmtree("file.json.d", ignore_errors=True)
+
+    def test_save_journal(self):
+        """Test that journal mode appends only changed objects."""
+        self.storage.save()
+        FileStorage._FileStorage__journal = True
+        try:
+            st = State(name="Oregon")
+            self.storage.new(st)
+            self.storage.save()
+            with open("file.json.log", "r", encoding="utf-8") as f:
+                lines = f.readlines()
+            self.assertEqual(1, len(lines))
+            self.assertIn("State." + st.id, lines[0])
+            self.storage.delete(st)
+            self.storage.save()
+            with open("file.json.log", "r", encoding="utf-8") as f:
+                lines = f.readlines()
+            self.assertEqual(2, len(lines))
+            self.assertEqual({"State." + st.id: None}, json.loads(lines[1]))
+        finally:
+            FileStorage._FileStorage__journal = False
+            self.storage.save()
+        self.assertFalse(os.path.exists("file.json.log"))
+
+    def test_reload_journal(self):
+        """Test that reload replays the journal over file.json."""
+        store = FileStorage._FileStorage__objects
+        self.storage.save()
+        FileStorage._FileStorage__journal = True
+        st = State(name="Oregon")
+        try:
+            self.storage.new(st)
+            self.storage.save()
+            self.storage.delete(self.user)
+            self.storage.save()
+            FileStorage._FileStorage__objects = {}
+            self.storage.reload()
+            reloaded = self.storage.all()
+            self.assertIn("State." + st.id, reloaded)
+            self.assertEqual("Oregon", reloaded["State." + st.id].name)
+            self.assertNotIn("User." + self.user.id, reloaded)
+        finally:
+            FileStorage._FileStorage__journal = False
+            FileStorage._FileStorage__objects = store
+            self.storage.delete(st)
+            self.storage.new(self.user)
+            self.storage.save()
+
+    def test_save_journal_compaction(self):
+        """Test that the journal is folded into file.json when too big."""
+        FileStorage._FileStorage__journal = True
+        FileStorage._FileStorage__journal_max = 0
+        st = State(name="Oregon")
+        try:
+            self.storage.new(st)
+            self.storage.save()
+            self.assertFalse(os.path.exists("file.json.log"))
+            with open("file.json", "r", encoding="utf-8") as f:
+                self.assertIn("State." + st.id, json.load(f))
+        finally:
+            FileStorage._FileStorage__journal = False
+            FileStorage._FileStorage__journal_max = 8 * 1024 * 1024
+            self.storage.delete(st)
+
+    def test_reload_stream(self):
+        """Test that records are decoded one by one across read chunks."""
+        stream = codec._stream
+        records = {"State.1": {"name": "}{,:\"", "__class__": "State"},
+                   "City.2": {"state_id": "1", "__class__": "City"}}
+        for text in (json.dumps(records), json.dumps(records, indent=4)):
+            for size in (1, 5, 4096):
+                out = list(stream(io.StringIO(text), size))
+                self.assertEqual(records, {k: o for k, t, o in out})
+                for k, t, o in out:
+                    self.assertEqual(o, json.loads(t))
+        self.assertEqual([], list(stream(io.StringIO(" {} "), 1)))
+        for text in ("", "{", '{"State.1": {}', "[]"):
+            with self.assertRaises(ValueError):
+                list(stream(io.StringIO(text), 2))
+
     def test_reload_no_file(self):
         """Test reload method with no existing file.json."""
         try:
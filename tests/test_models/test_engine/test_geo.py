@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/geo.py."""
+import pep8
+import unittest
+from models.engine import geo
+
+
+class TestGeo(unittest.TestCase):
+    """Unittests for testing the geometry of near() and within()."""
+
+    def test_pep8(self):
+        """Test pep8 styling."""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/geo.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_docstrings(self):
+        """Check for docstrings."""
+        self.assertIsNotNone(geo.__doc__)
+        self.assertIsNotNone(geo.distance.__doc__)
+        self.assertIsNotNone(geo.bounds.__doc__)
+        self.assertIsNotNone(geo.contains.__doc__)
+
+    def test_distance(self):
+        """Test great circle distances."""
+        self.assertEqual(0, geo.distance(37.77, -122.42, 37.77, -122.42))
+        sf_la = geo.distance(37.7749, -122.4194, 34.0522, -118.2437)
+        self.assertAlmostEqual(559.1, sf_la, delta=1)
+        self.assertAlmostEqual(111.2, geo.distance(0, 179.5, 0, -179.5),
+                               delta=0.1)
+
+    def test_bounds(self):
+        """Test the bounding box of a circle."""
+        south, west, north, east = geo.bounds(37.77, -122.42, 10)
+        self.assertAlmostEqual(10, geo.distance(37.77, -122.42, north,
+                                                -122.42), delta=0.01)
+        self.assertAlmostEqual(37.77 - (north - 37.77), south)
+        self.assertLess(west, -122.42)
+        self.assertAlmostEqual(-122.42 - west, east + 122.42)
+
+    def test_bounds_wrap(self):
+        """Test boxes crossing the antimeridian or a pole."""
+        south, west, north, east = geo.bounds(0, 179.99, 10)
+        self.assertGreater(west, east)
+        self.assertEqual((-180.0, 180.0), geo.bounds(89.99, 0, 10)[1::2])
+        self.assertEqual(90.0, geo.bounds(89.99, 0, 10)[2])
+
+    def test_contains(self):
+        """Test points inside and outside boxes."""
+        self.assertTrue(geo.contains((30, -125, 40, -120), 37.77, -122.42))
+        self.assertFalse(geo.contains((30, -125, 40, -120), 41, -122.42))
+        self.assertFalse(geo.contains((30, -125, 40, -120), 37.77, -119))
+        self.assertTrue(geo.contains((-1, 179, 1, -179), 0, -179.5))
+        self.assertFalse(geo.contains((-1, 179, 1, -179), 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
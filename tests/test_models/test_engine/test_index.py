@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/index.py."""
+import pep8
+import unittest
+from models.engine import index
+from models.engine.index import GridIndex
+from models.engine.index import SortedIndex
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Unittests for testing the SortedIndex class."""
+
+    def setUp(self):
+        """SortedIndex testing setup.
+
+        Indexes a few ids by price, two of them sharing a price.
+        """
+        self.index = SortedIndex("price", [("c", 30), ("a", 10),
+                                           ("b", 30), ("d", None)])
+
+    def test_pep8(self):
+        """Test pep8 styling."""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/index.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_docstrings(self):
+        """Check for docstrings."""
+        self.assertIsNotNone(index.__doc__)
+        self.assertIsNotNone(SortedIndex.__doc__)
+        self.assertIsNotNone(SortedIndex.add.__doc__)
+        self.assertIsNotNone(SortedIndex.discard.__doc__)
+        self.assertIsNotNone(SortedIndex.after.__doc__)
+        self.assertIsNotNone(SortedIndex.range.__doc__)
+
+    def test_init(self):
+        """Test entries are sorted by value then id, None left out."""
+        self.assertEqual("price", self.index.attr)
+        self.assertEqual(3, len(self.index))
+        self.assertEqual([(10, "a"), (30, "b"), (30, "c")],
+                         self.index.after())
+
+    def test_after(self):
+        """Test seeking past a cursor."""
+        self.assertEqual([(30, "b")], self.index.after(limit=2)[1:])
+        self.assertEqual([(30, "c")], self.index.after((30, "b")))
+        self.assertEqual([(30, "b"), (30, "c")],
+                         self.index.after([10, "a"], 5))
+        self.assertEqual([], self.index.after((30, "c")))
+        self.assertEqual([(10, "a")], self.index.after((5, "z"), 1))
+
+    def test_range(self):
+        """Test range queries on values."""
+        self.assertEqual([(30, "b"), (30, "c")], self.index.range(30, 30))
+        self.assertEqual([(10, "a")], self.index.range(high=30,
+                                                       include_high=False))
+        self.assertEqual([(30, "b"), (30, "c")],
+                         self.index.range(10, include_low=False))
+        self.assertEqual([(10, "a"), (30, "b")], self.index.range(limit=2))
+        self.assertEqual([], self.index.range(40))
+        self.assertEqual([], self.index.range(30, 10))
+
+    def test_iter(self):
+        """Test iterating in both directions."""
+        self.assertEqual(self.index.after(), list(self.index))
+        self.assertEqual([(30, "c"), (30, "b"), (10, "a")],
+                         list(reversed(self.index)))
+
+    def test_add(self):
+        """Test adding and moving ids."""
+        self.index.add("e", 20)
+        self.index.add("a", 40)
+        self.assertEqual([(20, "e"), (30, "b"), (30, "c"), (40, "a")],
+                         self.index.after())
+        self.index.add("b", None)
+        self.assertEqual(3, len(self.index))
+        with self.assertRaises(TypeError):
+            self.index.add("c", "abc")
+        self.assertEqual([(20, "e"), (30, "c"), (40, "a")],
+                         self.index.after())
+
+    def test_discard(self):
+        """Test removing ids."""
+        self.index.discard("b")
+        self.index.discard("missing")
+        self.assertEqual([(10, "a"), (30, "c")], self.index.after())
+
+
+class TestGridIndex(unittest.TestCase):
+    """Unittests for testing the GridIndex class."""
+
+    def setUp(self):
+        """GridIndex testing setup.
+
+        Indexes a few points, one on each side of the antimeridian.
+        """
+        self.index = GridIndex(0.5, [("sf", 37.77, -122.42),
+                                     ("oak", 37.80, -122.27),
+                                     ("la", 34.05, -118.24),
+                                     ("fiji", -17.7, 178.1),
+                                     ("samoa", -13.8, -172.1),
+                                     ("none", None, 1.0)])
+
+    def test_docstrings(self):
+        """Check for docstrings."""
+        self.assertIsNotNone(GridIndex.__doc__)
+        self.assertIsNotNone(GridIndex.add.__doc__)
+        self.assertIsNotNone(GridIndex.discard.__doc__)
+        self.assertIsNotNone(GridIndex.within.__doc__)
+
+    def test_within(self):
+        """Test bounding box queries."""
+        self.assertEqual(5, len(self.index))
+        self.assertEqual(0.5, self.index.cell)
+        found = self.index.within((37, -123, 38, -122))
+        self.assertEqual({("sf", 37.77, -122.42), ("oak", 37.80, -122.27)},
+                         set(found))
+        found = self.index.within((-20, 170, -10, -170))
+        self.assertEqual({"fiji", "samoa"}, {id for id, a, o in found})
+        found = self.index.within((-90, -180, 90, 180))
+        self.assertEqual(5, len(list(found)))
+        self.assertEqual([], list(self.index.within((0, 0, 1, 1))))
+
+    def test_add(self):
+        """Test moving and removing points."""
+        self.index.add("sf", 34.0, -118.3)
+        found = self.index.within((33, -119, 35, -118))
+        self.assertEqual({"sf", "la"}, {id for id, a, o in found})
+        self.index.add("la", None, None)
+        self.index.discard("sf")
+        self.index.discard("missing")
+        self.assertEqual([], list(self.index.within((33, -119, 35, -118))))
+        self.assertEqual(3, len(self.index))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/lookups.py."""
+import pep8
+import unittest
+from models.engine import lookups
+
+
+class TestLookups(unittest.TestCase):
+    """Unittests for testing the filter() lookups."""
+
+    def test_pep8(self):
+        """Test pep8 styling."""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/lookups.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_docstrings(self):
+        """Check for docstrings."""
+        self.assertIsNotNone(lookups.__doc__)
+        self.assertIsNotNone(lookups.parse.__doc__)
+        self.assertIsNotNone(lookups.matches.__doc__)
+        self.assertIsNotNone(lookups.describe.__doc__)
+
+    def test_parse(self):
+        """Test lookups are split into predicates."""
+        fields = ("city_id", "name", "price_by_night")
+        self.assertEqual(
+            [("city_id", "eq", "c1"), ("price_by_night", "lte", 200),
+             ("name", "in", ["a", "b"])],
+            lookups.parse("Place", fields, {"city_id": "c1",
+                                            "price_by_night__lte": 200,
+                                            "name__in": ("a", "b")}))
+        with self.assertRaises(ValueError):
+            lookups.parse("Place", fields, {"max_guest__gte": 4})
+        with self.assertRaises(ValueError):
+            lookups.parse("Place", fields, {"name__like": "a%"})
+        self.assertEqual(
+            [("price_by_night", "lte", "200"), ("name", "in", ["1", "2"])],
+            lookups.parse("Place", fields, {"price_by_night__lte": 200,
+                                            "name__in": (1, 2)},
+                          lambda attr, value: str(value)))
+
+    def test_matches(self):
+        """Test predicates compare like SQL."""
+        self.assertTrue(lookups.matches(100, "lte", 200))
+        self.assertFalse(lookups.matches(300, "lte", 200))
+        self.assertTrue(lookups.matches(4, "gte", 4))
+        self.assertFalse(lookups.matches(4, "gt", 4))
+        self.assertTrue(lookups.matches("a", "in", ["a", "b"]))
+        self.assertTrue(lookups.matches("a", "ne", "b"))
+        self.assertFalse(lookups.matches(None, "lte", 200))
+        self.assertFalse(lookups.matches(None, "ne", 200))
+        self.assertFalse(lookups.matches(None, "in", [None]))
+        self.assertTrue(lookups.matches(None, "eq", None))
+        self.assertTrue(lookups.matches(1, "ne", None))
+        self.assertFalse(lookups.matches(1, "eq", None))
+
+    def test_describe(self):
+        """Test predicates are described as strings."""
+        self.assertEqual(["price_by_night lte 200", "city_id eq 'c1'"],
+                         lookups.describe([("price_by_night", "lte", 200),
+                                           ("city_id", "eq", "c1")]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,264 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/mmap_storage.py."""
+import gc
+import io
+import os
+import json
+import pep8
+import unittest
+import models
+from models.engine import codec
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.engine.mmap_storage import MmapStorage
+from models.city import City
+from models.place import Place
+from models.state import State
+
+
+class TestMmapStorage(unittest.TestCase):
+    """Unittests for testing the MmapStorage class."""
+
+    @classmethod
+    def setUpClass(cls):
+        """MmapStorage testing setup.
+
+        Writes a binary snapshot of a few objects with FileStorage.
+        """
+        cls.store = FileStorage._FileStorage__objects
+        cls.persisted = FileStorage._FileStorage__persisted
+        FileStorage._FileStorage__codec = codec.get("binary")
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__persisted = {}
+        cls.state = State(name="California")
+        cls.city = City(name="Fremont", state_id=cls.state.id)
+        cls.places = [Place(name="Loft {}".format(i), city_id=cls.city.id,
+                            number_rooms=i, latitude=37.0 + i / 100,
+                            longitude=-122.0) for i in range(50)]
+        file_storage = FileStorage()
+        for obj in [cls.state, cls.city] + cls.places:
+            file_storage.new(obj)
+        file_storage.save()
+        cls.storage = MmapStorage()
+        cls.storage.reload()
+
+    @classmethod
+    def tearDownClass(cls):
+        """MmapStorage testing teardown.
+
+        Restore FileStorage and delete the snapshot.
+        """
+        FileStorage._FileStorage__codec = codec.get("json")
+        FileStorage._FileStorage__objects = cls.store
+        FileStorage._FileStorage__persisted = cls.persisted
+        for name in ("file.bin", "file.bin.log"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        MmapStorage().reload()
+        del cls.storage
+
+    def test_pep8(self):
+        """Test pep8 styling."""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/mmap_storage.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_docstrings(self):
+        """Check for docstrings."""
+        self.assertIsNotNone(MmapStorage.__doc__)
+        self.assertIsNotNone(MmapStorage.all.__doc__)
+        self.assertIsNotNone(MmapStorage.get.__doc__)
+        self.assertIsNotNone(MmapStorage.count.__doc__)
+        self.assertIsNotNone(MmapStorage.reload.__doc__)
+        self.assertIsNotNone(MmapStorage.close.__doc__)
+
+    def test_all(self):
+        """Test all() returns every object of the snapshot."""
+        objs = self.storage.all()
+        self.assertEqual(52, len(objs))
+        state = objs["State." + self.state.id]
+        self.assertIsNot(self.state, state)
+        self.assertEqual(self.state.to_dict(), state.to_dict())
+
+    def test_all_cls(self):
+        """Test all() filtered by class, given as a class or a name."""
+        places = self.storage.all(Place)
+        self.assertEqual(50, len(places))
+        self.assertEqual(places.keys(), self.storage.all("Place").keys())
+        self.assertEqual({}, self.storage.all("Review"))
+
+    def test_iter(self):
+        """Test iter() yields the objects all() returns."""
+        self.assertEqual(list(self.storage.all(Place)),
+                         ["Place." + o.id for o in self.storage.iter(Place)])
+        self.assertEqual(52, len(list(self.storage.iter())))
+
+    def test_get(self):
+        """Test get() looks objects up through the index."""
+        place = self.places[17]
+        found = self.storage.get(Place, place.id)
+        self.assertEqual(place.to_dict(), found.to_dict())
+        self.assertIsNone(self.storage.get(Place, self.city.id))
+        self.assertIsNone(self.storage.get("City", "missing"))
+
+    def test_page(self):
+        """Test keyset pagination over the snapshot."""
+        expected = sorted(self.places, key=lambda pl: (pl.name, pl.id))
+        page, cursor = self.storage.page(Place, limit=20)
+        self.assertEqual([pl.id for pl in expected[:20]],
+                         [pl.id for pl in page])
+        ids = [pl.id for pl in page]
+        while cursor is not None:
+            page, cursor = self.storage.page("Place", after=cursor, limit=20)
+            ids += [pl.id for pl in page]
+        self.assertEqual([pl.id for pl in expected], ids)
+        page, cursor = self.storage.page(Place, order_by="number_rooms",
+                                         limit=1)
+        self.assertEqual([self.places[0].id], [pl.id for pl in page])
+
+    def test_count(self):
+        """Test counting the objects of the snapshot."""
+        self.assertEqual(52, self.storage.count())
+        self.assertEqual(50, self.storage.count(Place))
+        self.assertEqual(1, self.storage.count("State"))
+        self.assertEqual(0, self.storage.count("Review"))
+
+    def test_filter(self):
+        """Test filtering the objects of the snapshot."""
+        found = self.storage.filter(Place, city_id=self.city.id,
+                                    number_rooms__lt=3)
+        self.assertCountEqual([pl.id for pl in self.places[:3]],
+                              [pl.id for pl in found])
+        self.assertEqual({"class": "Place", "path": "scan", "index": None,
+                          "candidates": 50, "ordered": False,
+                          "filters": ["number_rooms lt 3"]},
+                         self.storage.explain(Place, number_rooms__lt=3))
+        top = self.storage.filter(Place, order_by="-number_rooms", limit=2)
+        self.assertEqual([pl.id for pl in self.places[:-3:-1]],
+                         [pl.id for pl in top])
+
+    def test_near(self):
+        """Test radius and bounding box searches over the snapshot."""
+        found = self.storage.near(Place, 37.101, -122.0, 2.5)
+        self.assertEqual([self.places[i].id for i in (10, 11, 9, 12, 8)],
+                         [pl.id for pl in found])
+        found = self.storage.within(Place, 37.195, -123, 37.255, -121)
+        self.assertCountEqual([pl.id for pl in self.places[20:26]],
+                              [pl.id for pl in found])
+
+    def test_cache(self):
+        """Test decoded objects are shared while referenced."""
+        city = self.storage.get(City, self.city.id)
+        self.assertIs(city, self.storage.all(City)["City." + self.city.id])
+        del city
+        gc.collect()
+        self.assertNotIn("City." + self.city.id,
+                         MmapStorage._MmapStorage__cache)
+
+    @unittest.skipIf(type(models.storage) == DBStorage,
+                     "Testing DBStorage")
+    def test_relationships(self):
+        """Test the file-mode relationship properties."""
+        saved = models.storage
+        models.storage = self.storage
+        try:
+            state = self.storage.get(State, self.state.id)
+            self.assertEqual([self.city.id], [c.id for c in state.cities])
+        finally:
+            models.storage = saved
+
+    def test_read_only(self):
+        """Test that writes raise io.UnsupportedOperation."""
+        with self.assertRaises(io.UnsupportedOperation):
+            self.storage.new(State())
+        with self.assertRaises(io.UnsupportedOperation):
+            self.storage.save()
+        with self.assertRaises(io.UnsupportedOperation):
+            self.storage.delete(self.state)
+
+    def test_reload_journal(self):
+        """Test journaled changes are applied over the snapshot."""
+        place = self.places[0]
+        record = self.places[1].to_dict()
+        record["name"] = "Renamed"
+        with open("file.bin.log", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"Place." + place.id: None}) + "\n")
+            f.write(json.dumps({"Place." + record["id"]: record}) + "\n")
+        try:
+            self.storage.close()
+            self.assertIsNone(self.storage.get(Place, place.id))
+            self.assertNotIn("Place." + place.id, self.storage.all(Place))
+            self.assertEqual(
+                "Renamed", self.storage.get(Place, record["id"]).name)
+            self.assertEqual(49, self.storage.count(Place))
+            self.assertEqual(51, self.storage.count())
+        finally:
+            os.remove("file.bin.log")
+            self.storage.close()
+        self.assertEqual(self.places[1].name,
+                         self.storage.get(Place, record["id"]).name)
+
+    def test_reload_journal_update(self):
+        """Test objects updated by the journal replace the snapshot's."""
+        state = self.storage.get(State, self.state.id)
+        file_storage = FileStorage()
+        FileStorage._FileStorage__journal = True
+        self.state.name = "Oregon"
+        try:
+            file_storage.new(self.state)
+            file_storage.save()
+            self.storage.close()
+            self.assertEqual("California", state.name)
+            self.assertEqual(["Oregon"], [
+                st.name for st in self.storage.all(State).values()])
+            self.assertEqual(["Oregon"],
+                             [st.name for st in self.storage.iter(State)])
+            snapshot = self.storage._MmapStorage__lookup("State",
+                                                         self.state.id)
+            self.assertEqual("California", snapshot.name)
+            self.assertEqual("Oregon",
+                             self.storage.get(State, self.state.id).name)
+        finally:
+            FileStorage._FileStorage__journal = False
+            self.state.name = "California"
+            file_storage.new(self.state)
+            file_storage.save()
+            self.storage.close()
+        self.assertEqual("California",
+                         self.storage.get(State, self.state.id).name)
+
+    def test_reload_replaced(self):
+        """Test close() maps a snapshot replaced by FileStorage.save()."""
+        state = State(name="Nevada")
+        file_storage = FileStorage()
+        file_storage.new(state)
+        file_storage.save()
+        try:
+            self.storage.close()
+            self.assertEqual("Nevada",
+                             self.storage.get(State, state.id).name)
+        finally:
+            file_storage.delete(state)
+            file_storage.save()
+            self.storage.close()
+        self.assertIsNone(self.storage.get(State, state.id))
+
+    def test_reload_no_index(self):
+        """Test that a snapshot without an index raises ValueError."""
+        with open("test_mmap.bin", "wb") as f:
+            f.write(codec.BinaryCodec.MAGIC + b"E")
+        storage = MmapStorage()
+        MmapStorage._MmapStorage__file_path = "test_mmap.bin"
+        try:
+            with self.assertRaises(ValueError):
+                storage.reload()
+        finally:
+            MmapStorage._MmapStorage__file_path = "file.bin"
+            os.remove("test_mmap.bin")
+            storage.reload()
+
+
+if __name__ == "__main__":
+    unittest.main()
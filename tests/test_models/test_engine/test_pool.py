@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/pool.py."""
+import os
+import pep8
+import unittest
+from unittest.mock import patch
+from models.engine import pool
+from models.engine.pool import MeteredPool
+from sqlalchemy import create_engine
+from sqlalchemy import exc
+from sqlalchemy import text
+
+
+class TestMeteredPool(unittest.TestCase):
+    """Unittests for testing the MeteredPool class."""
+
+    def setUp(self):
+        """MeteredPool testing setup.
+
+        Create an engine on a SQLite file with a two connection pool and
+        one overflow connection.
+        """
+        options = pool.options()
+        options.update(pool_size=2, max_overflow=1, pool_timeout=0.05)
+        self.engine = create_engine("sqlite:///test_pool.db", **options)
+
+    def tearDown(self):
+        """MeteredPool testing teardown.
+
+        Dispose of the engine and delete the SQLite file.
+        """
+        self.engine.dispose()
+        try:
+            os.remove("test_pool.db")
+        except IOError:
+            pass
+
+    def test_pep8(self):
+        """Test pep8 styling."""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/pool.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_docstrings(self):
+        """Check for docstrings."""
+        self.assertIsNotNone(pool.__doc__)
+        self.assertIsNotNone(pool.options.__doc__)
+        self.assertIsNotNone(MeteredPool.__doc__)
+        self.assertIsNotNone(MeteredPool.connect.__doc__)
+        self.assertIsNotNone(MeteredPool.metrics.__doc__)
+
+    def test_options(self):
+        """Test the pool arguments are read from the environment."""
+        self.assertEqual({"poolclass": MeteredPool, "pool_size": 5,
+                          "max_overflow": 10, "pool_recycle": -1,
+                          "pool_timeout": 30.0, "pool_pre_ping": True},
+                         pool.options())
+        env = {"HBNB_MYSQL_POOL_SIZE": "8",
+               "HBNB_MYSQL_POOL_MAX_OVERFLOW": "0",
+               "HBNB_MYSQL_POOL_RECYCLE": "3600",
+               "HBNB_MYSQL_POOL_TIMEOUT": "2.5",
+               "HBNB_MYSQL_POOL_PRE_PING": "0"}
+        with patch.dict(os.environ, env):
+            options = pool.options()
+        self.assertEqual((8, 0, 3600, 2.5, False),
+                         (options["pool_size"], options["max_overflow"],
+                          options["pool_recycle"], options["pool_timeout"],
+                          options["pool_pre_ping"]))
+
+    def test_metrics(self):
+        """Test checkouts, in use connections and overflows are counted."""
+        metrics = self.engine.pool.metrics()
+        self.assertEqual((2, 1, 0, 0, 0.0), (
+            metrics["size"], metrics["max_overflow"], metrics["in_use"],
+            metrics["checkouts"], metrics["checkout_p99_ms"]))
+        connections = [self.engine.connect() for i in range(3)]
+        connections[0].execute(text("SELECT 1"))
+        metrics = self.engine.pool.metrics()
+        self.assertEqual((3, 1, 3, 1, 3), (
+            metrics["in_use"], metrics["overflow"], metrics["peak_in_use"],
+            metrics["overflows"], metrics["checkouts"]))
+        self.assertGreater(metrics["checkout_max_ms"], 0)
+        self.assertLessEqual(metrics["checkout_p50_ms"],
+                             metrics["checkout_max_ms"])
+        for connection in connections:
+            connection.close()
+        metrics = self.engine.pool.metrics()
+        self.assertEqual((0, 0, 3, 1), (
+            metrics["in_use"], metrics["overflow"], metrics["peak_in_use"],
+            metrics["overflows"]))
+
+    def test_timeout(self):
+        """Test checkouts timing out are counted and raised."""
+        connections = [self.engine.connect() for i in range(3)]
+        with self.assertRaises(exc.TimeoutError):
+            self.engine.connect()
+        self.assertEqual(1, self.engine.pool.metrics()["timeouts"])
+        for connection in connections:
+            connection.close()
+
+    def test_recreate(self):
+        """Test metrics start over when the pool is recreated."""
+        self.engine.connect().close()
+        self.engine.dispose()
+        self.assertIsInstance(self.engine.pool, MeteredPool)
+        self.assertEqual(0, self.engine.pool.metrics()["checkouts"])
+        connections = [self.engine.connect() for i in range(3)]
+        self.assertEqual(1, self.engine.pool.metrics()["overflows"])
+        for connection in connections:
+            connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/rows.py."""
+import os
+import pep8
+import sys
+import unittest
+import models
+from datetime import datetime
+from models.engine import codec
+from models.engine import rows
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.engine.rows import Row
+from models.city import City
+from models.place import Place
+from models.state import State
+
+
+class TestRows(unittest.TestCase):
+    """Unittests for testing the compact row classes."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Rows testing setup.
+
+        Temporarily renames any existing file.json.
+        Creates a model object as reload() builds it and the row standing
+        for it.
+        """
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        record = Place(name="Loft", city_id="c1", user_id="u1",
+                       number_rooms=3, latitude=37.77).to_dict()
+        cls.place = codec.model(Place).from_dict(record)
+        cls.row = codec.model(Place).to_row(record)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Rows testing teardown.
+
+        Restore original file.json.
+        Delete the test instances.
+        """
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        del cls.place
+        del cls.row
+
+    def test_pep8(self):
+        """Test pep8 styling."""
+        style = pep8.StyleGuide(quiet=True)
+        p = style.check_files(["models/engine/rows.py"])
+        self.assertEqual(p.total_errors, 0, "fix pep8")
+
+    def test_docstrings(self):
+        """Check for docstrings."""
+        self.assertIsNotNone(rows.__doc__)
+        self.assertIsNotNone(rows.row_class.__doc__)
+        self.assertIsNotNone(Row.__doc__)
+        self.assertIsNotNone(Row.to_dict.__doc__)
+        self.assertIsNotNone(Row.__str__.__doc__)
+
+    @unittest.skipIf(type(models.storage) == DBStorage,
+                     "Testing DBStorage")
+    def test_row_class(self):
+        """Test the row class mirrors its model class."""
+        cls = type(self.row)
+        self.assertIs(cls, codec.model(Place).row)
+        self.assertTrue(issubclass(cls, Row))
+        self.assertEqual("Place", cls.__name__)
+        self.assertIn("price_by_night", cls.__slots__)
+        self.assertIs(Place.__dict__["reviews"], cls.__dict__["reviews"])
+
+    def test_attributes(self):
+        """Test attribute access matches the model object."""
+        self.assertEqual(self.place.id, self.row.id)
+        self.assertEqual(self.place.created_at, self.row.created_at)
+        self.assertEqual(datetime, type(self.row.updated_at))
+        self.assertEqual(3, self.row.number_rooms)
+        self.assertIsNone(self.place.description)
+        self.assertIsNone(self.row.description)
+        with self.assertRaises(AttributeError):
+            self.row.missing
+
+    def test_extra_attributes(self):
+        """Test attributes that are not columns."""
+        row = codec.model(State).to_row(State(name="Utah").to_dict())
+        row.nickname = "Beehive"
+        self.assertEqual({"nickname": "Beehive"}, row.__dict__)
+        self.assertEqual("Beehive", row.to_dict()["nickname"])
+
+    def test_to_dict(self):
+        """Test to_dict() matches the model object."""
+        self.assertEqual(self.place.to_dict(), self.row.to_dict())
+        self.assertEqual(list(self.place.to_dict()),
+                         list(self.row.to_dict()))
+
+    def test_str(self):
+        """Test __str__ matches the model object."""
+        self.assertEqual(str(self.place), str(self.row))
+
+    @unittest.skipIf(type(models.storage) == DBStorage,
+                     "Testing DBStorage")
+    def test_relationships(self):
+        """Test the copied file-mode relationship properties."""
+        state = State(name="Texas")
+        city = City(name="Austin", state_id=state.id)
+        row = codec.model(State).to_row(state.to_dict())
+        storage = FileStorage()
+        storage.new(city)
+        try:
+            self.assertEqual([city], row.cities)
+        finally:
+            storage.delete(city)
+
+    def test_smaller(self):
+        """Test rows take less memory than model objects."""
+        row_size = sys.getsizeof(self.row)
+        obj_size = sys.getsizeof(self.place) + \
+            sys.getsizeof(self.place.__dict__) + \
+            sys.getsizeof(self.place._sa_instance_state)
+        self.assertLess(row_size, obj_size)
+
+    @unittest.skipIf(type(models.storage) == DBStorage,
+                     "Testing DBStorage")
+    def test_file_storage_rows(self):
+        """Test FileStorage building compact rows on reload."""
+        store = FileStorage._FileStorage__objects
+        compact = FileStorage._FileStorage__rows
+        storage = FileStorage()
+        storage.new(self.place)
+        storage.save()
+        FileStorage._FileStorage__rows = True
+        try:
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            row = storage.get(Place, self.place.id)
+            self.assertIsInstance(row, Row)
+            self.assertEqual(self.place.to_dict(), row.to_dict())
+            row.name = "Studio"
+            row.save()
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            self.assertEqual("Studio", storage.get(Place, row.id).name)
+            storage.delete(storage.get(Place, row.id))
+            storage.save()
+        finally:
+            FileStorage._FileStorage__rows = compact
+            FileStorage._FileStorage__objects = store
+            storage.delete(self.place)
+            storage.save()
+
+    def test_binary(self):
+        """Test rows encode like model objects with the binary codec."""
+        c = codec.get("binary")
+        self.assertEqual(c.encode(self.place), c.encode(self.row))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+"""Defines unittests for DBStorage on SQLite files."""
+import os
+import sqlite3
+import time
+import unittest
+from models.engine.db_storage import DBStorage
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+from sqlalchemy import event
+from sqlalchemy import inspect
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    """Unittests for testing DBStorage on a SQLite file."""
+
+    def setUp(self):
+        """SQLite storage testing setup.
+
+        Create a DBStorage on a SQLite file holding a State and a City.
+        """
+        self.storage = DBStorage("sqlite:///test_sqlite.db")
+        self.storage.reload()
+        self.state = State(name="California")
+        self.city = City(name="San_Jose", state_id=self.state.id)
+        self.storage.new_many([self.state])
+        self.storage.new_many([self.city])
+
+    def tearDown(self):
+        """SQLite storage testing teardown.
+
+        Close the storage and delete the SQLite files.
+        """
+        self.storage.close()
+        self.storage._DBStorage__engine.dispose()
+        for name in ("test_sqlite.db", "test_sqlite.db-wal",
+                     "test_sqlite.db-shm"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def test_pragmas(self):
+        """Test every connection is set up with the tuned pragmas."""
+        session = self.storage._DBStorage__session
+        pragmas = {name: session.execute(
+            text("PRAGMA " + name)).scalar() for name in (
+                "journal_mode", "synchronous", "foreign_keys",
+                "busy_timeout", "cache_size", "temp_store")}
+        self.assertEqual({"journal_mode": "wal", "synchronous": 1,
+                          "foreign_keys": 1, "busy_timeout": 5000,
+                          "cache_size": -65536, "temp_store": 2}, pragmas)
+
+    def test_foreign_key_indexes(self):
+        """Test every foreign key column is indexed."""
+        inspector = inspect(self.storage._DBStorage__engine)
+        for table in inspector.get_table_names():
+            indexed = {index["column_names"][0]
+                       for index in inspector.get_indexes(table)}
+            primary = inspector.get_pk_constraint(table)
+            indexed.add(primary["constrained_columns"][0])
+            for key in inspector.get_foreign_keys(table):
+                self.assertIn(key["constrained_columns"][0], indexed, table)
+
+    def test_foreign_keys(self):
+        """Test foreign keys are enforced."""
+        self.storage.new(City(name="Nowhere", state_id="missing"))
+        with self.assertRaises(IntegrityError):
+            self.storage.save()
+
+    def test_storage(self):
+        """Test objects are stored and queried through the indexes."""
+        self.assertEqual(2, self.storage.count())
+        self.assertEqual("San_Jose",
+                         self.storage.get(City, self.city.id).name)
+        user = User(email="poppy@holberton.com", password="betty")
+        place = Place(name="Loft", city_id=self.city.id, user_id=user.id)
+        self.storage.new_many([user])
+        self.storage.new_many([place])
+        self.assertEqual([place.id], [p.id for p in self.storage.filter(
+            Place, city_id=self.city.id)])
+        plan = self.storage.explain(Place, city_id=self.city.id)["plan"]
+        self.assertIn("ix_places_city_id", str(plan))
+        with self.assertRaises(ValueError):
+            self.storage.page(Place, order_by="reviews")
+
+
+class TestReplicas(unittest.TestCase):
+    """Unittests for testing DBStorage reading from SQLite replicas."""
+
+    files = ("test_primary.db", "test_replica_0.db", "test_replica_1.db")
+
+    def setUp(self):
+        """Replica testing setup.
+
+        Create a DBStorage on a primary SQLite file with two replicas
+        holding a State and a City.
+        """
+        self.storage = self.connect()
+        self.state = State(name="California")
+        self.storage.new_many([self.state])
+        self.replicate()
+
+    def tearDown(self):
+        """Replica testing teardown.
+
+        Close the storage and delete the SQLite files.
+        """
+        self.storage.close()
+        for name in self.files:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(name + suffix)
+                except IOError:
+                    pass
+
+    def connect(self, routing=None):
+        """Return a new DBStorage on the test files."""
+        storage = DBStorage("sqlite:///" + self.files[0],
+                            ["sqlite:///" + f for f in self.files[1:]],
+                            routing)
+        storage.reload()
+        return storage
+
+    def replicate(self, replicas=(1, 2)):
+        """Copy the primary file over the given replicas."""
+        primary = sqlite3.connect(self.files[0])
+        for i in replicas:
+            replica = sqlite3.connect(self.files[i])
+            primary.backup(replica)
+            replica.close()
+        primary.close()
+
+    def test_routing(self):
+        """Test reads go to a replica and writes to the primary."""
+        self.storage.new_many([State(name="Nevada")])
+        self.assertEqual(1, self.storage.count(State))
+        self.assertEqual(["California"], [
+            st.name for st in self.storage.all(State).values()])
+        self.storage.close()
+        self.replicate()
+        self.assertEqual(2, self.storage.count(State))
+        with self.assertRaises(ValueError):
+            DBStorage("sqlite:///" + self.files[0], routing="random")
+
+    def test_round_robin(self):
+        """Test sessions take the replicas in turn."""
+        self.storage.new_many([State(name="Nevada")])
+        self.replicate((1,))
+        counts = []
+        for i in range(4):
+            counts.append(self.storage.count(State))
+            self.storage.close()
+        self.assertEqual([2, 1, 2, 1], counts)
+
+    def test_least_latency(self):
+        """Test sessions take the fastest replica once all were tried."""
+        storage = self.connect("least_latency")
+        slow = storage._DBStorage__replicas[0]
+
+        def wait(*args):
+            time.sleep(0.01)
+        event.listen(slow, "before_cursor_execute", wait)
+        self.storage.new_many([State(name="Nevada")])
+        self.replicate((2,))
+        counts = []
+        for i in range(4):
+            counts.append(storage.count(State))
+            storage.close()
+        self.assertEqual([1, 2, 2, 2], counts)
+
+    def test_read_your_writes(self):
+        """Test read_your_writes() sends reads to the primary."""
+        city = City(name="San_Jose", state_id=self.state.id)
+        self.storage.new(city)
+        self.storage.save()
+        self.assertIsNone(self.storage.get(City, city.id))
+        self.storage.read_your_writes()
+        self.assertEqual(city.id, self.storage.get(City, city.id).id)
+        self.storage.close()
+        self.assertIsNone(self.storage.get(City, city.id))
+
+    def test_write_replica_object(self):
+        """Test objects read from a replica are written to the primary."""
+        state = self.storage.get(State, self.state.id)
+        state.name = "Oregon"
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual("California",
+                         self.storage.get(State, state.id).name)
+        self.storage.read_your_writes()
+        self.assertEqual("Oregon", self.storage.get(State, state.id).name)
+        self.storage.close()
+        self.storage.delete(self.storage.get(State, state.id))
+        self.storage.save()
+        self.storage.read_your_writes()
+        self.assertIsNone(self.storage.get(State, state.id))
+
+
+if __name__ == "__main__":
+    unittest.main()
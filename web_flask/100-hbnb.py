@@ -3,23 +3,40 @@
 
 The application listens on 0.0.0.0, port 5000.
 Routes:
-    /hbnb: HBnB home page.
+    /hbnb: HBnB home page, with Places a page at a time.
 """
 from models import storage
 from flask import Flask
 from flask import render_template
+from flask import request
+from flask import url_for
 
 app = Flask(__name__)
 
 
 @app.route("/hbnb", strict_slashes=False)
 def hbnb():
-    """Displays the main HBnB filters HTML page."""
-    states = storage.all("State")
+    """Displays the main HBnB filters HTML page.
+
+    Places are sorted by name and shown a page at a time. The after_name
+    and after_id query parameters hold the cursor of the page to show.
+    The relationships the template reads are loaded with the states and
+    places, so the page costs the same number of queries however many
+    places, reviews and amenities it shows.
+    """
+    states = storage.all("State", load=["cities"])
     amenities = storage.all("Amenity")
-    places = storage.all("Place")
+    after = None
+    if "after_id" in request.args:
+        after = (request.args.get("after_name", ""), request.args["after_id"])
+    places, cursor = storage.page("Place", order_by="name", after=after,
+                                  load=["user", "amenities", "reviews.user"])
+    next_page = None
+    if cursor is not None:
+        next_page = url_for("hbnb", after_name=cursor[0], after_id=cursor[1])
     return render_template("100-hbnb.html",
-                           states=states, amenities=amenities, places=places)
+                           states=states, amenities=amenities, places=places,
+                           next_page=next_page)
 
 
 @app.teardown_appcontext
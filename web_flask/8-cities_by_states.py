@@ -18,7 +18,7 @@ def cities_by_states():
 
     States/cities are sorted by name.
     """
-    states = storage.all("State")
+    states = storage.all("State", load=["cities"])
     return render_template("8-cities_by_states.html", states=states)
 
 